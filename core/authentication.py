@@ -1,7 +1,10 @@
+import jwt
+from django.conf import settings
 from rest_framework.authentication import BaseAuthentication
 from rest_framework.exceptions import AuthenticationFailed
 
 from users.models import CustomAuthToken
+from users.utils import TokenManager
 
 
 class CustomJWTAuthentication(BaseAuthentication):
@@ -14,20 +17,32 @@ class CustomJWTAuthentication(BaseAuthentication):
     stored authentication tokens. If validation is successful, it returns the
     associated user and token, enabling further processing of the request in an
     authenticated context.
+
+    With `JWT_STATELESS_AUTH` enabled the signature and expiry are verified
+    in-process and the user is resolved through the shared token cache, so the
+    database is only queried for keys that are not cached yet. A pair already
+    resolved by `TokenCacheMiddleware` is reused as is.
     """
     def authenticate(self, request):
         auth_header = request.META.get("HTTP_AUTHORIZATION")
         if not auth_header:
             return None
 
+        jwt_auth = getattr(request, "jwt_auth", None)
+        if settings.JWT_STATELESS_AUTH and jwt_auth is not None:
+            return jwt_auth
+
         try:
             token_type, token = auth_header.split()
             if token_type != "Bearer":
                 raise AuthenticationFailed("Invalid Token type")
 
-            token = CustomAuthToken.objects.get(key=token)
+            if settings.JWT_STATELESS_AUTH:
+                return TokenManager.authenticate_token(token)
+
+            token = CustomAuthToken.objects.select_related("user").for_key(token).get()
 
-        except (ValueError, CustomAuthToken.DoesNotExist):
+        except (ValueError, jwt.InvalidTokenError, CustomAuthToken.DoesNotExist):
             raise AuthenticationFailed("Invalid Token")
 
         return token.user, token
@@ -0,0 +1,33 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.hashers import make_password
+
+from core.hashers import PasswordHashingPool
+
+
+class PooledModelBackend(ModelBackend):
+    """
+    `ModelBackend` that verifies passwords in the bounded `PasswordHashingPool`.
+
+    The lookup and the active-user rule are the same as in `ModelBackend`. The hash check
+    runs in the pool, and a hash made with an outdated policy is rehashed in the
+    background instead of being saved while the login request waits. Unknown usernames
+    still cost one hash computation, so they cannot be told apart by response time.
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        UserModel = get_user_model()
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+
+        try:
+            user = UserModel._default_manager.get_by_natural_key(username)
+        except UserModel.DoesNotExist:
+            PasswordHashingPool.run(make_password, password)
+            return None
+
+        if PasswordHashingPool.check_password(user, password) and self.user_can_authenticate(user):
+            return user
+        return None
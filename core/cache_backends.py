@@ -0,0 +1,265 @@
+import logging
+import os
+import pickle
+import threading
+import time
+import uuid
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.cache.backends.redis import RedisCache
+
+from core.local_cache import LocalLRUCache
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class LocalTier:
+    """
+    Process-wide L1 state of a `TwoTierRedisCache`.
+
+    Django creates a cache backend instance per thread, so the in-process LRU, the
+    counters and the pub/sub subscriber live here and are shared by every instance that
+    points at the same Redis location and invalidation channel.
+
+    Attributes:
+        l1 (LocalLRUCache): The size- and TTL-bounded in-process cache.
+        channel (str): Pub/sub channel used for invalidation messages.
+        origin (str): Identifier of this process in invalidation messages.
+    """
+
+    RECONNECT_DELAY = 1  # seconds
+
+    _registry = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(self, channel: str, maxsize: int, timeout: float):
+        self.l1 = LocalLRUCache(maxsize=maxsize, timeout=timeout)
+        self.channel = channel
+        self.origin = uuid.uuid4().hex
+        self.l2_hits = 0
+        self.l2_misses = 0
+        self.invalidations_received = 0
+        self._subscriber_pid = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_location(cls, location, channel: str, maxsize: int, timeout: float) -> "LocalTier":
+        key = (str(location), channel)
+        with cls._registry_lock:
+            if key not in cls._registry:
+                cls._registry[key] = cls(channel, maxsize, timeout)
+            return cls._registry[key]
+
+    def ensure_subscriber(self, get_client) -> None:
+        """
+        Starts the subscriber thread once per process, also in processes forked after startup.
+        """
+        pid = os.getpid()
+        if self._subscriber_pid == pid:
+            return
+
+        with self._lock:
+            if self._subscriber_pid == pid:
+                return
+            if self._subscriber_pid is not None:
+                self.l1.clear()  # Inherited from the parent process
+                self.origin = uuid.uuid4().hex
+            self._subscriber_pid = pid
+            thread = threading.Thread(target=self._listen, args=(get_client,), name="cache-invalidation", daemon=True)
+            thread.start()
+
+    def publish(self, client, keys) -> None:
+        """
+        Broadcasts invalidated keys as "<origin>|<key>" messages to the other processes.
+        """
+        with client.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.publish(self.channel, f"{self.origin}|{key}")
+            pipe.execute()
+
+    def handle_invalidation(self, data: bytes) -> None:
+        origin, _, key = data.decode().partition("|")
+        if origin == self.origin:
+            return
+
+        self.invalidations_received += 1
+        if key == "*":
+            self.l1.clear()
+        else:
+            self.l1.delete(key)
+
+    def _listen(self, get_client) -> None:
+        while True:
+            try:
+                pubsub = get_client().pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                # Anything written while we were not subscribed may be stale
+                self.l1.clear()
+                for message in pubsub.listen():
+                    if message["type"] == "message":
+                        self.handle_invalidation(message["data"])
+            except Exception as e:
+                logger.warning(f"Cache invalidation subscriber disconnected: {e}")
+                self.l1.clear()
+                time.sleep(self.RECONNECT_DELAY)
+
+    def stats(self) -> dict:
+        return {
+            "l1": self.l1.stats(),
+            "l2_hits": self.l2_hits,
+            "l2_misses": self.l2_misses,
+            "invalidations_received": self.invalidations_received,
+        }
+
+
+class TwoTierRedisCache(RedisCache):
+    """
+    Redis cache backend with a process-local L1 tier in front of Redis (L2).
+
+    Reads are served from a size- and TTL-bounded in-process LRU when possible and fall
+    back to Redis on a miss. Every write, delete or clear is broadcast over Redis pub/sub;
+    a background subscriber thread in each process drops the affected keys from its L1,
+    so gunicorn workers and Daphne processes stop serving stale entries within
+    milliseconds. The L1 TTL bounds staleness if an invalidation message is lost, and the
+    whole L1 is flushed whenever the subscriber has to reconnect.
+
+    Extra OPTIONS (removed before the options reach the Redis client):
+        L1_MAX_ENTRIES (int): Maximum number of entries kept in L1. Defaults to 1000.
+        L1_TIMEOUT (float): Lifetime of an L1 entry in seconds. Defaults to 5.
+        INVALIDATION_CHANNEL (str): Pub/sub channel used for invalidation messages.
+
+    Hit/miss counters of the current process are available through `stats()`.
+    """
+
+    def __init__(self, server, params):
+        params = dict(params)
+        options = dict(params.get("OPTIONS", {}))
+        maxsize = options.pop("L1_MAX_ENTRIES", 1000)
+        timeout = options.pop("L1_TIMEOUT", 5)
+        channel = options.pop("INVALIDATION_CHANNEL", "cache_invalidation")
+        params["OPTIONS"] = options
+        super().__init__(server, params)
+
+        self._tier = LocalTier.for_location(server, channel, maxsize, timeout)
+        self._l1 = self._tier.l1
+
+    # --- Reads ---
+    def get(self, key, default=None, version=None):
+        self._tier.ensure_subscriber(self._cache.get_client)
+        key = self.make_and_validate_key(key, version=version)
+        cached = self._l1.get(key)
+        if cached is not None:
+            return pickle.loads(cached)
+
+        value = self._cache.get(key, _MISSING)
+        if value is _MISSING:
+            self._tier.l2_misses += 1
+            return default
+
+        self._tier.l2_hits += 1
+        self._l1.set(key, pickle.dumps(value))
+        return value
+
+    def get_many(self, keys, version=None):
+        self._tier.ensure_subscriber(self._cache.get_client)
+        key_map = {self.make_and_validate_key(key, version=version): key for key in keys}
+        result = {}
+        missing = []
+        for key, original_key in key_map.items():
+            cached = self._l1.get(key)
+            if cached is None:
+                missing.append(key)
+            else:
+                result[original_key] = pickle.loads(cached)
+
+        if missing:
+            fetched = self._cache.get_many(missing)
+            self._tier.l2_hits += len(fetched)
+            self._tier.l2_misses += len(missing) - len(fetched)
+            for key, value in fetched.items():
+                self._l1.set(key, pickle.dumps(value))
+                result[key_map[key]] = value
+        return result
+
+    def has_key(self, key, version=None):
+        self._tier.ensure_subscriber(self._cache.get_client)
+        key = self.make_and_validate_key(key, version=version)
+        return self._l1.get(key) is not None or self._cache.has_key(key)
+
+    # --- Writes ---
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        timeout = self.get_backend_timeout(timeout)
+        self._cache.set(key, value, timeout)
+        self._l1.set(key, pickle.dumps(value), timeout=self._l1_timeout(timeout))
+        self._publish(key)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        added = self._cache.add(key, value, self.get_backend_timeout(timeout))
+        if added:
+            self._l1.delete(key)
+            self._publish(key)
+        return added
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        if not data:
+            return []
+        safe_data = {self.make_and_validate_key(key, version=version): value for key, value in data.items()}
+        timeout = self.get_backend_timeout(timeout)
+        self._cache.set_many(safe_data, timeout)
+        for key, value in safe_data.items():
+            self._l1.set(key, pickle.dumps(value), timeout=self._l1_timeout(timeout))
+        self._publish(*safe_data)
+        return []
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self._cache.touch(key, self.get_backend_timeout(timeout))
+
+    def incr(self, key, delta=1, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        value = self._cache.incr(key, delta)
+        self._l1.delete(key)
+        self._publish(key)
+        return value
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        self._l1.delete(key)
+        deleted = self._cache.delete(key)
+        self._publish(key)
+        return deleted
+
+    def delete_many(self, keys, version=None):
+        if not keys:
+            return
+        safe_keys = [self.make_and_validate_key(key, version=version) for key in keys]
+        self._l1.delete_many(safe_keys)
+        self._cache.delete_many(safe_keys)
+        self._publish(*safe_keys)
+
+    def clear(self):
+        self._l1.clear()
+        result = self._cache.clear()
+        self._publish("*")
+        return result
+
+    def _l1_timeout(self, backend_timeout):
+        """
+        Keeps L1 entries from outliving their Redis counterpart.
+        """
+        if backend_timeout is None:
+            return self._l1.timeout
+        return min(self._l1.timeout, backend_timeout)
+
+    def _publish(self, *keys):
+        self._tier.publish(self._cache.get_client(write=True), keys)
+
+    def stats(self) -> dict:
+        """
+        Returns L1/L2 hit and miss counters of this process.
+        """
+        return self._tier.stats()
@@ -9,7 +9,11 @@ app.config_from_object("django.conf:settings", namespace="CELERY")
 app.autodiscover_tasks()
 
 app.conf.beat_schedule = {
-    "cleanup-expired-tokens": {"task": "users.tasks.cleanup_expired_tokens", "schedule": crontab(minute="30")}
+    "cleanup-expired-tokens": {"task": "users.tasks.cleanup_expired_tokens", "schedule": crontab(minute="30")},
+    "reconcile-chat-counters": {
+        "task": "core.tasks.reconcile_chat_counters",
+        "schedule": crontab(hour="4", minute="0"),
+    },
 }
 
 
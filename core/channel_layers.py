@@ -0,0 +1,178 @@
+import asyncio
+import bisect
+import hashlib
+import time
+from urllib.parse import parse_qs, urlsplit
+
+from channels_redis.core import RedisChannelLayer
+from channels_redis.pubsub import RedisPubSubChannelLayer, RedisPubSubLoopLayer
+from channels_redis.utils import _wrap_close, create_pool, decode_hosts
+from redis import asyncio as aioredis
+
+DEFAULT_RING_REPLICAS = 160
+
+
+def shard_name(host: dict) -> str:
+    """
+    Returns the identity of a Redis node on the hash ring, taken from its decoded host entry.
+
+    URL addresses are reduced to `host:port` (and `/db` for a database other than 0),
+    so credentials never reach the logs and rotating a password does not move groups.
+    """
+    if "address" in host:
+        url = urlsplit(str(host["address"]))
+        db = parse_qs(url.query).get("db", [url.path.strip("/") if url.scheme != "unix" else ""])[0] or "0"
+        location = f"unix:{url.path}" if url.scheme == "unix" else f"{url.hostname}:{url.port or 6379}"
+        return location if db == "0" else f"{location}/{db}"
+    if "master_name" in host:
+        return f"sentinel:{host['master_name']}"
+    return f"{host.get('host', 'localhost')}:{host.get('port', 6379)}"
+
+
+class HashRing:
+    """
+    Consistent hash ring mapping channel and group names to Redis nodes.
+
+    Every node is placed `replicas` times on the ring, at positions derived from its
+    name, and a key belongs to the first node found clockwise from its own hash. Adding
+    a node therefore only moves the keys that now land on it (about 1/N of them), while
+    channels_redis' own hashing cuts the hash space into N ranges and moves most keys
+    whenever N changes. Nodes are placed by name, not by position in the list, so the
+    order of the hosts in the settings does not matter.
+
+    Attributes:
+        nodes (list[str]): Names of the nodes, the ring returns indexes into this list.
+        replicas (int): Number of points of every node on the ring.
+    """
+
+    def __init__(self, nodes: list[str], replicas: int = DEFAULT_RING_REPLICAS):
+        self.nodes = list(nodes)
+        self.replicas = replicas
+        points = sorted(
+            (self._hash(f"{node}#{replica}"), index)
+            for index, node in enumerate(self.nodes)
+            for replica in range(replicas)
+        )
+        self._positions = [position for position, _ in points]
+        self._indexes = [index for _, index in points]
+
+    @staticmethod
+    def _hash(value) -> int:
+        if isinstance(value, str):
+            value = value.encode("utf8")
+        return int.from_bytes(hashlib.md5(value).digest()[:8], "big")
+
+    def get(self, value) -> int:
+        """
+        Returns the index of the node owning the channel or group name.
+        """
+        if len(self.nodes) == 1:
+            return 0
+        position = bisect.bisect(self._positions, self._hash(value)) % len(self._positions)
+        return self._indexes[position]
+
+    def shares(self) -> dict[str, float]:
+        """
+        Returns the fraction of the hash space owned by every node.
+        """
+        space = 2**64
+        owned = dict.fromkeys(self.nodes, 0)
+        for number, position in enumerate(self._positions):
+            previous = self._positions[number - 1] if number else self._positions[-1] - space
+            owned[self.nodes[self._indexes[number]]] += position - previous
+        return {node: round(size / space, 4) for node, size in owned.items()}
+
+
+class ShardedRedisChannelLayer(RedisChannelLayer):
+    """
+    List-based channels_redis layer spreading channels and groups over its hosts on a `HashRing`.
+
+    Messages wait in Redis lists until the receiving process pops them, so nothing is
+    lost while a consumer is briefly busy; group membership is kept in sorted sets on the
+    group's node.
+    """
+
+    def __init__(self, *args, ring_replicas: int = DEFAULT_RING_REPLICAS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.ring = HashRing([shard_name(host) for host in self.hosts], ring_replicas)
+
+    def consistent_hash(self, value):
+        return self.ring.get(value)
+
+
+class ShardedRedisPubSubLoopLayer(RedisPubSubLoopLayer):
+    def __init__(self, hosts=None, *args, ring_replicas: int = DEFAULT_RING_REPLICAS, **kwargs):
+        super().__init__(hosts, *args, **kwargs)
+        self.ring = HashRing([shard_name(host) for host in decode_hosts(hosts)], ring_replicas)
+
+    def _get_shard(self, channel_or_group_name):
+        return self._shards[self.ring.get(channel_or_group_name)]
+
+
+class ShardedRedisPubSubChannelLayer(RedisPubSubChannelLayer):
+    """
+    Pub/sub channels_redis layer spreading channels and groups over its hosts on a `HashRing`.
+
+    Messages are published to the subscribed processes and never stored, which is cheaper
+    on Redis than lists, but a message sent while a process is disconnected is lost.
+    """
+
+    def _get_layer(self):
+        loop = asyncio.get_running_loop()
+
+        try:
+            layer = self._layers[loop]
+        except KeyError:
+            layer = ShardedRedisPubSubLoopLayer(*self._args, **self._kwargs, channel_layer=self)
+            self._layers[loop] = layer
+            _wrap_close(self, loop)
+
+        return layer
+
+
+async def probe_shards(hosts, samples: int = 3, timeout: float = 2) -> list[dict]:
+    """
+    Pings every Redis node of a channel layer and reports its health and latency.
+
+    Args:
+        hosts (list): The "hosts" of the channel layer config, in any form channels_redis accepts.
+        samples (int): Number of pings sent to every node.
+        timeout (float): Seconds to wait for each ping.
+
+    Returns:
+        list[dict]: Per node, its name, ring share, whether it answered, the median and
+        highest ping latency in milliseconds, its connected clients and the error, if any.
+    """
+    hosts = decode_hosts(hosts)
+    ring = HashRing([shard_name(host) for host in hosts])
+    shares = ring.shares()
+
+    async def probe(host) -> dict:
+        name = shard_name(host)
+        report = {"shard": name, "ring_share": shares[name], "ok": False}
+        connection = aioredis.Redis(connection_pool=create_pool(host))
+        try:
+            latencies = []
+            for _ in range(samples):
+                started_at = time.perf_counter()
+                await asyncio.wait_for(connection.ping(), timeout)
+                latencies.append((time.perf_counter() - started_at) * 1000)
+            latencies.sort()
+            report.update(
+                ok=True,
+                latency_ms=round(latencies[len(latencies) // 2], 2),
+                max_latency_ms=round(latencies[-1], 2),
+                connected_clients=None,
+            )
+            try:
+                info = await asyncio.wait_for(connection.info("clients"), timeout)
+                report["connected_clients"] = info.get("connected_clients")
+            except aioredis.ResponseError:
+                pass  # INFO is disabled on some managed Redis services
+        except (asyncio.TimeoutError, aioredis.RedisError, OSError) as e:
+            report["error"] = str(e) or e.__class__.__name__
+        finally:
+            await connection.aclose(close_connection_pool=True)
+        return report
+
+    return list(await asyncio.gather(*(probe(host) for host in hosts)))
@@ -0,0 +1,115 @@
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from django.conf import settings
+from django.contrib.auth.hashers import BCryptSHA256PasswordHasher, check_password, make_password
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+
+class ConfigurableBCryptSHA256PasswordHasher(BCryptSHA256PasswordHasher):
+    """
+    BCrypt-SHA256 hasher whose work factor comes from `PASSWORD_BCRYPT_ROUNDS`.
+
+    The algorithm name is unchanged, so existing `bcrypt_sha256` hashes keep verifying.
+    Hashes made with a different work factor report `must_update`, and are rehashed
+    with the configured one on the next successful login.
+    """
+
+    @property
+    def rounds(self):
+        return settings.PASSWORD_BCRYPT_ROUNDS
+
+
+class PasswordHashingPool:
+    """
+    Bounded pool of threads that runs password hashing work.
+
+    Hash checks are CPU-bound; bcrypt releases the GIL while hashing, so a pool sized to
+    the number of cores (`PASSWORD_HASHING_WORKERS`) lets a process verify passwords
+    in parallel while never running more hash computations than it has cores, no matter
+    how many request threads are waiting for a login. Rehashing of outdated hashes is
+    submitted to the same pool and does not delay the login response. It stays in
+    process on purpose: the raw password is needed for a rehash and must not travel
+    through the Celery broker.
+
+    The executor is created lazily and recreated in processes forked after startup.
+    """
+    _executor = None
+    _pid = None
+    _pending = set()
+    _lock = threading.Lock()
+
+    @classmethod
+    def executor(cls) -> ThreadPoolExecutor:
+        pid = os.getpid()
+        if cls._pid != pid:
+            with cls._lock:
+                if cls._pid != pid:
+                    cls._executor = ThreadPoolExecutor(
+                        max_workers=settings.PASSWORD_HASHING_WORKERS, thread_name_prefix="password-hashing"
+                    )
+                    cls._pending = set()
+                    cls._pid = pid
+        return cls._executor
+
+    @classmethod
+    def run(cls, func, *args):
+        """
+        Runs the function in the pool and waits for its result.
+        """
+        return cls.executor().submit(func, *args).result()
+
+    @classmethod
+    def check_password(cls, user, raw_password) -> bool:
+        """
+        Verifies the password of the user in the pool.
+
+        Unlike `user.check_password` an outdated hash is not rehashed and saved in the
+        caller's thread, the rehash is scheduled in the background instead.
+        """
+        outdated = []
+        is_correct = cls.run(check_password, raw_password, user.password, outdated.append)
+        if is_correct and outdated:
+            cls.schedule_rehash(user.pk, raw_password, user.password)
+        return is_correct
+
+    @classmethod
+    def schedule_rehash(cls, user_id, raw_password, encoded):
+        future = cls.executor().submit(cls._rehash, user_id, raw_password, encoded)
+        with cls._lock:
+            cls._pending.add(future)
+        future.add_done_callback(cls._discard)
+        return future
+
+    @classmethod
+    def _discard(cls, future) -> None:
+        with cls._lock:
+            cls._pending.discard(future)
+
+    @staticmethod
+    def _rehash(user_id, raw_password, encoded) -> None:
+        """
+        Stores the password hashed with the current policy, unless it was changed meanwhile.
+        """
+        from users.models import CustomUser
+
+        try:
+            CustomUser.objects.filter(pk=user_id, password=encoded).update(password=make_password(raw_password))
+            logger.debug(f"Password of user ID {user_id} rehashed")
+        except Exception as e:
+            logger.warning(f"Failed to rehash the password of user ID {user_id}: {e}")
+        finally:
+            connection.close()
+
+    @classmethod
+    def drain(cls, timeout=None) -> None:
+        """
+        Waits for the scheduled rehashes to finish.
+        """
+        with cls._lock:
+            pending = list(cls._pending)
+        wait(pending, timeout=timeout)
@@ -0,0 +1,105 @@
+import threading
+import time
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+class LocalLRUCache:
+    """
+    Thread-safe in-process LRU cache bounded by size and per-entry lifetime.
+
+    The cache lives in the memory of a single worker process, so reads never leave
+    the process. It is meant for small, hot records (verified tokens, permission
+    decisions, contact data) where a short staleness window is acceptable and
+    cross-process invalidation is handled separately.
+
+    Attributes:
+        maxsize (int): Maximum number of entries kept; the least recently used
+            entry is evicted first.
+        timeout (float | None): Default lifetime of an entry in seconds, None
+            means entries only leave the cache through eviction or deletion.
+        hits (int): Number of successful lookups.
+        misses (int): Number of lookups that found nothing or an expired entry.
+    """
+
+    def __init__(self, maxsize: int = 1024, timeout: float | None = 60):
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, timeout: float | None = _MISSING) -> None:
+        """
+        Stores the value; `timeout` overrides the default lifetime for this entry.
+        """
+        timeout = self.timeout if timeout is _MISSING else timeout
+        if timeout is not None and timeout <= 0:
+            self.delete(key)
+            return
+
+        expires_at = time.monotonic() + timeout if timeout is not None else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def delete_many(self, keys) -> None:
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def delete_where(self, predicate) -> int:
+        """
+        Removes every entry whose value matches the predicate, returns the number removed.
+        """
+        with self._lock:
+            stale_keys = [key for key, (value, _) in self._data.items() if predicate(value)]
+            for key in stale_keys:
+                del self._data[key]
+        return len(stale_keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        """
+        Returns hit/miss counters and the current size of the cache.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
+
+    def __len__(self):
+        return len(self._data)
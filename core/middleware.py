@@ -1,17 +1,20 @@
-from django.utils.timezone import now
-from django.core.cache import cache
+import jwt
+from django.conf import settings
 
+from users.models import CustomAuthToken
 from users.utils import TokenManager
 
 
 class TokenCacheMiddleware:
     """
-    Middleware to handle caching and validation of authorization tokens.
+    Middleware to resolve authorization tokens through the shared token cache.
 
     This middleware intercepts incoming HTTP requests to check for the presence of an
-    "Authorization" token in the request headers. If the token is found, it validates the token
-    against a cache and performs additional checks, such as expiration time, to ensure the token
-    is still valid. If the token is invalid or expired, it removes the token from the cache.
+    "Authorization" token in the request headers. If the token is found, it is verified and
+    resolved through the read-through token cache shared with `CustomJWTAuthentication`,
+    and the resulting (user, token) pair is attached to the request once as `jwt_auth`.
+    A cache hit resolves the user without any database query. Nothing is resolved when
+    `JWT_STATELESS_AUTH` is disabled.
 
     Attributes:
     get_response (Callable): The function that returns the response for a given HTTP request.
@@ -19,8 +22,8 @@ class TokenCacheMiddleware:
 
     Responsibilities:
     - Validate tokens from incoming HTTP requests.
-    - Interact with a cache to check token statuses.
-    - Remove tokens from the cache if they are close to expiration.
+    - Read token records through the cache and populate it on a miss.
+    - Hand the resolved user to DRF authentication so it is not looked up twice.
 
     Usage:
     Use this middleware in the Django middleware stack. It automatically processes HTTP
@@ -32,14 +35,16 @@ class TokenCacheMiddleware:
         self.get_response = get_response
 
     def __call__(self, request):
+        if not settings.JWT_STATELESS_AUTH:
+            return self.get_response(request)  # CustomJWTAuthentication looks the token up itself
+
         token_key = request.headers.get("Authorization", "").split("Bearer ")[-1]
         if not token_key:
             return self.get_response(request)
 
-        cached_token = cache.get(f"token_{token_key}")
-        if cached_token:
-            remaining_time = (cached_token.expires_at - now()).total_seconds()
-            if remaining_time < 36000:  # Less than 10 hours
-                TokenManager.remove_from_cache(token_key)
+        try:
+            request.jwt_auth = TokenManager.authenticate_token(token_key)
+        except (jwt.InvalidTokenError, CustomAuthToken.DoesNotExist):
+            pass  # Left to CustomJWTAuthentication to reject
 
         return self.get_response(request)
@@ -0,0 +1,71 @@
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+class PermissionCache:
+    """
+    Short-lived cache of permission decisions keyed by (user, permission, object id).
+
+    Permission classes that opt in through `CachedPermissionMixin` store the outcome of
+    their membership queries in the shared cache for `PERMISSION_CACHE_TIMEOUT` seconds,
+    so repeated requests of the same user against the same team or chat skip the
+    `EXISTS` query. Signals on team members, chat participants and tokens drop the
+    affected decisions as soon as the underlying rows change; the TTL bounds staleness
+    for changes that bypass signals.
+
+    Hit/miss counters of the current process are available through `stats()`.
+    """
+    _counters = {}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def cache_key(user_id, permission: str, object_id=None) -> str:
+        return f"perm_{user_id}_{permission}_{'' if object_id is None else object_id}"
+
+    @classmethod
+    def get_or_check(cls, user_id, permission: str, object_id, check, timeout=None) -> bool:
+        """
+        Returns the cached decision, or runs `check` and caches its result on a miss.
+        """
+        key = cls.cache_key(user_id, permission, object_id)
+        decision = cache.get(key)
+        cls._count(permission, hit=decision is not None)
+        if decision is not None:
+            return decision
+
+        decision = bool(check())
+        cache.set(key, decision, timeout=timeout or settings.PERMISSION_CACHE_TIMEOUT)
+        return decision
+
+    @classmethod
+    def invalidate(cls, user_ids, permissions, object_id=None) -> None:
+        """
+        Drops the decisions of the given permissions for every user in `user_ids`.
+        """
+        keys = [cls.cache_key(user_id, permission, object_id) for user_id in user_ids for permission in permissions]
+        if keys:
+            cache.delete_many(keys)
+
+    @classmethod
+    def _count(cls, permission: str, hit: bool) -> None:
+        with cls._lock:
+            counters = cls._counters.setdefault(permission, [0, 0])
+            counters[0 if hit else 1] += 1
+
+    @classmethod
+    def stats(cls) -> dict:
+        """
+        Returns hit/miss counters and the hit ratio of every permission in this process.
+        """
+        with cls._lock:
+            return {
+                permission: {"hits": hits, "misses": misses, "hit_ratio": hits / (hits + misses)}
+                for permission, (hits, misses) in cls._counters.items()
+            }
+
+    @classmethod
+    def reset_stats(cls) -> None:
+        with cls._lock:
+            cls._counters.clear()
@@ -1,9 +1,35 @@
 from django.db.models import Q
 from rest_framework import permissions
 
+from core.permission_cache import PermissionCache
 from users.models import Team, Participant, CustomAuthToken
 
 
+class CachedPermissionMixin:
+    """
+    Opt-in caching of the database part of a permission decision.
+
+    Classes that set `cache_decision = True` run their membership query through
+    `PermissionCache`, keyed by the requesting user, the class name and the object id,
+    so the query runs once per TTL instead of on every request. Decisions are
+    invalidated by the signals in `users.signals`.
+
+    Attributes:
+        cache_decision (bool): Whether decisions of this class are cached.
+        cache_timeout (int | None): Lifetime of a decision in seconds, defaults to
+            `PERMISSION_CACHE_TIMEOUT`.
+    """
+    cache_decision = False
+    cache_timeout = None
+
+    def cached_decision(self, request, object_id, check) -> bool:
+        if not self.cache_decision:
+            return bool(check())
+        return PermissionCache.get_or_check(
+            request.user.id, type(self).__name__, object_id, check, timeout=self.cache_timeout
+        )
+
+
 class IsOrderOwnerOrAdmin(permissions.BasePermission):
     """
     Custom permission class to check if a user is either the owner of an order or has admin privileges.
@@ -38,7 +64,7 @@ class IsAdminOrStaff(permissions.BasePermission):
         return bool(request.user and (request.user.is_staff or request.user.is_admin))
 
 
-class IsTeamMemberOrAdmin(permissions.BasePermission):
+class IsTeamMemberOrAdmin(CachedPermissionMixin, permissions.BasePermission):
     """
     A class that implements a custom permission to check if a user is a team member or has admin privileges.
 
@@ -47,18 +73,25 @@ class IsTeamMemberOrAdmin(permissions.BasePermission):
     specific views by restricting unauthorized users.
 
     Attributes:
-        None
+        cache_decision (bool): Team membership is cached per user.
     """
+    cache_decision = True
 
     def has_permission(self, request, view):
         if not request.user or not request.user.is_authenticated:
             return False
 
-        user_team_exist = Team.objects.filter(Q(list_of_members=request.user) | Q(leader=request.user)).exists()
-        return bool(request.user and (request.user.is_staff or request.user.is_admin or user_team_exist))
+        if request.user.is_staff or request.user.is_admin:
+            return True
+
+        return self.cached_decision(
+            request,
+            None,
+            lambda: Team.objects.filter(Q(list_of_members=request.user) | Q(leader=request.user)).exists(),
+        )
 
 
-class IsChatParticipant(permissions.BasePermission):
+class IsChatParticipant(CachedPermissionMixin, permissions.BasePermission):
     """
     Custom permission class to check if a user is a participant in a specific chat.
 
@@ -68,38 +101,48 @@ class IsChatParticipant(permissions.BasePermission):
     provided in the view's keyword arguments.
 
     Attributes:
-        None
+        cache_decision (bool): Chat participation is cached per user and chat.
     """
+    cache_decision = True
 
     def has_permission(self, request, view):
         if not request.user or not request.user.is_authenticated:
             return False
         chat_id = view.kwargs.get("pk")
-        if Participant.objects.filter(user=request.user, chat_id=chat_id).exists():
-            return True
+        return self.cached_decision(
+            request, chat_id, lambda: Participant.objects.filter(user=request.user, chat_id=chat_id).exists()
+        )
 
 
-class IsChatAdmin(permissions.BasePermission):
+class IsChatAdmin(CachedPermissionMixin, permissions.BasePermission):
     """
     Permission class for determining if a user is an administrator of a specific chat.
 
     This class is used to check if the currently authenticated user has the role
     of 'admin' in a chat specified by its ID (retrieved from the view's kwargs).
     If the user meets the condition, permission is granted; otherwise, it is denied.
+
+    Attributes:
+        cache_decision (bool): The admin role is cached per user and chat.
     """
+    cache_decision = True
 
     def has_permission(self, request, view):
         if not request.user or not request.user.is_authenticated:
             return False
 
         chat_id = view.kwargs.get("pk")
-        if chat_id and Participant.objects.filter(Q(user=request.user) & Q(chat_id=chat_id) & Q(role="admin")).exists():
-            return True
+        if not chat_id:
+            return False
 
-        return False
+        return self.cached_decision(
+            request,
+            chat_id,
+            lambda: Participant.objects.filter(Q(user=request.user) & Q(chat_id=chat_id) & Q(role="admin")).exists(),
+        )
 
 
-class IsAccountOwner(permissions.BasePermission):
+class IsAccountOwner(CachedPermissionMixin, permissions.BasePermission):
     """
     Custom permission class to check if the requesting user is the owner of the account.
 
@@ -109,11 +152,12 @@ class IsAccountOwner(permissions.BasePermission):
     validating if the token belongs to the user specified in the request.
 
     Attributes:
-        None
+        cache_decision (bool): Ownership is cached per user and account ID.
 
     Methods:
         None
     """
+    cache_decision = True
 
     def has_permission(self, request, view):
         if not request.user or not request.user.is_authenticated:
@@ -121,8 +165,8 @@ class IsAccountOwner(permissions.BasePermission):
 
         header = request.META.get("HTTP_AUTHORIZATION")
         key = header.split()[1]
+        account_id = view.kwargs.get("pk")
 
-        if CustomAuthToken.objects.filter(key=key, user_id=view.kwargs.get("pk")).exists():
-            return True
-
-        return False
+        return self.cached_decision(
+            request, account_id, lambda: CustomAuthToken.objects.for_key(key).filter(user_id=account_id).exists()
+        )
@@ -0,0 +1,69 @@
+from attrs import frozen
+from django.conf import settings
+
+from core.local_cache import LocalLRUCache
+from users.models import CustomUser
+
+# Process-local contact data shared by every consumer and task of the worker: user id -> Contact
+local_contacts = LocalLRUCache(
+    maxsize=settings.RECIPIENT_CACHE_SIZE,
+    timeout=settings.RECIPIENT_CACHE_TTL,
+)
+
+
+@frozen
+class Contact:
+    """
+    Contact data of a notification recipient.
+
+    Attributes:
+        user_id: Primary key of the user.
+        username: Username shown in notifications.
+        email: Email address, empty if the user has none.
+    """
+    user_id: int
+    username: str
+    email: str
+
+
+class RecipientResolver:
+    """
+    Resolves notification recipients to their contact data.
+
+    Lookups are served from the process-local `local_contacts` LRU, and the users that
+    are not cached are fetched together with a single `id__in` query. Entries expire
+    after `RECIPIENT_CACHE_TTL` seconds and are dropped when the user is edited in this
+    process; the TTL bounds staleness of edits made in other processes.
+    """
+
+    @classmethod
+    def resolve(cls, user_ids) -> dict[int, Contact]:
+        """
+        Returns the contacts of the existing users among `user_ids`, keyed by user ID.
+        """
+        contacts, missing = {}, set()
+        for user_id in set(user_ids):
+            contact = local_contacts.get(user_id)
+            if contact is None:
+                missing.add(user_id)
+            else:
+                contacts[user_id] = contact
+
+        if missing:
+            for user_id, username, email in CustomUser.objects.filter(id__in=missing).values_list(
+                "id", "username", "email"
+            ):
+                contacts[user_id] = Contact(user_id=user_id, username=username, email=email or "")
+                local_contacts.set(user_id, contacts[user_id])
+        return contacts
+
+    @classmethod
+    def emails(cls, user_ids) -> list[str]:
+        """
+        Returns the distinct, non-empty email addresses of the users, sorted.
+        """
+        return sorted({contact.email for contact in cls.resolve(user_ids).values() if contact.email})
+
+    @staticmethod
+    def invalidate(user_ids) -> None:
+        local_contacts.delete_many(user_ids)
@@ -15,7 +15,7 @@ import os
 from datetime import timedelta
 from pathlib import Path
 
-from decouple import config
+from decouple import Csv, config
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -67,11 +67,19 @@ SITE_ID = 1
 
 ASGI_APPLICATION = "websocket.asgi.application"
 
+# Channel layer shards (core.channel_layers). Channels and groups are spread over the Redis nodes on a
+# consistent hash ring, adding a node only moves the groups that land on it. "list" keeps messages in
+# Redis lists until they are received, "pubsub" publishes them without storing them.
+CHANNEL_LAYER_HOSTS = config("CHANNEL_LAYER_HOSTS", default="redis://0.0.0.0:6379", cast=Csv())
+CHANNEL_LAYER_BACKENDS = {
+    "list": "core.channel_layers.ShardedRedisChannelLayer",
+    "pubsub": "core.channel_layers.ShardedRedisPubSubChannelLayer",
+}
 CHANNEL_LAYERS = {
     "default": {
-        "BACKEND": "channels_redis.core.RedisChannelLayer",
+        "BACKEND": CHANNEL_LAYER_BACKENDS[config("CHANNEL_LAYER_BACKEND", default="list")],
         "CONFIG": {
-            "hosts": [("0.0.0.0", 6379)],
+            "hosts": CHANNEL_LAYER_HOSTS,
         },
     },
 }
@@ -153,9 +161,15 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 PASSWORD_HASHERS = [
-    "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
+    "core.hashers.ConfigurableBCryptSHA256PasswordHasher",
     "django.contrib.auth.hashers.PBKDF2PasswordHasher",  # For old passwords
 ]
+# Work factor of new hashes, older ones are rehashed in the background on login
+PASSWORD_BCRYPT_ROUNDS = config("PASSWORD_BCRYPT_ROUNDS", default=12, cast=int)
+# Threads verifying passwords in parallel per process (core.hashers.PasswordHashingPool)
+PASSWORD_HASHING_WORKERS = config("PASSWORD_HASHING_WORKERS", default=os.cpu_count() or 1, cast=int)
+
+AUTHENTICATION_BACKENDS = ["core.backends.PooledModelBackend"]
 
 # Internationalization
 # https://docs.djangoproject.com/en/5.1/topics/i18n/
@@ -276,10 +290,68 @@ REST_AUTH = {
 }
 
 # Cache
+# Process-local L1 in front of Redis, invalidated across processes over Redis pub/sub
 CACHES = {
     "default": {
-        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "BACKEND": "core.cache_backends.TwoTierRedisCache",
         "LOCATION": "redis://redis:6379/1",
         "TIMEOUT": 300,
-    }
+        "OPTIONS": {
+            "L1_MAX_ENTRIES": config("CACHE_L1_MAX_ENTRIES", default=10000, cast=int),
+            "L1_TIMEOUT": config("CACHE_L1_TIMEOUT", default=5, cast=int),  # seconds
+            "INVALIDATION_CHANNEL": "cache_invalidation",
+        },
+    },
+    # Token records (core.token_cache), with their own L1 size, lifetime and invalidation channel
+    "tokens": {
+        "BACKEND": "core.cache_backends.TwoTierRedisCache",
+        "LOCATION": "redis://redis:6379/1",
+        "OPTIONS": {
+            "L1_MAX_ENTRIES": config("JWT_VERIFIED_CACHE_SIZE", default=4096, cast=int),
+            "L1_TIMEOUT": config("JWT_VERIFIED_CACHE_TTL", default=60, cast=int),  # seconds
+            "INVALIDATION_CHANNEL": "token_cache_invalidation",
+        },
+    },
 }
+
+# Token authentication
+# Verify JWT signature and expiry in-process and resolve verified keys through the "tokens" cache
+JWT_STATELESS_AUTH = config("JWT_STATELESS_AUTH", default=True, cast=bool)
+TOKEN_CACHE_ALIAS = "tokens"
+# Share revoked keys between processes through the cache (Redis)
+JWT_REVOCATION_CHECK = config("JWT_REVOCATION_CHECK", default=True, cast=bool)
+
+# Expired tokens cleanup (users.tasks.cleanup_expired_tokens)
+TOKEN_CLEANUP_BATCH_SIZE = config("TOKEN_CLEANUP_BATCH_SIZE", default=1000, cast=int)
+TOKEN_CLEANUP_SLEEP = config("TOKEN_CLEANUP_SLEEP", default=0.1, cast=float)  # seconds between batches
+TOKEN_CLEANUP_MAX_DURATION = config("TOKEN_CLEANUP_MAX_DURATION", default=600, cast=int)  # seconds per run
+
+# Permission decisions cache (core.permission_cache.PermissionCache)
+PERMISSION_CACHE_TIMEOUT = config("PERMISSION_CACHE_TIMEOUT", default=30, cast=int)  # seconds
+
+# Notification recipients' contact data (core.recipients.RecipientResolver)
+RECIPIENT_CACHE_SIZE = config("RECIPIENT_CACHE_SIZE", default=10000, cast=int)
+RECIPIENT_CACHE_TTL = config("RECIPIENT_CACHE_TTL", default=300, cast=int)  # seconds
+
+# WebSocket history (BaseAsyncWebsocketConsumer.send_existing_content)
+WEBSOCKET_HISTORY_PAGE_SIZE = config("WEBSOCKET_HISTORY_PAGE_SIZE", default=50, cast=int)
+# Pages larger than this are built by the Celery `send_chunked_data` task instead of in the consumer
+WEBSOCKET_HISTORY_OFFLOAD_SIZE = config("WEBSOCKET_HISTORY_OFFLOAD_SIZE", default=500, cast=int)
+
+# Thread pool running the consumers' ORM calls (websocket.executors.DatabaseExecutor). Every worker keeps
+# its own database connection, so this is the size of the process' connection pool.
+WEBSOCKET_DB_WORKERS = config("WEBSOCKET_DB_WORKERS", default=8, cast=int)
+WEBSOCKET_DB_TIMEOUT = config("WEBSOCKET_DB_TIMEOUT", default=10, cast=float)  # seconds, queueing included
+
+# Batched group events for clients connecting with `?coalesce=<milliseconds>` (websocket.coalescing)
+WEBSOCKET_COALESCE_MAX_WINDOW = config("WEBSOCKET_COALESCE_MAX_WINDOW", default=50, cast=int)  # milliseconds
+WEBSOCKET_COALESCE_MAX_EVENTS = config("WEBSOCKET_COALESCE_MAX_EVENTS", default=100, cast=int)
+# Frames kept for a client whose previous frame is still being sent, the oldest ones are dropped past it
+WEBSOCKET_COALESCE_HIGH_WATER = config("WEBSOCKET_COALESCE_HIGH_WATER", default=1000, cast=int)
+
+# Users connected to chats and comment threads (websocket.presence)
+PRESENCE_BACKEND = config("PRESENCE_BACKEND", default="websocket.presence.RedisPresenceStore")
+PRESENCE_REDIS_URL = config("PRESENCE_REDIS_URL", default="redis://redis:6379/2")
+PRESENCE_HEARTBEAT_INTERVAL = config("PRESENCE_HEARTBEAT_INTERVAL", default=15, cast=float)  # seconds
+PRESENCE_TTL = config("PRESENCE_TTL", default=45, cast=float)  # seconds without heartbeat before a socket is gone
+PRESENCE_TYPING_INTERVAL = config("PRESENCE_TYPING_INTERVAL", default=2, cast=float)  # seconds between typing events
@@ -1,14 +1,19 @@
-import json
 import logging
 
 from asgiref.sync import async_to_sync
 from celery import shared_task
 from channels.layers import get_channel_layer
 from django.apps import apps
+from django.core.mail import get_connection
+from django.core.management import call_command
 from django.core.mail.message import EmailMultiAlternatives
 
 from core.settings import DEFAULT_FROM_EMAIL
+from core.recipients import RecipientResolver
+from websocket.codecs import broadcast
+from websocket.paginations import InvalidCursor
 from websocket.serializers import get_serializer
+from websocket.utils import load_history_page
 
 logger = logging.getLogger(__name__)
 
@@ -43,7 +48,48 @@ def send_email(subject, message, to_email, **kwargs):
 
 
 @shared_task
-def send_chunked_data(group_name, instance_model, instance_serializer_class, filter_kwargs, batch_size):
+def send_notification_emails(subject, message, recipient_ids=None, emails=None):
+    """
+    Sends a notification email to each recipient in one batched job.
+
+    Callers that already know the addresses pass them as `emails`; otherwise the
+    recipients are resolved by `RecipientResolver` (cached, at most one query).
+    Duplicates are dropped and every recipient gets their own email (addresses are
+    not disclosed to each other) over one SMTP connection.
+
+    Args:
+        subject (str): The subject of the emails.
+        message (str): The HTML content of the emails.
+        recipient_ids (list[int] or None): IDs of the users to notify.
+        emails (list[str] or None): Pre-resolved addresses of the users to notify.
+    """
+    if emails is None:
+        emails = RecipientResolver.emails(recipient_ids or [])
+    messages = []
+    for email in sorted({email for email in emails if email}):
+        msg = EmailMultiAlternatives(subject, message, DEFAULT_FROM_EMAIL, [email])
+        msg.content_subtype = "html"
+        messages.append(msg)
+
+    try:
+        sent = get_connection().send_messages(messages) if messages else 0
+        logger.info(f"{sent} notification emails sent")
+    except Exception as e:
+        logger.error(f"Error sending notification emails: {e}")
+
+
+@shared_task
+def send_chunked_data(
+    group_name,
+    instance_model,
+    instance_serializer_class,
+    filter_kwargs,
+    batch_size,
+    channel_name=None,
+    request_id=None,
+    cursor=None,
+    last_item_id=None,
+):
     """
         Sends chunked data to a specified WebSocket group by querying model instances,
         serializing them, and routing the serialized data through a channel layer. This task
@@ -51,7 +97,7 @@ def send_chunked_data(group_name, instance_model, instance_serializer_class, fil
 
         Args:
             group_name (str): The name of the WebSocket group to which data should
-                be sent.
+                be sent when no `channel_name` is given.
             instance_model (str): The name of the model class to be queried for
                 fetching data.
             instance_serializer_class (str): The fully qualified name of the
@@ -60,6 +106,12 @@ def send_chunked_data(group_name, instance_model, instance_serializer_class, fil
                 desired model instances.
             batch_size (int): The maximum number of model instances to fetch from
                 the database.
+            channel_name (str | None): Channel of the requesting connection; when
+                set only that connection receives the data.
+            request_id (Any): Identifier sent by the client with the request, echoed
+                in the reply so responses can be matched to requests.
+            cursor (str | None): Cursor of the page, as returned with the previous one.
+            last_item_id (int | None): Page position sent by older clients.
 
         Returns:
             None
@@ -69,20 +121,27 @@ def send_chunked_data(group_name, instance_model, instance_serializer_class, fil
     model = models.get_model(instance_model)
 
     serializer = get_serializer(instance_serializer_class)
-    queryset = model.objects.filter(**filter_kwargs).order_by("-created_at")[:batch_size]
-    serialized_data = serializer(queryset, many=True)
-
-    response = {
-        "type": "send_data_chunk",  # Event type handled by WebSocket
-        "data": serialized_data.data,
-    }
-
-    # Send data to the WebSocket group
     channel_layer = get_channel_layer()
-    async_to_sync(channel_layer.group_send)(
-        group_name,
-        {"type": "send_data_chunk", "message": json.dumps(response)},
-    )
+    try:
+        page = load_history_page(model, serializer, filter_kwargs, batch_size, cursor=cursor, last_item_id=last_item_id)
+    except InvalidCursor:
+        logger.warning(f"Invalid history cursor for {instance_model} {filter_kwargs}")
+        if channel_name:
+            # Answered like the consumer answers the pages it loads itself
+            error_event = {"type": "send_error", "errors": {"cursor": "Invalid cursor."}}
+            async_to_sync(channel_layer.send)(channel_name, error_event)
+        return
+
+    response = {"type": "send_data_chunk", **page}  # Event type handled by WebSocket
+    if request_id is not None:
+        response["request_id"] = request_id
+
+    if channel_name:
+        # Reply to the requesting connection only, the consumer encodes the page in its wire format
+        async_to_sync(channel_layer.send)(channel_name, response)
+    else:
+        # Send data to the WebSocket group
+        async_to_sync(broadcast)(channel_layer, group_name, response)
 
 
 @shared_task
@@ -110,3 +169,13 @@ def on_delete_time_item(instance_model, instance_pk, app_label):
         logger.info(f"Successfully deleted {instance_model} with ID {instance_pk}.")
     except Exception as e:
         logger.error(f"Error deleting {instance_model} with ID {instance_pk}: {e}")
+
+
+@shared_task
+def reconcile_chat_counters():
+    """
+    Periodically corrects the chat participants' message counters with the
+    "reconcile_chat_counters" management command, for messages that were written
+    or removed without going through `websocket.counters`.
+    """
+    call_command("reconcile_chat_counters")
@@ -0,0 +1,163 @@
+from datetime import datetime, timezone
+
+from attrs import frozen
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.timezone import now
+
+from users.models import CustomUser, CustomAuthToken
+
+
+@frozen
+class TokenRecord:
+    """
+    Compact cache representation of an authentication token and its owner.
+
+    Instead of pickling whole `CustomAuthToken`/`CustomUser` instances the cache keeps
+    only what authentication, permission checks and request logging need: the owner's
+    id, a bitmask of the user's flags, the expiry timestamp, the username and the email.
+    The record is encoded as a short `"user_id:flags:expires_at:username:email"` string.
+
+    Attributes:
+        user_id: Primary key of the token owner.
+        flags: Bitmask built from `FLAG_FIELDS` of the owner.
+        expires_at: Token expiry as a POSIX timestamp.
+        username: Username of the owner.
+        email: Email of the owner.
+    """
+    FLAG_FIELDS = ("is_active", "is_staff", "is_superuser", "is_admin", "is_team_member")
+
+    user_id: int
+    flags: int
+    expires_at: float
+    username: str
+    email: str
+
+    @classmethod
+    def from_token(cls, token: CustomAuthToken) -> "TokenRecord":
+        flags = 0
+        for bit, field_name in enumerate(cls.FLAG_FIELDS):
+            if getattr(token.user, field_name):
+                flags |= 1 << bit
+        return cls(
+            user_id=token.user_id,
+            flags=flags,
+            expires_at=token.expires_at.timestamp(),
+            username=token.user.username,
+            email=token.user.email,
+        )
+
+    @classmethod
+    def decode(cls, raw) -> "TokenRecord | None":
+        """
+        Parses an encoded record, returns None for anything that is not a record.
+        """
+        try:
+            # Usernames cannot contain ":", so only the trailing email may
+            user_id, flags, expires_at, username, email = raw.split(":", 4)
+            return cls(
+                user_id=int(user_id),
+                flags=int(flags),
+                expires_at=float(expires_at),
+                username=username,
+                email=email,
+            )
+        except (AttributeError, ValueError):
+            return None
+
+    def encode(self) -> str:
+        return f"{self.user_id}:{self.flags}:{self.expires_at}:{self.username}:{self.email}"
+
+    @property
+    def remaining_time(self) -> float:
+        return self.expires_at - now().timestamp()
+
+    def build_user(self) -> CustomUser:
+        """
+        Returns the owner with its flags, username and email loaded; other fields are
+        deferred and fetched on access.
+        """
+        values = {field_name: bool(self.flags & (1 << bit)) for bit, field_name in enumerate(self.FLAG_FIELDS)}
+        return _from_values(
+            CustomUser, {"id": self.user_id, "username": self.username, "email": self.email, **values}
+        )
+
+    def build_token(self, token_key: str) -> CustomAuthToken:
+        expires_at = datetime.fromtimestamp(self.expires_at, tz=timezone.utc)
+        return _from_values(CustomAuthToken, {"key": token_key, "user_id": self.user_id, "expires_at": expires_at})
+
+
+def _from_values(model, values: dict):
+    """
+    Builds a model instance from a subset of its fields, the remaining fields are deferred.
+    """
+    field_names = [field.attname for field in model._meta.concrete_fields if field.attname in values]
+    return model.from_db("default", field_names, [values[field_name] for field_name in field_names])
+
+
+class TokenCache:
+    """
+    Read-through cache of token records shared by `TokenCacheMiddleware` and
+    `CustomJWTAuthentication`.
+
+    Records live in the `TOKEN_CACHE_ALIAS` cache, a `TwoTierRedisCache` whose entries
+    live in Redis exactly as long as the token itself and are served from a process-local
+    L1 tier in between. Entries are dropped on logout and token deletion, when the owner
+    is edited (including bulk `update()` calls, which must call `invalidate_users`) and
+    by the expired tokens cleanup; every drop is published over the cache's pub/sub
+    channel, so the L1 of every other process forgets the record too. Cache keys are
+    built from the token's `key_hash`, not from the JWT itself.
+    """
+
+    @staticmethod
+    def backend():
+        return caches[settings.TOKEN_CACHE_ALIAS]
+
+    @staticmethod
+    def hash_cache_key(key_hash: str) -> str:
+        return f"token_{key_hash}"
+
+    @classmethod
+    def cache_key(cls, token_key: str) -> str:
+        return cls.hash_cache_key(CustomAuthToken.hash_key(token_key))
+
+    @classmethod
+    def get(cls, token_key: str) -> TokenRecord | None:
+        record = TokenRecord.decode(cls.backend().get(cls.cache_key(token_key)))
+        if record is None or record.remaining_time <= 0:
+            return None
+        return record
+
+    @classmethod
+    def set(cls, token_key: str, record: TokenRecord) -> None:
+        remaining_time = record.remaining_time
+        if remaining_time <= 0:
+            return
+        cls.backend().set(cls.cache_key(token_key), record.encode(), timeout=remaining_time)
+
+    @classmethod
+    def delete(cls, token_key: str) -> None:
+        cls.backend().delete(cls.cache_key(token_key))
+
+    @classmethod
+    def delete_many(cls, token_keys) -> None:
+        cls.backend().delete_many([cls.cache_key(token_key) for token_key in token_keys])
+
+    @classmethod
+    def invalidate_user(cls, user_id: int) -> None:
+        """
+        Drops every cached record that belongs to the user.
+        """
+        cls.invalidate_users([user_id])
+
+    @classmethod
+    def invalidate_users(cls, user_ids) -> None:
+        """
+        Drops every cached record that belongs to one of the users, in every process.
+        """
+        user_ids = set(user_ids)
+        if not user_ids:
+            return
+
+        key_hashes = CustomAuthToken.objects.filter(user_id__in=user_ids).values_list("key_hash", flat=True)
+        cls.backend().delete_many([cls.hash_cache_key(key_hash) for key_hash in key_hashes])
@@ -1,6 +1,7 @@
 from unittest.mock import patch
 
 import pytest
+from django.core.cache import caches
 from rest_framework.test import APIClient
 
 from orders.models import Order
@@ -10,6 +11,16 @@ from users.models import CustomAuthToken, Team
 from users.models import CustomUser
 
 
+@pytest.fixture(autouse=True)
+def clear_token_cache():
+    """
+    Keeps token records cached by one test (whose rows are rolled back) out of the next.
+    """
+    caches["tokens"].clear()
+    yield
+    caches["tokens"].clear()
+
+
 # --- Users initialization ---
 @pytest.fixture(scope="session")
 def users(django_db_setup, django_db_blocker) -> tuple[list[CustomUser], list[dict]]:
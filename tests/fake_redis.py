@@ -0,0 +1,234 @@
+import queue
+import threading
+import time
+
+from core.cache_backends import LocalTier, TwoTierRedisCache
+
+
+class FakeRedisServer:
+    """
+    In-memory stand-in for the Redis server shared by the simulated processes.
+    """
+
+    def __init__(self):
+        self.data = {}
+        self.subscribers = {}
+        self.lock = threading.Lock()
+
+    def subscriber_count(self, channel) -> int:
+        with self.lock:
+            return len(self.subscribers.get(channel, []))
+
+
+class FakeRedis:
+    """
+    Implements the client commands used by Django's `RedisCacheClient` and `LocalTier`.
+    """
+
+    def __init__(self, server: FakeRedisServer):
+        self.server = server
+
+    def get(self, key):
+        return self.server.data.get(key)
+
+    def mget(self, keys):
+        return [self.server.data.get(key) for key in keys]
+
+    def set(self, key, value, ex=None, nx=False):
+        if nx and key in self.server.data:
+            return None
+        self.server.data[key] = value
+        return True
+
+    def mset(self, mapping):
+        self.server.data.update(mapping)
+        return True
+
+    def exists(self, key):
+        return int(key in self.server.data)
+
+    def expire(self, key, timeout):
+        return key in self.server.data
+
+    def persist(self, key):
+        return key in self.server.data
+
+    def incr(self, key, delta):
+        self.server.data[key] = int(self.server.data[key]) + delta
+        return self.server.data[key]
+
+    def delete(self, *keys):
+        return sum(self.server.data.pop(key, None) is not None for key in keys)
+
+    def flushdb(self):
+        self.server.data.clear()
+        return True
+
+    def publish(self, channel, message):
+        with self.server.lock:
+            subscribers = list(self.server.subscribers.get(channel, []))
+        for messages in subscribers:
+            messages.put(message.encode())
+        return len(subscribers)
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def pubsub(self, ignore_subscribe_messages=False):
+        return FakePubSub(self.server)
+
+
+class FakePipeline:
+    def __init__(self, client: FakeRedis):
+        self.client = client
+        self.commands = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def __getattr__(self, name):
+        def queue_command(*args, **kwargs):
+            self.commands.append((getattr(self.client, name), args, kwargs))
+            return self
+
+        return queue_command
+
+    def execute(self):
+        results = [command(*args, **kwargs) for command, args, kwargs in self.commands]
+        self.commands = []
+        return results
+
+
+class FakePubSub:
+    def __init__(self, server: FakeRedisServer):
+        self.server = server
+        self.messages = queue.Queue()
+
+    def subscribe(self, channel):
+        with self.server.lock:
+            self.server.subscribers.setdefault(channel, []).append(self.messages)
+
+    def listen(self):
+        while True:
+            yield {"type": "message", "data": self.messages.get()}
+
+
+class FakeAsyncRedis:
+    """
+    Implements the sorted set commands of the asyncio client used by `RedisPresenceStore`.
+    """
+
+    def __init__(self, server: FakeRedisServer):
+        self.server = server
+
+    @staticmethod
+    def _bound(value):
+        value = str(value)
+        return float(value.lstrip("(")), value.startswith("(")
+
+    def _zadd(self, key, mapping):
+        members = self.server.data.setdefault(key, {})
+        added = sum(member.encode() not in members for member in mapping)
+        members.update({member.encode(): score for member, score in mapping.items()})
+        return added
+
+    def _zrem(self, key, *members):
+        sorted_set = self.server.data.get(key, {})
+        members = [member if isinstance(member, bytes) else member.encode() for member in members]
+        return sum(sorted_set.pop(member, None) is not None for member in members)
+
+    def _zrangebyscore(self, key, min, max):
+        low, low_exclusive = self._bound(min)
+        high, high_exclusive = self._bound(max)
+        items = sorted(self.server.data.get(key, {}).items(), key=lambda item: item[1])
+        return [
+            member
+            for member, score in items
+            if (score > low if low_exclusive else score >= low) and (score < high if high_exclusive else score <= high)
+        ]
+
+    def _expire(self, key, timeout):
+        return key in self.server.data
+
+    def pipeline(self, transaction=True):
+        return FakeAsyncPipeline(self)
+
+    def __getattr__(self, name):
+        command = getattr(self, f"_{name}")
+
+        async def run(*args, **kwargs):
+            return command(*args, **kwargs)
+
+        return run
+
+
+class FakeAsyncPipeline:
+    """
+    Queues commands and runs them without yielding to the event loop, like a MULTI/EXEC block.
+    """
+
+    def __init__(self, client: FakeAsyncRedis):
+        self.client = client
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    def __getattr__(self, name):
+        def queue_command(*args, **kwargs):
+            self.commands.append((getattr(self.client, f"_{name}"), args, kwargs))
+            return self
+
+        return queue_command
+
+    async def execute(self):
+        results = [command(*args, **kwargs) for command, args, kwargs in self.commands]
+        self.commands = []
+        return results
+
+
+def wait_for(condition, timeout=2):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("Condition not met in time")
+        time.sleep(0.01)
+
+
+def process_cache(server: FakeRedisServer, channel: str) -> TwoTierRedisCache:
+    """
+    Returns a backend with its own L1 tier, as a separate process would have.
+    """
+    cache = TwoTierRedisCache(
+        "redis://fake:6379/0",
+        {"OPTIONS": {"L1_MAX_ENTRIES": 10, "L1_TIMEOUT": 60, "INVALIDATION_CHANNEL": channel}},
+    )
+    cache._tier = LocalTier(channel, maxsize=10, timeout=60)
+    cache._l1 = cache._tier.l1
+    client = FakeRedis(server)
+    cache._cache.get_client = lambda key=None, *, write=False: client
+    return cache
+
+
+def subscribed_cache(server: FakeRedisServer, channel: str) -> TwoTierRedisCache:
+    """
+    Returns a backend whose subscriber thread is listening for invalidations.
+    """
+    cache = process_cache(server, channel)
+    cache.has_key("warmup")
+
+    def warmed_up() -> bool:
+        # Once a message of another process got through, the subscriber is past its initial L1 flush
+        FakeRedis(server).publish(channel, "other-process|warmup")
+        return cache.stats()["invalidations_received"] > 0
+
+    wait_for(warmed_up)
+    time.sleep(0.05)  # Lets the remaining warmup messages drain
+    cache._tier.invalidations_received = 0
+    return cache
@@ -0,0 +1,50 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from users.models import Chat, CustomUser, Participant
+from websocket.models import Message
+
+
+@pytest.mark.django_db(transaction=True)
+class TestBenchmarkHistory:
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        # The command reuses its sender, an explicit ID keeps it clear of the users of other tests
+        CustomUser.objects.create_user(id=196, username="benchmark_history_sender", password="testpassword")
+
+    def _existing_message(self):
+        user = CustomUser.objects.create_user(id=195, username="historyowner", password="testpassword")
+        chat = Chat.objects.create(name="Real chat", is_group=True)
+        Participant.objects.create(chat=chat, user=user)
+        return Message.objects.create(chat=chat, sender=user, content={"text": "keep me"})
+
+    # --- Successful test cases ---
+    def test_empty_database_is_seeded_and_cleaned_up(self):
+        out = StringIO()
+        call_command("benchmark_history", rows=200, page_size=10, repeat=1, stdout=out)
+
+        assert "Seeding 200 messages" in out.getvalue()
+        assert "depth          0: cursor" in out.getvalue()
+        assert not Message.objects.exists()
+        assert not Chat.objects.filter(name="History benchmark").exists()
+
+    def test_force_runs_against_non_empty_database(self):
+        message = self._existing_message()
+
+        options = {"rows": 20, "page_size": 10, "repeat": 1, "no_offset": True, "force": True}
+        call_command("benchmark_history", **options, stdout=StringIO())
+
+        assert list(Message.objects.values_list("id", flat=True)) == [message.id]
+
+    # --- Bad request test cases ---
+    def test_non_empty_database_is_refused(self):
+        self._existing_message()
+
+        with pytest.raises(CommandError, match="--force"):
+            call_command("benchmark_history", rows=20, stdout=StringIO())
+
+        assert Message.objects.count() == 1
+        assert not Chat.objects.filter(name="History benchmark").exists()
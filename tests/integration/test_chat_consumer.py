@@ -0,0 +1,723 @@
+import asyncio
+import json
+import time
+from unittest.mock import patch
+
+import msgpack
+import pytest
+from asgiref.sync import async_to_sync, sync_to_async
+from channels.layers import get_channel_layer
+from channels.testing import WebsocketCommunicator
+from django.core import mail
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from core.tasks import send_chunked_data, send_notification_emails
+from tasks.models import Task
+from users.models import Chat, CustomAuthToken, CustomUser, Participant, Team
+from websocket.asgi import application
+from websocket.codecs import JSONCodec
+from websocket.executors import database_executor
+from websocket.models import Comment, Message, Notification
+from websocket.presence import get_presence_store, presence_member
+from websocket.utils import chat_group_name, fan_out_notifications, notification_group_name
+
+
+@pytest.mark.django_db(transaction=True)
+class TestMessageConsumerState:
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        self.sender = CustomUser.objects.create_user(id=120, username="chatsender", password="testpassword")
+        self.recipient = CustomUser.objects.create_user(id=121, username="chatrecipient", password="testpassword")
+        self.chat = Chat.objects.create(name="Consumer chat", is_group=True)
+        self.membership = Participant.objects.create(chat=self.chat, user=self.sender)
+        Participant.objects.create(chat=self.chat, user=self.recipient)
+        self.token = CustomAuthToken.objects.create(user=self.sender, user_agent="TestAgent")
+
+    def _communicator(self, token=None):
+        token = token or self.token
+        return WebsocketCommunicator(application, f"/ws/chat/{self.chat.id}/?token={token.key}")
+
+    @staticmethod
+    async def _connect(communicator):
+        connected, _ = await communicator.connect()
+        assert connected
+        return json.loads(await communicator.receive_from())  # Initial history page
+
+    async def _send_message(self, communicator, content):
+        await communicator.send_to(text_data=json.dumps({"action": "create", "chat_id": self.chat.id, "content": content}))
+        return json.loads(await communicator.receive_from())
+
+    # --- Successful test cases ---
+    def test_sender_is_resolved_once_per_connection(self):
+        async def scenario():
+            communicator = self._communicator()
+            await self._connect(communicator)
+
+            first = await self._send_message(communicator, {"text": "first"})
+            # Database work of the consumer runs in the executor's only worker, the context is entered there as well
+            queries = CaptureQueriesContext(connection)
+            await database_executor.run(queries.__enter__)
+            second = await self._send_message(communicator, {"text": "second"})
+            await database_executor.run(queries.__exit__, None, None, None)
+
+            await communicator.disconnect()
+            return first, second, await database_executor.run(lambda: queries.captured_queries)
+
+        # The notification emails are a worker job, not part of the consumer's work
+        with patch("core.tasks.send_notification_emails.delay"):
+            first, second, queries = async_to_sync(scenario)()
+
+        assert first["username"] == second["username"] == "chatsender"
+        assert Message.objects.filter(chat=self.chat, sender=self.sender).count() == 2
+        assert any(query["sql"].startswith('INSERT INTO "websocket_message"') for query in queries)
+        lookup_tables = ("users_customauthtoken", "users_customuser", "users_participant", "users_chat")
+        lookups = [query["sql"] for query in queries if query["sql"].startswith("SELECT")]
+        assert not [sql for sql in lookups if any(table in sql for table in lookup_tables)]
+
+    # --- Bad request test cases ---
+    def test_removed_participant_is_refreshed_by_server_event(self):
+        async def scenario():
+            communicator = self._communicator()
+            await self._connect(communicator)
+            await self._send_message(communicator, {"text": "before"})
+
+            await sync_to_async(self.membership.delete)()
+            await communicator.receive_nothing()  # Let the consumer handle the refresh event
+
+            response = await self._send_message(communicator, {"text": "after"})
+            await communicator.disconnect()
+            return response
+
+        response = async_to_sync(scenario)()
+
+        assert response["type"] == "error"
+        assert "chat_participants" in response["errors"]
+        assert Message.objects.filter(chat=self.chat).count() == 1
+
+
+@pytest.mark.django_db(transaction=True)
+class TestCommentConsumerMembership:
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        self.leader = CustomUser.objects.create_user(id=190, username="taskleader", password="testpassword")
+        self.member = CustomUser.objects.create_user(id=191, username="taskmember", password="testpassword")
+        self.outsider = CustomUser.objects.create_user(id=192, username="taskoutsider", password="testpassword")
+        self.team = Team.objects.create(leader=self.leader)
+        self.team.list_of_members.add(self.member)
+        self.task = Task.objects.create(title="Commented task", description="", team=self.team)
+        self.other_task = Task.objects.create(title="Other task", description="", team=self.team)
+        self.tokens = {
+            user.id: CustomAuthToken.objects.create(user=user, user_agent="TestAgent")
+            for user in (self.leader, self.member, self.outsider)
+        }
+
+    async def _connect(self, user):
+        communicator = WebsocketCommunicator(
+            application, f"/ws/comnt/{self.task.id}/?token={self.tokens[user.id].key}"
+        )
+        connected, _ = await communicator.connect()
+        assert connected
+        await communicator.receive_json_from()  # Initial history page
+        return communicator
+
+    def _exchange(self, user, *actions):
+        """
+        Sends the actions one after the other and returns the reply to each of them.
+        """
+        async def scenario():
+            communicator = await self._connect(user)
+            replies = []
+            for action in actions:
+                await communicator.send_json_to(action)
+                replies.append(await communicator.receive_json_from())
+            await communicator.disconnect()
+            return replies
+
+        return async_to_sync(scenario)()
+
+    # --- Successful test cases ---
+    def test_comment_is_created_on_the_connected_task(self):
+        action = {"action": "create", "task_id": self.other_task.id, "content": {"text": "hello"}}
+
+        (reply,) = self._exchange(self.member, action)
+
+        assert reply["type"] == "send_comment"
+        comment = Comment.objects.get()
+        assert (comment.task_id, comment.member_id) == (self.task.id, self.member.id)
+
+    def test_added_member_is_refreshed_by_server_event(self):
+        async def scenario():
+            communicator = await self._connect(self.outsider)
+
+            await sync_to_async(self.team.list_of_members.add)(self.outsider)
+            await communicator.receive_nothing()  # Let the consumer handle the refresh event
+
+            await communicator.send_json_to({"action": "create", "content": {"text": "joined"}})
+            reply = await communicator.receive_json_from()
+            await communicator.disconnect()
+            return reply
+
+        reply = async_to_sync(scenario)()
+
+        assert reply["type"] == "send_comment"
+        assert Comment.objects.filter(task=self.task, member=self.outsider).exists()
+
+    def test_author_updates_own_comment(self):
+        comment = Comment.objects.create(task=self.task, member=self.member, content={"text": "original"})
+
+        (reply,) = self._exchange(self.member, {"action": "update", "pk": comment.id, "content": {"text": "edited"}})
+
+        assert reply["type"] == "send_comment"
+        assert reply["comment"]["content"] == {"text": "edited"}
+        comment.refresh_from_db()
+        assert comment.content == {"text": "edited"}
+        assert comment.updated_at is not None
+
+    # --- Bad request test cases ---
+    def test_non_member_cannot_comment(self):
+        (reply,) = self._exchange(self.outsider, {"action": "create", "content": {"text": "intruder"}})
+
+        assert reply["type"] == "error"
+        assert "task" in reply["errors"]
+        assert not Comment.objects.exists()
+
+    def test_removed_member_is_refreshed_by_server_event(self):
+        async def scenario():
+            communicator = await self._connect(self.member)
+
+            await sync_to_async(self.team.list_of_members.remove)(self.member)
+            await communicator.receive_nothing()  # Let the consumer handle the refresh event
+
+            await communicator.send_json_to({"action": "create", "content": {"text": "left"}})
+            reply = await communicator.receive_json_from()
+            await communicator.disconnect()
+            return reply
+
+        reply = async_to_sync(scenario)()
+
+        assert reply["type"] == "error"
+        assert not Comment.objects.exists()
+
+    def test_client_member_id_is_ignored(self):
+        comment = Comment.objects.create(task=self.task, member=self.member, content={"text": "original"})
+
+        update, delete = self._exchange(
+            self.leader,
+            {"action": "update", "pk": comment.id, "member_id": self.member.id, "content": {"text": "spoofed"}},
+            {"action": "delete", "pk": comment.id, "member_id": self.member.id},
+        )
+
+        assert update["type"] == delete["type"] == "error"
+        comment.refresh_from_db()
+        assert comment.content == {"text": "original"}
+
+
+@pytest.mark.django_db(transaction=True)
+class TestConsumerHistory:
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        self.sender = CustomUser.objects.create_user(id=125, username="historysender", password="testpassword")
+        self.reader = CustomUser.objects.create_user(id=126, username="historyreader", password="testpassword")
+        self.chat = Chat.objects.create(name="History chat", is_group=True)
+        Participant.objects.create(chat=self.chat, user=self.sender)
+        Participant.objects.create(chat=self.chat, user=self.reader)
+        self.messages = [
+            Message.objects.create(chat=self.chat, sender=self.sender, content={"text": f"message {number}"})
+            for number in range(3)
+        ]
+        self.sender_token = CustomAuthToken.objects.create(user=self.sender, user_agent="TestAgent")
+        self.reader_token = CustomAuthToken.objects.create(user=self.reader, user_agent="TestAgent")
+
+    def _communicator(self, token):
+        return WebsocketCommunicator(application, f"/ws/chat/{self.chat.id}/?token={token.key}")
+
+    # --- Successful test cases ---
+    def test_history_pages_are_sent_to_the_requesting_connection_only(self, settings):
+        settings.WEBSOCKET_HISTORY_PAGE_SIZE = 2
+
+        async def scenario():
+            requester = self._communicator(self.sender_token)
+            other = self._communicator(self.reader_token)
+            await requester.connect()
+            await other.connect()
+            first_page = await requester.receive_json_from()
+            await other.receive_json_from()
+
+            await requester.send_json_to(
+                {"action": "get_next_batch", "cursor": first_page["next_cursor"], "request_id": "page-2"}
+            )
+            second_page = await requester.receive_json_from()
+            other_received_nothing = await other.receive_nothing()
+
+            await requester.disconnect()
+            await other.disconnect()
+            return first_page, second_page, other_received_nothing
+
+        first_page, second_page, other_received_nothing = async_to_sync(scenario)()
+
+        newest_first = [message.id for message in reversed(self.messages)]
+        assert first_page["type"] == "send_data_chunk"
+        assert [item["pk"] for item in first_page["data"]] == newest_first[:2]
+        assert [item["pk"] for item in second_page["data"]] == newest_first[2:]
+        assert second_page["request_id"] == "page-2"
+        assert second_page["next_cursor"] is None
+        assert other_received_nothing
+
+    def test_large_pages_are_offloaded_to_celery(self, settings):
+        settings.WEBSOCKET_HISTORY_OFFLOAD_SIZE = 10
+        settings.WEBSOCKET_HISTORY_PAGE_SIZE = 20
+
+        async def scenario():
+            communicator = self._communicator(self.sender_token)
+            await communicator.connect()
+            received_nothing = await communicator.receive_nothing()
+            await communicator.disconnect()
+            return received_nothing
+
+        with patch("core.tasks.send_chunked_data.delay") as send_chunked_data:
+            assert async_to_sync(scenario)()
+
+        send_chunked_data.assert_called_once()
+        assert send_chunked_data.call_args.kwargs["batch_size"] == 20
+        assert send_chunked_data.call_args.kwargs["channel_name"].startswith("specific.")
+
+    def test_offloaded_page_is_sent_to_the_requesting_channel_only(self):
+        channel_layer = get_channel_layer()
+        requester, other = async_to_sync(channel_layer.new_channel)(), async_to_sync(channel_layer.new_channel)()
+        group_name = f"chat_{self.chat.id}"
+        async_to_sync(channel_layer.group_add)(group_name, requester)
+        async_to_sync(channel_layer.group_add)(group_name, other)
+
+        send_chunked_data(
+            group_name=group_name,
+            instance_model="Message",
+            instance_serializer_class="MessageSerializer",
+            filter_kwargs={"chat_id": self.chat.id},
+            batch_size=10,
+            channel_name=requester,
+            request_id=7,
+        )
+
+        response = async_to_sync(channel_layer.receive)(requester)
+        assert response["type"] == "send_data_chunk"
+        assert response["request_id"] == 7
+        assert len(response["data"]) == len(self.messages)
+        with pytest.raises(asyncio.TimeoutError):
+            async_to_sync(asyncio.wait_for)(channel_layer.receive(other), timeout=0.1)
+
+    def test_offloaded_page_with_invalid_cursor_replies_with_error(self):
+        channel_layer = get_channel_layer()
+        requester = async_to_sync(channel_layer.new_channel)()
+
+        send_chunked_data(
+            group_name=f"chat_{self.chat.id}",
+            instance_model="Message",
+            instance_serializer_class="MessageSerializer",
+            filter_kwargs={"chat_id": self.chat.id},
+            batch_size=10,
+            channel_name=requester,
+            cursor="not-a-cursor",
+        )
+
+        response = async_to_sync(channel_layer.receive)(requester)
+        assert response == {"type": "send_error", "errors": {"cursor": "Invalid cursor."}}
+
+
+@pytest.mark.django_db(transaction=True)
+class TestNotificationFanOut:
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        self.recipients = [
+            CustomUser.objects.create_user(
+                id=140 + number, username=f"fanout{number}", email=f"fanout{number}@example.com", password="pass"
+            )
+            for number in range(4)
+        ]
+        self.content = {"content": "You've received 1 messages in chat: Fan-out chat!"}
+
+    def _fan_out(self, recipient_ids):
+        channel_layer = get_channel_layer()
+
+        async def scenario():
+            channels = {}
+            for recipient_id in set(recipient_ids) | {self.recipients[-1].id}:
+                channels[recipient_id] = await channel_layer.new_channel()
+                await channel_layer.group_add(notification_group_name(recipient_id), channels[recipient_id])
+
+            queries = CaptureQueriesContext(connection)
+            await database_executor.run(queries.__enter__)
+            await fan_out_notifications(channel_layer, recipient_ids, "New message", self.content)
+            await database_executor.run(queries.__exit__, None, None, None)
+            return channels, await database_executor.run(lambda: queries.captured_queries)
+
+        with patch("core.tasks.send_notification_emails.delay") as send_emails:
+            channels, queries = async_to_sync(scenario)()
+        return channel_layer, channels, queries, send_emails
+
+    # --- Successful test cases ---
+    def test_notifications_are_created_in_one_statement(self):
+        recipient_ids = [recipient.id for recipient in self.recipients[:3]]
+
+        _, _, queries, send_emails = self._fan_out(recipient_ids)
+
+        statements = [query["sql"] for query in queries if query["sql"] not in ("BEGIN", "COMMIT")]
+        assert len(statements) == 1
+        assert statements[0].startswith('INSERT INTO "websocket_notification"')
+        assert Notification.objects.filter(user_id__in=recipient_ids).count() == 3
+        send_emails.assert_called_once()
+        assert send_emails.call_args.kwargs["recipient_ids"] == recipient_ids
+
+    def test_each_recipient_gets_its_own_event(self):
+        recipient_ids = [self.recipients[0].id, self.recipients[1].id, self.recipients[0].id]
+
+        channel_layer, channels, _, _ = self._fan_out(recipient_ids)
+
+        for recipient_id in (self.recipients[0].id, self.recipients[1].id):
+            event = json.loads(async_to_sync(channel_layer.receive)(channels[recipient_id])["frames"]["json"])
+            assert event["user_id"] == recipient_id
+            assert event["notification"]["content"] == self.content
+            assert "recipient_list" not in event
+            with pytest.raises(asyncio.TimeoutError):
+                async_to_sync(asyncio.wait_for)(channel_layer.receive(channels[recipient_id]), timeout=0.1)
+        with pytest.raises(asyncio.TimeoutError):
+            async_to_sync(asyncio.wait_for)(channel_layer.receive(channels[self.recipients[-1].id]), timeout=0.1)
+
+    def test_email_job_sends_one_email_per_recipient(self):
+        recipient_ids = [self.recipients[0].id, self.recipients[1].id, self.recipients[0].id]
+
+        send_notification_emails("New message", self.content["content"], recipient_ids)
+
+        assert sorted(email.to[0] for email in mail.outbox) == ["fanout0@example.com", "fanout1@example.com"]
+        assert all(len(email.to) == 1 for email in mail.outbox)
+
+
+@pytest.mark.django_db(transaction=True)
+class TestNotificationRouting:
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        self.owner = CustomUser.objects.create_user(id=150, username="notifyowner", password="testpassword")
+        self.other = CustomUser.objects.create_user(id=151, username="notifyother", password="testpassword")
+        self.owner_tokens = [
+            CustomAuthToken.objects.create(user=self.owner, user_agent=f"Device{number}") for number in range(2)
+        ]
+        self.other_token = CustomAuthToken.objects.create(user=self.other, user_agent="TestAgent")
+
+    @staticmethod
+    def _communicator(user, token=None):
+        query = f"?token={token.key}" if token else ""
+        return WebsocketCommunicator(application, f"/ws/notify/{user.id}/{query}")
+
+    # --- Successful test cases ---
+    def test_notification_reaches_every_device_of_the_user_only(self):
+        async def scenario():
+            devices = [self._communicator(self.owner, token) for token in self.owner_tokens]
+            other = self._communicator(self.other, self.other_token)
+            for communicator in (*devices, other):
+                connected, _ = await communicator.connect()
+                assert connected
+                await communicator.receive_json_from()  # Initial history page
+
+            await devices[0].send_json_to(
+                {"action": "create", "user_id": self.owner.id, "content": {"content": "Hello"}}
+            )
+            received = [await device.receive_json_from() for device in devices]
+            other_received_nothing = await other.receive_nothing()
+
+            for communicator in (*devices, other):
+                await communicator.disconnect()
+            return received, other_received_nothing
+
+        received, other_received_nothing = async_to_sync(scenario)()
+
+        assert [event["notification"]["content"] for event in received] == [{"content": "Hello"}] * 2
+        assert other_received_nothing
+
+    # --- Bad request test cases ---
+    def test_connection_to_notifications_of_another_user_is_rejected(self):
+        async def scenario():
+            results = []
+            for communicator in (self._communicator(self.other, self.owner_tokens[0]), self._communicator(self.owner)):
+                connected, _ = await communicator.connect()
+                results.append(connected)
+            return results
+
+        assert async_to_sync(scenario)() == [False, False]
+
+
+@pytest.mark.django_db(transaction=True)
+class TestWireFormat:
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        self.sender = CustomUser.objects.create_user(id=160, username="msgpacksender", password="testpassword")
+        self.reader = CustomUser.objects.create_user(id=161, username="jsonreader", password="testpassword")
+        self.chat = Chat.objects.create(name="Wire format chat", is_group=True)
+        Participant.objects.create(chat=self.chat, user=self.sender)
+        Participant.objects.create(chat=self.chat, user=self.reader)
+        self.sender_token = CustomAuthToken.objects.create(user=self.sender, user_agent="TestAgent")
+        self.reader_token = CustomAuthToken.objects.create(user=self.reader, user_agent="TestAgent")
+
+    def _communicator(self, token, subprotocols=None):
+        return WebsocketCommunicator(
+            application, f"/ws/chat/{self.chat.id}/?token={token.key}", subprotocols=subprotocols
+        )
+
+    # --- Successful test cases ---
+    def test_msgpack_clients_share_broadcasts_with_json_clients(self):
+        async def scenario():
+            sender = self._communicator(self.sender_token, subprotocols=["msgpack"])
+            reader = self._communicator(self.reader_token)
+            connected, subprotocol = await sender.connect()
+            assert connected and subprotocol == "msgpack"
+            await reader.connect()
+            first_page = msgpack.unpackb((await sender.receive_output())["bytes"])
+            await reader.receive_from()
+
+            with patch.object(JSONCodec, "encode", wraps=JSONCodec.encode) as json_encode:
+                message = {"action": "create", "chat_id": self.chat.id, "content": {"text": "hi"}}
+                await sender.send_to(bytes_data=msgpack.packb(message))
+                sent = msgpack.unpackb((await sender.receive_output())["bytes"])
+                received = json.loads(await reader.receive_from())
+
+            await sender.disconnect()
+            await reader.disconnect()
+            return first_page, sent, received, json_encode.call_count
+
+        first_page, sent, received, json_encodes = async_to_sync(scenario)()
+
+        assert first_page["type"] == "send_data_chunk"
+        assert sent == received
+        assert received["message"]["content"] == {"text": "hi"}
+        # One frame for the chat broadcast and one for the reader's notification, not one per subscriber
+        assert json_encodes == 2
+
+    def test_opted_in_client_gets_room_events_in_batches(self):
+        async def scenario():
+            sender = self._communicator(self.sender_token)
+            reader = WebsocketCommunicator(
+                application, f"/ws/chat/{self.chat.id}/?token={self.reader_token.key}&coalesce=50"
+            )
+            await sender.connect()
+            await reader.connect()
+            await sender.receive_from()
+            await reader.receive_from()
+
+            for text in ("first", "second"):
+                await sender.send_json_to({"action": "create", "chat_id": self.chat.id, "content": {"text": text}})
+                await sender.receive_json_from()
+            batch = await reader.receive_json_from(timeout=2)
+
+            await sender.disconnect()
+            await reader.disconnect()
+            return batch
+
+        batch = async_to_sync(scenario)()
+
+        assert batch["type"] == "batch"
+        assert [event["message"]["content"]["text"] for event in batch["events"]] == ["first", "second"]
+
+
+@pytest.mark.django_db(transaction=True)
+class TestConsumerThreadHops:
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        self.user = CustomUser.objects.create_user(id=170, username="hopsuser", password="testpassword")
+        self.chat = Chat.objects.create(name="Hops chat", is_group=True)
+        Participant.objects.create(chat=self.chat, user=self.user)
+        self.message = Message.objects.create(chat=self.chat, sender=self.user, content={"text": "first"})
+        self.notifications = [
+            Notification.objects.create(user=self.user, content={"content": f"notification {number}"})
+            for number in range(3)
+        ]
+        self.token = CustomAuthToken.objects.create(user=self.user, user_agent="TestAgent")
+
+    def _hops(self, path, action):
+        """
+        Returns the reply to the action and the number of database executor calls it took.
+        """
+        async def scenario():
+            communicator = WebsocketCommunicator(application, f"/ws/{path}/?token={self.token.key}")
+            await communicator.connect()
+            await communicator.receive_json_from()  # Initial history page
+            # Actions are handled one after the other, so connect() is over once this one is answered
+            await communicator.send_json_to({"action": "get_next_batch"})
+            await communicator.receive_json_from()
+
+            completed = database_executor.stats()["completed"]
+            await communicator.send_json_to(action)
+            reply = await communicator.receive_json_from()
+            hops = database_executor.stats()["completed"] - completed
+
+            await communicator.disconnect()
+            return reply, hops
+
+        return async_to_sync(scenario)()
+
+    # --- Successful test cases ---
+    def test_message_update_is_one_hop(self):
+        action = {
+            "action": "update",
+            "pk": self.message.id,
+            "chat_id": self.chat.id,
+            "content": {"text": "edited"},
+        }
+
+        reply, hops = self._hops(f"chat/{self.chat.id}", action)
+
+        assert reply["content"]["content"] == {"text": "edited"}
+        assert hops == 1
+
+    def test_message_delete_is_one_hop(self):
+        action = {"action": "delete", "pk": self.message.id}
+
+        reply, hops = self._hops(f"chat/{self.chat.id}", action)
+
+        assert reply["message"] == f"Message {self.message.id} has been successfully deleted."
+        assert hops == 1
+        assert not Message.objects.filter(id=self.message.id).exists()
+
+    def test_notifications_delete_is_one_hop_whatever_their_number(self):
+        action = {
+            "action": "delete",
+            "notifications_ids": [notification.id for notification in self.notifications],
+        }
+
+        reply, hops = self._hops(f"notify/{self.user.id}", action)
+
+        assert reply["message"] == "3 notifications deleted successfully."
+        assert hops == 1
+
+
+    # --- Bad request test cases ---
+    def test_client_sender_id_is_ignored(self):
+        other = CustomUser.objects.create_user(id=193, username="hopsother", password="testpassword")
+        Participant.objects.create(chat=self.chat, user=other)
+        self.token = CustomAuthToken.objects.create(user=other, user_agent="TestAgent")
+        path = f"chat/{self.chat.id}"
+
+        update = {
+            "action": "update",
+            "pk": self.message.id,
+            "chat_id": self.chat.id,
+            "sender_id": self.user.id,
+            "content": {"text": "spoofed"},
+        }
+        update_reply, _ = self._hops(path, update)
+        delete_reply, _ = self._hops(path, {"action": "delete", "pk": self.message.id, "sender_id": self.user.id})
+
+        assert update_reply["type"] == delete_reply["type"] == "error"
+        self.message.refresh_from_db()
+        assert self.message.content == {"text": "first"}
+
+    def test_client_user_id_is_ignored(self):
+        other = CustomUser.objects.create_user(id=194, username="hopsneighbour", password="testpassword")
+        notification = Notification.objects.create(user=other, content={"content": "not yours"})
+
+        action = {"action": "delete", "user_id": other.id, "notifications_ids": [notification.id]}
+        reply, _ = self._hops(f"notify/{self.user.id}", action)
+
+        assert reply["type"] == "error"
+        assert Notification.objects.filter(id=notification.id).exists()
+
+
+@pytest.mark.django_db(transaction=True)
+class TestPresence:
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        self.first = CustomUser.objects.create_user(id=180, username="presencefirst", password="testpassword")
+        self.second = CustomUser.objects.create_user(id=181, username="presencesecond", password="testpassword")
+        self.chat = Chat.objects.create(name="Presence chat", is_group=True)
+        Participant.objects.create(chat=self.chat, user=self.first)
+        Participant.objects.create(chat=self.chat, user=self.second)
+        self.first_token = CustomAuthToken.objects.create(user=self.first, user_agent="TestAgent")
+        self.second_token = CustomAuthToken.objects.create(user=self.second, user_agent="TestAgent")
+
+    async def _connect(self, token, presence=True):
+        query = f"?token={token.key}" + ("&presence=1" if presence else "")
+        communicator = WebsocketCommunicator(application, f"/ws/chat/{self.chat.id}/{query}")
+        connected, _ = await communicator.connect()
+        assert connected
+        await communicator.receive_json_from()  # Initial history page
+        return communicator
+
+    # --- Successful test cases ---
+    def test_snapshot_and_join_leave_events(self):
+        async def scenario():
+            first = await self._connect(self.first_token)
+            first_snapshot = await first.receive_json_from()
+            await first.receive_json_from()  # Its own join event
+
+            second = await self._connect(self.second_token)
+            second_snapshot = await second.receive_json_from()
+            joined = await first.receive_json_from()
+
+            await second.disconnect()
+            left = await first.receive_json_from()
+            await first.disconnect()
+            return first_snapshot, second_snapshot, joined, left
+
+        first_snapshot, second_snapshot, joined, left = async_to_sync(scenario)()
+
+        assert first_snapshot == {"type": "presence_snapshot", "online": [180]}
+        assert second_snapshot == {"type": "presence_snapshot", "online": [180, 181]}
+        assert (joined["event"], joined["user_id"], joined["username"]) == ("join", 181, "presencesecond")
+        assert (left["event"], left["user_id"]) == ("leave", 181)
+
+    def test_second_device_does_not_repeat_join_and_leave(self):
+        async def scenario():
+            first = await self._connect(self.first_token)
+            await first.receive_json_from()  # Snapshot
+            await first.receive_json_from()  # Own join event
+
+            # The second device does not opt in, it still counts the user as online
+            other_device = await self._connect(self.first_token, presence=False)
+            await other_device.disconnect()
+            nothing_sent = await first.receive_nothing(timeout=0.2)
+
+            await first.disconnect()
+            return nothing_sent
+
+        assert async_to_sync(scenario)()
+
+    def test_expired_connection_of_dead_process_is_announced_as_leave(self, settings):
+        settings.PRESENCE_HEARTBEAT_INTERVAL = 0.05
+
+        async def scenario():
+            first = await self._connect(self.first_token)
+            await first.receive_json_from()  # Snapshot
+            await first.receive_json_from()  # Own join event
+
+            # A connection of the second user in a process that died without disconnecting
+            members = get_presence_store().groups[chat_group_name(self.chat.id)]
+            members[presence_member(self.second.id, "dead-process-channel")] = time.time() - 1
+            left = await first.receive_json_from(timeout=1)
+
+            await first.disconnect()
+            return left
+
+        left = async_to_sync(scenario)()
+
+        assert (left["event"], left["user_id"], left["username"]) == ("leave", 181, None)
+
+    # --- Bad request test cases ---
+    def test_typing_events_are_rate_limited(self):
+        async def scenario():
+            first = await self._connect(self.first_token)
+            await first.receive_json_from()  # Snapshot
+            await first.receive_json_from()  # Own join event
+            second = await self._connect(self.second_token, presence=False)
+            await first.receive_json_from()  # Join of the second user
+
+            for _ in range(3):
+                await second.send_json_to({"action": "typing"})
+            typing = await first.receive_json_from()
+            nothing_else = await first.receive_nothing(timeout=0.2)
+
+            await second.disconnect()
+            await first.disconnect()
+            return typing, nothing_else
+
+        typing, nothing_else = async_to_sync(scenario)()
+
+        assert (typing["event"], typing["user_id"]) == ("typing", 181)
+        assert nothing_else
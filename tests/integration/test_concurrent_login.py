@@ -0,0 +1,61 @@
+import threading
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.utils.timezone import now
+
+from users.models import CustomAuthToken, CustomUser
+from users.utils import TokenManager
+
+
+@pytest.mark.django_db(transaction=True)
+class TestConcurrentLogin:
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        self.user = CustomUser.objects.create_user(id=100, username="concurrentuser", password="testpassword")
+        self.user_agent = "ConcurrentAgent"
+
+    def _login_in_parallel(self, workers: int) -> list:
+        barrier = threading.Barrier(workers)
+        results = []
+        errors = []
+
+        def login():
+            try:
+                barrier.wait()
+                results.append(TokenManager().get_or_create_token(self.user, self.user_agent))
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=login) for _ in range(workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert errors == []
+        return results
+
+    def test_parallel_logins_share_one_token(self):
+        results = self._login_in_parallel(workers=8)
+
+        assert CustomAuthToken.objects.filter(user=self.user, user_agent=self.user_agent).count() == 1
+        assert len({token.key for token, _ in results}) == 1
+        assert sum(created for _, created in results) == 1
+
+    def test_expired_token_is_replaced_in_place(self):
+        expired = CustomAuthToken.objects.create(
+            user=self.user, user_agent=self.user_agent, key="expired-key", expires_at=now() - timedelta(minutes=1)
+        )
+
+        results = self._login_in_parallel(workers=4)
+        token = CustomAuthToken.objects.get(user=self.user, user_agent=self.user_agent)
+
+        assert token.pk == expired.pk
+        assert token.key != expired.key
+        assert token.is_valid()
+        assert {result.key for result, _ in results} == {token.key}
+        assert sum(created for _, created in results) == 1
@@ -0,0 +1,37 @@
+import json
+
+import pytest
+from django.core.management import call_command
+
+from users.models import Chat, CustomUser
+
+
+@pytest.mark.django_db(transaction=True)
+class TestWebsocketLoadTest:
+    # --- Successful test cases ---
+    def test_report_covers_every_consumer(self, tmp_path):
+        output = tmp_path / "report.json"
+        call_command(
+            "loadtest_websockets",
+            clients=12,
+            room_size=4,
+            comment_ratio=1,
+            notify_ratio=1,
+            operations=4,
+            think_time=0,
+            output=str(output),
+        )
+
+        report = json.loads(output.read_text())
+        assert report["connections"]["open"] == 36
+        assert report["connections"]["by_kind"] == {"chat": 12, "comnt": 12, "notify": 12}
+        assert report["operations"]["total"] == 36 * 4
+        assert report["operations"]["errors"] == report["operations"]["timeouts"] == 0
+        assert {action.split(".")[0] for action in report["operations"]["by_action"]} == {"chat", "comnt", "notify"}
+        assert report["operations"]["p99_ms"] is not None
+
+    def test_seeded_data_is_removed(self, tmp_path):
+        call_command("loadtest_websockets", clients=3, operations=1, think_time=0, output=str(tmp_path / "report.json"))
+
+        assert not CustomUser.objects.filter(username__startswith="loadtest_").exists()
+        assert not Chat.objects.filter(name__startswith="Load test").exists()
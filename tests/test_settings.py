@@ -14,12 +14,21 @@ DATABASES = {
 CACHES = {
     "default": {
         "BACKEND": "django.core.cache.backends.dummy.DummyCache",
-    }
+    },
+    "tokens": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "tokens",
+    },
 }
 
 MIDDLEWARE.remove("django.middleware.security.SecurityMiddleware")
 MIDDLEWARE.remove("core.middleware.TokenCacheMiddleware")
 
+# A single worker keeps the consumers' queries on one connection, which the tests can capture
+WEBSOCKET_DB_WORKERS = 1
+
+PRESENCE_BACKEND = "websocket.presence.InMemoryPresenceStore"
+
 CELERY_TASK_ALWAYS_EAGER = True
 CELERY_TASK_EAGER_PROPAGATES = True
 
@@ -39,3 +48,9 @@ LOGGING = {
 
 EMAIL_BACKEND = "django.core.mail.backends.locmem.EmailBackend"
 DEBUG = False
+
+CHANNEL_LAYERS = {
+    "default": {
+        "BACKEND": "channels.layers.InMemoryChannelLayer",
+    }
+}
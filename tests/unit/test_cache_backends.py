@@ -0,0 +1,99 @@
+import os
+import time
+
+import pytest
+
+from core.cache_backends import TwoTierRedisCache
+from tests.fake_redis import FakeRedisServer, process_cache, subscribed_cache, wait_for
+
+
+class TestTwoTierRedisCache:
+    channel = "test_cache_invalidation"
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        self.server = FakeRedisServer()
+
+    def _process_cache(self) -> TwoTierRedisCache:
+        return process_cache(self.server, self.channel)
+
+    def _subscribed_cache(self) -> TwoTierRedisCache:
+        return subscribed_cache(self.server, self.channel)
+
+    # --- Successful test cases ---
+    def test_get_set_and_delete(self):
+        cache = self._process_cache()
+
+        cache.set("answer", {"value": 42})
+        assert cache.get("answer") == {"value": 42}
+        assert cache.has_key("answer")
+
+        cache.delete("answer")
+        assert cache.get("answer", "missing") == "missing"
+        assert not cache.has_key("answer")
+
+    def test_reads_are_served_from_l1(self):
+        cache = self._subscribed_cache()
+        cache.set("answer", 42)
+
+        self.server.data.clear()  # Only the L1 copy is left
+
+        assert cache.get("answer") == 42
+        assert cache.get_many(["answer"]) == {"answer": 42}
+
+    def test_l2_hits_fill_l1(self):
+        writer, reader = self._process_cache(), self._subscribed_cache()
+        writer.set("answer", 42)
+        wait_for(lambda: reader.stats()["invalidations_received"] == 1)
+
+        assert reader.get("answer") == 42
+        assert reader.get("unknown") is None
+        assert reader.stats()["l2_hits"] == 1
+        assert reader.stats()["l2_misses"] == 1
+
+        self.server.data.clear()
+        assert reader.get("answer") == 42
+
+    def test_writes_invalidate_l1_of_other_processes(self):
+        writer, reader = self._subscribed_cache(), self._subscribed_cache()
+        writer.set("answer", 42)
+        wait_for(lambda: reader.stats()["invalidations_received"] == 1)
+        assert reader.get("answer") == 42
+
+        writer.set("answer", 43)
+        wait_for(lambda: reader.stats()["invalidations_received"] == 2)
+        assert reader.get("answer") == 43
+
+        writer.delete("answer")
+        wait_for(lambda: reader.stats()["invalidations_received"] == 3)
+        assert reader.get("answer") is None
+
+    def test_clear_flushes_l1_of_other_processes(self):
+        writer, reader = self._subscribed_cache(), self._subscribed_cache()
+        writer.set_many({"first": 1, "second": 2})
+        wait_for(lambda: reader.stats()["invalidations_received"] == 2)
+        assert reader.get_many(["first", "second"]) == {"first": 1, "second": 2}
+
+        writer.clear()
+        wait_for(lambda: reader.stats()["invalidations_received"] == 3)
+
+        assert reader.get_many(["first", "second"]) == {}
+
+    def test_has_key_starts_the_subscriber(self):
+        cache = self._process_cache()
+
+        cache.has_key("answer")
+
+        assert cache._tier._subscriber_pid == os.getpid()
+        wait_for(lambda: self.server.subscriber_count(self.channel) == 1)
+
+    # --- Bad request test cases ---
+    def test_own_invalidations_are_ignored(self):
+        cache = self._subscribed_cache()
+
+        cache.set("answer", 42)
+        self.server.data.clear()
+        time.sleep(0.05)
+
+        assert cache.stats()["invalidations_received"] == 0
+        assert cache.get("answer") == 42
@@ -0,0 +1,61 @@
+from asgiref.sync import async_to_sync
+
+from core.channel_layers import (
+    HashRing,
+    ShardedRedisChannelLayer,
+    ShardedRedisPubSubChannelLayer,
+    probe_shards,
+    shard_name,
+)
+
+GROUPS = [f"chat_{number}" for number in range(5000)]
+
+
+class TestChannelLayerSharding:
+    # --- Successful test cases ---
+    def test_added_node_only_takes_keys_over(self):
+        nodes = ["redis://a:6379", "redis://b:6379", "redis://c:6379"]
+        before = HashRing(nodes)
+        after = HashRing(nodes + ["redis://d:6379"])
+
+        moved = [group for group in GROUPS if nodes[before.get(group)] != after.nodes[after.get(group)]]
+
+        assert all(after.get(group) == 3 for group in moved)
+        assert 0.15 < len(moved) / len(GROUPS) < 0.35
+        assert abs(sum(after.shares().values()) - 1) < 0.001
+
+    def test_order_of_hosts_does_not_matter(self):
+        ring = HashRing(["redis://a:6379", "redis://b:6379"])
+        reversed_ring = HashRing(["redis://b:6379", "redis://a:6379"])
+
+        assert all(ring.nodes[ring.get(group)] == reversed_ring.nodes[reversed_ring.get(group)] for group in GROUPS)
+
+    def test_both_backends_route_groups_on_the_ring(self):
+        hosts = ["redis://a:6379", ("b", 6379)]
+        ring = HashRing(["a:6379", "b:6379"])
+        list_layer = ShardedRedisChannelLayer(hosts=hosts)
+        pubsub_layer = ShardedRedisPubSubChannelLayer(hosts=hosts)
+
+        async def pubsub_shards():
+            layer = pubsub_layer._get_layer()
+            return [layer._shards.index(layer._get_shard(group)) for group in GROUPS[:100]]
+
+        expected = [ring.get(group) for group in GROUPS[:100]]
+        assert [list_layer.consistent_hash(group) for group in GROUPS[:100]] == expected
+        assert async_to_sync(pubsub_shards)() == expected
+
+    def test_shard_names_leave_credentials_out(self):
+        assert shard_name({"address": "redis://:secret@a:6380/2"}) == "a:6380/2"
+        assert shard_name({"address": "rediss://user:secret@a"}) == "a:6379"
+        assert shard_name({"address": "redis://:rotated@a:6379/0"}) == shard_name({"host": "a", "port": 6379})
+        assert shard_name({"address": "unix:///run/redis.sock?db=1"}) == "unix:/run/redis.sock/1"
+
+    # --- Bad request test cases ---
+    def test_unreachable_shard_is_reported(self):
+        report = async_to_sync(probe_shards)(["redis://:secret@127.0.0.1:1"], samples=1, timeout=1)
+
+        assert report[0]["shard"] == "127.0.0.1:1"
+        assert "secret" not in str(report)
+        assert report[0]["ok"] is False
+        assert report[0]["ring_share"] == 1
+        assert report[0]["error"]
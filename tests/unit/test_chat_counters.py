@@ -0,0 +1,80 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from users.models import Chat, Participant
+from websocket.counters import NotAParticipant, forget_message, mark_read, reconcile_counters, record_message
+from websocket.models import Message
+
+
+class TestChatCounters:
+    @pytest.fixture(autouse=True)
+    def setup(self, db, users):
+        self.user, _ = users
+        self.sender, self.reader = self.user[0], self.user[3]
+        self.chat = Chat.objects.create(name="Counters chat", is_group=True)
+        Participant.objects.create(chat=self.chat, user=self.sender)
+        Participant.objects.create(chat=self.chat, user=self.reader)
+
+    def _counters(self, user):
+        participant = Participant.objects.get(chat=self.chat, user=user)
+        return participant.sent_count, participant.unread_count
+
+    # --- Successful test cases ---
+    def test_message_updates_counters_in_one_statement(self, django_assert_num_queries):
+        record_message(self.chat.id, self.sender.id, {"text": "first"})
+        # Transaction, message insert and counters update, whatever the size of the history
+        with django_assert_num_queries(4):
+            _, counters = record_message(self.chat.id, self.sender.id, {"text": "second"})
+
+        assert counters[self.sender.id] == {"sent_count": 2, "unread_count": 0}
+        assert counters[self.reader.id] == {"sent_count": 0, "unread_count": 2}
+        assert self._counters(self.reader) == (0, 2)
+
+    def test_mark_read_resets_unread_counter(self):
+        record_message(self.chat.id, self.sender.id, {"text": "first"})
+
+        assert mark_read(self.chat.id, self.reader.id) == 1
+        assert self._counters(self.reader) == (0, 0)
+        assert self._counters(self.sender) == (1, 0)
+
+    def test_deleted_message_is_taken_out_of_counters(self):
+        message, _ = record_message(self.chat.id, self.sender.id, {"text": "first"})
+
+        forget_message(message)
+
+        assert self._counters(self.sender) == (0, 0)
+        assert self._counters(self.reader) == (0, 0)
+
+    def test_reconcile_corrects_drifted_counters(self):
+        record_message(self.chat.id, self.sender.id, {"text": "counted"})
+        Message.objects.create(chat=self.chat, sender=self.sender, content={"text": "not counted"})
+
+        assert reconcile_counters([self.chat.id]) == 2
+        assert self._counters(self.sender) == (2, 0)
+        assert self._counters(self.reader) == (0, 2)
+
+        out = StringIO()
+        call_command("reconcile_chat_counters", chat_ids=[self.chat.id], stdout=out)
+        assert "0 participant counters corrected" in out.getvalue()
+
+    def test_chat_list_exposes_counters_of_requesting_user(self, auth_base_client):
+        record_message(self.chat.id, self.sender.id, {"text": "first"})
+
+        response = auth_base_client.get("/api/users/chat/list/")
+
+        assert response.status_code == 200
+        chat = next(chat for chat in response.json() if chat["name"] == "Counters chat")
+        assert chat["unread_count"] == 1
+        assert chat["sent_count"] == 0
+
+    # --- Bad request test cases ---
+    def test_message_from_removed_participant_is_rejected(self):
+        Participant.objects.filter(chat=self.chat, user=self.sender).delete()
+
+        with pytest.raises(NotAParticipant):
+            record_message(self.chat.id, self.sender.id, {"text": "too late"})
+
+        assert not Message.objects.filter(chat=self.chat).exists()
+        assert self._counters(self.reader) == (0, 0)
@@ -0,0 +1,51 @@
+import pytest
+
+from users.models import Chat, Participant
+from websocket.counters import record_message
+from websocket.models import Message, Notification
+from websocket.queries import delete_message, delete_notifications, update_message
+
+
+class TestConsumerQueries:
+    @pytest.fixture(autouse=True)
+    def setup(self, db, users):
+        self.user, _ = users
+        self.sender, self.reader = self.user[0], self.user[3]
+        self.chat = Chat.objects.create(name="Queries chat", is_group=True)
+        Participant.objects.create(chat=self.chat, user=self.sender)
+        Participant.objects.create(chat=self.chat, user=self.reader)
+        self.message, _ = record_message(self.chat.id, self.sender.id, {"text": "first"})
+
+    # --- Successful test cases ---
+    def test_update_returns_the_row_from_the_same_statement(self, django_assert_num_queries):
+        with django_assert_num_queries(1) as queries:
+            message = update_message(self.message.id, self.chat.id, self.sender.id, {"text": "edited"})
+
+        assert "RETURNING" in queries.captured_queries[0]["sql"]
+        assert message.id == self.message.id
+        assert message.content == {"text": "edited"}
+        assert message.updated_at is not None
+        assert message.created_at == self.message.created_at
+        assert Message.objects.get(id=self.message.id).content == {"text": "edited"}
+
+    def test_delete_takes_the_message_out_of_the_counters(self):
+        assert delete_message(self.message.id, self.sender.id).content == {"text": "first"}
+
+        assert not Message.objects.filter(id=self.message.id).exists()
+        assert Participant.objects.get(chat=self.chat, user=self.reader).unread_count == 0
+
+    def test_notifications_are_deleted_in_one_statement(self, django_assert_num_queries):
+        own = Notification.objects.create(user=self.reader, content={"content": "own"})
+        other = Notification.objects.create(user=self.sender, content={"content": "other"})
+
+        with django_assert_num_queries(1):
+            deleted = delete_notifications([own.id, other.id], self.reader.id)
+
+        assert deleted == 1
+        assert list(Notification.objects.filter(id__in=[own.id, other.id])) == [other]
+
+    # --- Bad request test cases ---
+    def test_message_of_another_sender_is_left_unchanged(self):
+        assert update_message(self.message.id, self.chat.id, self.reader.id, {"text": "edited"}) is None
+        assert delete_message(self.message.id, self.reader.id) is None
+        assert Message.objects.get(id=self.message.id).content == {"text": "first"}
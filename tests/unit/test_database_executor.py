@@ -0,0 +1,46 @@
+import asyncio
+import threading
+
+import pytest
+from asgiref.sync import async_to_sync
+
+from websocket.executors import DatabaseExecutor, DatabaseTimeout
+
+
+class TestDatabaseExecutor:
+    # --- Successful test cases ---
+    def test_calls_run_concurrently(self):
+        executor = DatabaseExecutor(max_workers=3, timeout=5)
+        # Every call waits for the two others, a serialized executor would never get past it
+        barrier = threading.Barrier(3, timeout=2)
+
+        async def scenario():
+            return await asyncio.gather(*(executor.run(barrier.wait) for _ in range(3)))
+
+        assert sorted(async_to_sync(scenario)()) == [0, 1, 2]
+        assert executor.stats()["completed"] == 3
+        assert executor.stats()["running"] == executor.stats()["queued"] == 0
+
+    # --- Bad request test cases ---
+    def test_queued_call_times_out_and_is_dropped(self):
+        executor = DatabaseExecutor(max_workers=1, timeout=0.1)
+        release = threading.Event()
+        calls = []
+
+        async def scenario():
+            blocking = asyncio.create_task(executor.run(release.wait, 5, timeout=5))
+            await asyncio.sleep(0.05)
+            with pytest.raises(DatabaseTimeout):
+                await executor.run(calls.append, "late")
+            release.set()
+            await blocking
+            await executor.run(calls.append, "next")
+
+        async_to_sync(scenario)()
+
+        assert calls == ["next"]
+        stats = executor.stats()
+        assert stats["timed_out"] == 1
+        assert stats["max_queued"] == 1
+        assert stats["queued"] == 0
+        assert stats["completed"] == 2
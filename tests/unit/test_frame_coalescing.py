@@ -0,0 +1,146 @@
+import asyncio
+import json
+
+import msgpack
+from asgiref.sync import async_to_sync
+
+from websocket.codecs import JSONCodec, MessagePackCodec
+from websocket.coalescing import FrameCoalescer
+
+
+class TestFrameCoalescer:
+    def _coalescer(self, codec=JSONCodec, window=0.01, max_events=100, high_water=1000, send_done=None):
+        """
+        Returns a coalescer whose sends complete once `send_done` is set, right away without it.
+        """
+        self.sent = []
+
+        async def send_frame(frame):
+            self.sent.append(frame)
+            if send_done is not None:
+                await send_done.wait()
+
+        return FrameCoalescer(send_frame, codec, window=window, max_events=max_events, high_water=high_water)
+
+    @staticmethod
+    def _frame(sequence):
+        return JSONCodec.encode({"type": "send_message", "sequence": sequence})
+
+    # --- Successful test cases ---
+    def test_frames_within_the_window_are_sent_as_one_batch(self):
+        coalescer = self._coalescer()
+
+        async def scenario():
+            for sequence in range(3):
+                await coalescer.add(JSONCodec.encode({"type": "send_message", "sequence": sequence}))
+            assert self.sent == []
+            await asyncio.sleep(0.05)
+
+        async_to_sync(scenario)()
+
+        assert len(self.sent) == 1
+        batch = json.loads(self.sent[0])
+        assert batch["type"] == "batch"
+        assert [event["sequence"] for event in batch["events"]] == [0, 1, 2]
+
+    def test_lone_frame_is_sent_unchanged(self):
+        coalescer = self._coalescer()
+        frame = JSONCodec.encode({"type": "send_message", "sequence": 0})
+
+        async def scenario():
+            await coalescer.add(frame)
+            await asyncio.sleep(0.05)
+
+        async_to_sync(scenario)()
+
+        assert self.sent == [frame]
+
+    def test_full_buffer_is_flushed_without_waiting(self):
+        coalescer = self._coalescer(codec=MessagePackCodec, window=10, max_events=2)
+
+        async def scenario():
+            for sequence in range(2):
+                await coalescer.add(MessagePackCodec.encode({"type": "send_message", "sequence": sequence}))
+            coalescer.close()
+
+        async_to_sync(scenario)()
+
+        assert len(self.sent) == 1
+        batch = msgpack.unpackb(self.sent[0])
+        assert [event["sequence"] for event in batch["events"]] == [0, 1]
+
+    def test_frames_wait_for_the_send_in_flight(self):
+        async def scenario():
+            send_done = asyncio.Event()
+            coalescer = self._coalescer(max_events=2, send_done=send_done)
+            await coalescer.add(self._frame(0))
+            slow_send = asyncio.create_task(coalescer.add(self._frame(1)))  # Flushes the full buffer
+            await asyncio.sleep(0.01)
+
+            for sequence in range(2, 6):
+                await coalescer.add(self._frame(sequence))
+            sent_while_blocked = len(self.sent)
+
+            send_done.set()
+            await slow_send
+            return sent_while_blocked
+
+        sent_while_blocked = async_to_sync(scenario)()
+
+        assert sent_while_blocked == 1
+        assert len(self.sent) == 2
+        assert [event["sequence"] for event in json.loads(self.sent[1])["events"]] == [2, 3, 4, 5]
+
+    def test_explicit_flush_waits_for_the_send_in_flight(self):
+        async def scenario():
+            send_done = asyncio.Event()
+            coalescer = self._coalescer(window=0, send_done=send_done)
+            await coalescer.add(self._frame(0))
+            await asyncio.sleep(0.01)  # The window is over, its send is in flight
+            await coalescer.add(self._frame(1))
+
+            flush = asyncio.create_task(coalescer.flush())
+            await asyncio.sleep(0.01)
+            flushed_early = flush.done()
+            send_done.set()
+            await flush
+            return flushed_early
+
+        assert not async_to_sync(scenario)()
+        assert [json.loads(frame)["sequence"] for frame in self.sent] == [0, 1]
+
+    # --- Bad request test cases ---
+    def test_closed_connection_drops_pending_frames(self):
+        coalescer = self._coalescer()
+
+        async def scenario():
+            await coalescer.add(JSONCodec.encode({"type": "send_message"}))
+            coalescer.close()
+            await asyncio.sleep(0.05)
+
+        async_to_sync(scenario)()
+
+        assert self.sent == []
+        assert len(coalescer) == 0
+
+    def test_slow_client_drops_oldest_frames_past_high_water_mark(self):
+        async def scenario():
+            send_done = asyncio.Event()
+            coalescer = self._coalescer(window=0, high_water=3, send_done=send_done)
+            await coalescer.add(self._frame(0))
+            await asyncio.sleep(0.01)  # The window is over, its send is in flight
+
+            for sequence in range(1, 11):
+                await coalescer.add(self._frame(sequence))
+            pending = len(coalescer)
+
+            send_done.set()
+            await coalescer.flush()
+            return pending, coalescer.dropped
+
+        pending, dropped = async_to_sync(scenario)()
+
+        assert (pending, dropped) == (3, 7)
+        events = json.loads(self.sent[1])["events"]
+        assert events[0] == {"type": "events_dropped", "count": 7}
+        assert [event["sequence"] for event in events[1:]] == [8, 9, 10]
@@ -0,0 +1,49 @@
+import pytest
+from django.utils.timezone import now
+
+from users.models import Chat
+from websocket.models import Message
+from websocket.paginations import HistoryCursorPagination, InvalidCursor
+
+
+class TestHistoryCursorPagination:
+    @pytest.fixture(autouse=True)
+    def setup(self, db, users):
+        self.user, _ = users
+        self.chat = Chat.objects.create(name="Pagination chat")
+        self.messages = [
+            Message.objects.create(chat=self.chat, sender=self.user[0], content={"text": f"message {number}"})
+            for number in range(5)
+        ]
+        self.queryset = Message.objects.filter(chat=self.chat)
+        self.paginator = HistoryCursorPagination(page_size=2)
+
+    def _walk(self):
+        pages, cursor = [], None
+        while True:
+            items, cursor = self.paginator.paginate(self.queryset, cursor=cursor)
+            pages.append([item.id for item in items])
+            if cursor is None:
+                return pages
+
+    # --- Successful test cases ---
+    def test_pages_follow_the_cursor_newest_first(self):
+        ids = [message.id for message in reversed(self.messages)]
+
+        assert self._walk() == [ids[0:2], ids[2:4], ids[4:5]]
+
+    def test_equal_timestamps_are_ordered_by_id(self):
+        self.queryset.update(created_at=now())
+        ids = sorted((message.id for message in self.messages), reverse=True)
+
+        assert self._walk() == [ids[0:2], ids[2:4], ids[4:5]]
+
+    def test_last_item_id_of_older_clients_is_accepted(self):
+        items, _ = self.paginator.paginate(self.queryset, last_item_id=self.messages[2].id)
+
+        assert [item.id for item in items] == [self.messages[1].id, self.messages[0].id]
+
+    # --- Bad request test cases ---
+    def test_invalid_cursor_is_rejected(self):
+        with pytest.raises(InvalidCursor):
+            self.paginator.paginate(self.queryset, cursor="not-a-cursor")
@@ -0,0 +1,49 @@
+import pytest
+from django.contrib.auth import authenticate
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from core.hashers import PasswordHashingPool
+from users.models import CustomUser
+from users.serializers import LoginSerializer
+
+
+class TestLoginPipeline:
+    @pytest.fixture(autouse=True)
+    def setup(self, db, users):
+        self.user, self.credentials = users
+
+    # --- Successful test cases ---
+    def test_login_writes_only_last_login(self):
+        serializer = LoginSerializer(
+            data={"username": self.credentials[0]["username"], "password": "testpassword", "user_agent": "TestAgent"}
+        )
+
+        with CaptureQueriesContext(connection) as queries:
+            assert serializer.is_valid()
+
+        updates = [query["sql"] for query in queries if query["sql"].startswith("UPDATE")]
+        assert len(updates) == 1
+        assert 'SET "last_login"' in updates[0] and '"password"' not in updates[0]
+
+    # --- Bad request test cases ---
+    def test_wrong_password_is_rejected(self):
+        assert authenticate(username=self.credentials[0]["username"], password="wrongpassword") is None
+        assert authenticate(username="missinguser", password="testpassword") is None
+
+
+# The rehash runs on its own connection in the pool, so the user has to be committed
+@pytest.mark.django_db(transaction=True)
+class TestBackgroundRehash:
+    def test_outdated_work_factor_is_rehashed_after_login(self, settings):
+        settings.PASSWORD_BCRYPT_ROUNDS = 4
+        user = CustomUser.objects.create_user(id=130, username="rehashuser", password="testpassword")
+        assert "$04$" in user.password
+
+        settings.PASSWORD_BCRYPT_ROUNDS = 5
+        assert authenticate(username="rehashuser", password="testpassword").id == user.id
+        PasswordHashingPool.drain(timeout=10)
+
+        user.refresh_from_db()
+        assert "$05$" in user.password
+        assert user.check_password("testpassword")
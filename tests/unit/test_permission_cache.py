@@ -0,0 +1,77 @@
+from types import SimpleNamespace
+
+import pytest
+from django.core.cache import cache
+
+from core.permission_cache import PermissionCache
+from core.permissions import IsChatParticipant, IsTeamMemberOrAdmin
+from users.models import Chat, Participant, Team
+
+LOCMEM_CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+class TestPermissionCache:
+    @pytest.fixture(autouse=True)
+    def setup(self, db, users, settings):
+        settings.CACHES = LOCMEM_CACHES
+        self.user, _ = users
+        self.chat = Chat.objects.create(name="Permission chat")
+        self.participant = Participant.objects.create(chat=self.chat, user=self.user[3])
+        cache.clear()
+        PermissionCache.reset_stats()
+        yield
+        cache.clear()
+        PermissionCache.reset_stats()
+
+    @staticmethod
+    def _check(permission, user, pk=None):
+        request = SimpleNamespace(user=user, META={})
+        view = SimpleNamespace(kwargs={"pk": pk} if pk is not None else {})
+        return permission.has_permission(request, view)
+
+    # --- Successful test cases ---
+    def test_decision_is_served_from_cache(self, django_assert_num_queries):
+        with django_assert_num_queries(1):
+            assert self._check(IsChatParticipant(), self.user[3], str(self.chat.id)) is True
+
+        with django_assert_num_queries(0):
+            assert self._check(IsChatParticipant(), self.user[3], str(self.chat.id)) is True
+
+        assert PermissionCache.stats()["IsChatParticipant"] == {"hits": 1, "misses": 1, "hit_ratio": 0.5}
+
+    def test_opted_out_class_queries_every_time(self, django_assert_num_queries):
+        permission = IsChatParticipant()
+        permission.cache_decision = False
+
+        with django_assert_num_queries(2):
+            self._check(permission, self.user[3], str(self.chat.id))
+            self._check(permission, self.user[3], str(self.chat.id))
+
+        assert PermissionCache.stats() == {}
+
+    # --- Invalidation test cases ---
+    def test_removed_participant_loses_access(self):
+        assert self._check(IsChatParticipant(), self.user[3], str(self.chat.id)) is True
+
+        self.participant.delete()
+
+        assert self._check(IsChatParticipant(), self.user[3], str(self.chat.id)) is False
+
+    def test_added_team_member_gains_access(self):
+        team = Team.objects.create(leader=self.user[2])
+        assert self._check(IsTeamMemberOrAdmin(), self.user[3]) is False
+
+        team.list_of_members.add(self.user[3])
+
+        assert self._check(IsTeamMemberOrAdmin(), self.user[3]) is True
+
+    def test_replaced_team_leader_loses_access(self):
+        team = Team.objects.create(leader=self.user[2])
+        assert self._check(IsTeamMemberOrAdmin(), self.user[2]) is True
+        assert self._check(IsTeamMemberOrAdmin(), self.user[3]) is False
+
+        team.leader = self.user[3]
+        team.save()
+
+        assert self._check(IsTeamMemberOrAdmin(), self.user[2]) is False
+        assert self._check(IsTeamMemberOrAdmin(), self.user[3]) is True
@@ -0,0 +1,109 @@
+import time
+
+import pytest
+from asgiref.sync import async_to_sync
+
+from tests.fake_redis import FakeAsyncRedis, FakeRedisServer
+from websocket.presence import InMemoryPresenceStore, RedisPresenceStore
+
+GROUP = "chat_1"
+TTL = 0.2
+
+
+@pytest.fixture(params=["redis", "memory"])
+def store(request):
+    if request.param == "redis":
+        store = RedisPresenceStore("redis://fake:6379/2", ttl=TTL)
+        store.redis = FakeAsyncRedis(FakeRedisServer())
+        return store
+    return InMemoryPresenceStore(ttl=TTL)
+
+
+class TestPresenceStore:
+    # --- Successful test cases ---
+    def test_user_is_online_while_any_connection_is(self, store):
+        async def scenario():
+            joins = [await store.join(GROUP, 1, "tab"), await store.join(GROUP, 1, "phone")]
+            leaves = [await store.leave(GROUP, 1, "tab")]
+            online = await store.online(GROUP)
+            leaves.append(await store.leave(GROUP, 1, "phone"))
+            return joins, leaves, online, await store.online(GROUP)
+
+        joins, leaves, online, online_after = async_to_sync(scenario)()
+
+        assert joins == [True, False]
+        assert leaves == [False, True]
+        assert online == {1}
+        assert online_after == set()
+
+    def test_join_reports_first_connection_of_user(self, store):
+        async def scenario():
+            return (
+                await store.join(GROUP, 1, "channel-a"),
+                await store.join(GROUP, 1, "channel-b"),
+                await store.join(GROUP, 2, "channel-c"),
+                await store.online(GROUP),
+            )
+
+        first, second_device, other_user, online = async_to_sync(scenario)()
+
+        assert (first, second_device, other_user) == (True, False, True)
+        assert online == {1, 2}
+
+    def test_heartbeat_keeps_connection_alive(self, store):
+        async def scenario():
+            await store.join(GROUP, 1, "channel-a")
+            for _ in range(3):
+                time.sleep(TTL / 2)
+                await store.heartbeat(GROUP, 1, "channel-a")
+            return await store.online(GROUP)
+
+        assert async_to_sync(scenario)() == {1}
+
+    def test_heartbeat_reports_users_whose_connections_expired(self, store):
+        async def scenario():
+            await store.join(GROUP, 2, "channel-b")
+            await store.join(GROUP, 3, "channel-c")
+            time.sleep(TTL * 0.6)
+            await store.join(GROUP, 1, "channel-a")
+            await store.join(GROUP, 3, "channel-d")
+            time.sleep(TTL * 0.6)  # User 2 and the first device of user 3 stopped sending heartbeats
+            online_before = await store.online(GROUP)
+
+            left = await store.heartbeat(GROUP, 1, "channel-a")
+            left_again = await store.heartbeat(GROUP, 1, "channel-a")
+            return online_before, left, left_again, await store.online(GROUP)
+
+        online_before, left, left_again, online = async_to_sync(scenario)()
+
+        assert online_before == {1, 3}  # Expired connections are left out before they are pruned
+        assert left == {2}
+        assert left_again == set()  # Pruned connections are reported once
+        assert online == {1, 3}
+
+    # --- Bad request test cases ---
+    def test_connection_without_heartbeat_expires(self, store):
+        async def scenario():
+            await store.join(GROUP, 1, "crashed")
+            await store.join(GROUP, 2, "alive")
+            time.sleep(TTL * 1.5)
+            await store.heartbeat(GROUP, 2, "alive")
+            return await store.online(GROUP)
+
+        assert async_to_sync(scenario)() == {2}
+
+    def test_join_after_expiry_counts_as_first(self, store):
+        async def scenario():
+            await store.join(GROUP, 1, "channel-a")
+            time.sleep(TTL * 1.5)
+            return await store.join(GROUP, 1, "channel-b")
+
+        assert async_to_sync(scenario)()
+
+    def test_leave_of_unknown_connection(self, store):
+        async def scenario():
+            await store.join(GROUP, 1, "channel-a")
+            return await store.leave(GROUP, 1, "channel-unknown"), await store.leave(GROUP, 2, "channel-b")
+
+        assert async_to_sync(scenario)() == (False, True)
+
@@ -0,0 +1,48 @@
+import pytest
+from django.core import mail
+
+from core.recipients import RecipientResolver, local_contacts
+from core.tasks import send_notification_emails
+
+
+class TestRecipientResolver:
+    @pytest.fixture(autouse=True)
+    def setup(self, db, users):
+        self.user, _ = users
+        self.user_ids = [user.id for user in self.user[:3]]
+        local_contacts.clear()
+        yield
+        local_contacts.clear()
+
+    # --- Successful test cases ---
+    def test_recipients_are_resolved_in_one_query_and_cached(self, django_assert_num_queries):
+        with django_assert_num_queries(1):
+            contacts = RecipientResolver.resolve(self.user_ids + self.user_ids)
+        with django_assert_num_queries(0):
+            cached = RecipientResolver.resolve(self.user_ids)
+
+        assert contacts == cached
+        assert {user_id: contact.email for user_id, contact in contacts.items()} == {
+            user.id: user.email for user in self.user[:3]
+        }
+
+    def test_edited_user_is_resolved_again(self, django_assert_num_queries):
+        RecipientResolver.resolve(self.user_ids)
+        self.user[0].email = "changed@example.com"
+        self.user[0].save()
+
+        with django_assert_num_queries(1):
+            contacts = RecipientResolver.resolve(self.user_ids)
+
+        assert contacts[self.user[0].id].email == "changed@example.com"
+
+    def test_pre_resolved_emails_skip_the_lookup(self, django_assert_num_queries):
+        with django_assert_num_queries(0):
+            send_notification_emails("Subject", "Message", emails=["first@example.com", "first@example.com", ""])
+
+        assert [email.to for email in mail.outbox] == [["first@example.com"]]
+
+    # --- Bad request test cases ---
+    def test_unknown_users_are_skipped(self):
+        assert RecipientResolver.resolve([999_999]) == {}
+        assert RecipientResolver.emails([999_999]) == []
@@ -0,0 +1,119 @@
+import pytest
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APIRequestFactory
+
+from core.authentication import CustomJWTAuthentication
+from core.middleware import TokenCacheMiddleware
+from core.token_cache import TokenCache
+from tests.fake_redis import FakeRedisServer, subscribed_cache, wait_for
+from users.models import CustomAuthToken, CustomUser
+from users.serializers import CreateTeamSerializer
+
+
+class TestStatelessJWTAuthentication:
+    @pytest.fixture(autouse=True)
+    def setup(self, db, users):
+        self.user, _ = users
+        self.factory = APIRequestFactory()
+        self.authentication = CustomJWTAuthentication()
+
+    def _request(self, key):
+        return self.factory.get("/", HTTP_AUTHORIZATION=f"Bearer {key}")
+
+    # --- Successful test cases ---
+    def test_verified_token_is_served_without_queries(self, django_assert_num_queries):
+        token = CustomAuthToken.objects.create(user=self.user[0], user_agent="TestAgent")
+        owner = CustomUser.objects.get(id=self.user[0].id)
+
+        with django_assert_num_queries(1):
+            user, auth = self.authentication.authenticate(self._request(token.key))
+
+        with django_assert_num_queries(0):
+            cached_user, cached_auth = self.authentication.authenticate(self._request(token.key))
+            assert cached_user.username == owner.username
+            assert cached_user.email == owner.email
+
+        assert user.id == cached_user.id == self.user[0].id
+        assert cached_user.is_staff is True and cached_user.is_admin is True
+        assert cached_auth.key == auth.key == token.key
+
+    def test_cache_key_is_built_from_key_hash(self):
+        token = CustomAuthToken.objects.create(user=self.user[0], user_agent="TestAgent")
+
+        assert TokenCache.cache_key(token.key) == f"token_{token.key_hash}"
+
+    def test_user_edit_invalidates_cached_record(self, django_assert_num_queries):
+        token = CustomAuthToken.objects.create(user=self.user[1], user_agent="TestAgent")
+        self.authentication.authenticate(self._request(token.key))
+
+        self.user[1].is_admin = True
+        self.user[1].save()
+
+        with django_assert_num_queries(1):
+            user, _ = self.authentication.authenticate(self._request(token.key))
+
+        assert user.is_admin is True
+
+    def test_team_bulk_update_invalidates_cached_records(self, django_assert_num_queries):
+        leader, member = self.user[0], self.user[1]
+        CustomUser.objects.filter(id=member.id).update(is_team_member=False)
+        token = CustomAuthToken.objects.create(user=member, user_agent="TestAgent")
+        user, _ = self.authentication.authenticate(self._request(token.key))
+        assert user.is_team_member is False
+
+        request = self.factory.post("/")
+        request.user = leader
+        serializer = CreateTeamSerializer(data={"list_of_members": [member.id]}, context={"request": request})
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+
+        with django_assert_num_queries(1):
+            user, _ = self.authentication.authenticate(self._request(token.key))
+
+        assert user.is_team_member is True
+
+    def test_middleware_pair_is_ignored_without_stateless_auth(self, settings):
+        settings.JWT_STATELESS_AUTH = False
+        token = CustomAuthToken.objects.create(user=self.user[0], user_agent="TestAgent")
+        request = self._request(token.key)
+        TokenCacheMiddleware(lambda request: None)(request)
+
+        assert not hasattr(request, "jwt_auth")
+
+        request.jwt_auth = (self.user[1], token)
+        user, _ = self.authentication.authenticate(request)
+
+        assert user.id == self.user[0].id
+
+    def test_user_edit_invalidates_records_cached_by_other_processes(self, monkeypatch):
+        server = FakeRedisServer()
+        editor, reader = subscribed_cache(server, "token_test"), subscribed_cache(server, "token_test")
+        token = CustomAuthToken.objects.create(user=self.user[1], user_agent="TestAgent")
+
+        monkeypatch.setattr(TokenCache, "backend", staticmethod(lambda: reader))
+        self.authentication.authenticate(self._request(token.key))  # Cached in the reader's L1
+        server.data.clear()  # Only the reader's L1 copy is left
+        assert TokenCache.get(token.key) is not None
+
+        monkeypatch.setattr(TokenCache, "backend", staticmethod(lambda: editor))
+        TokenCache.invalidate_user(self.user[1].id)
+
+        wait_for(lambda: reader.stats()["invalidations_received"] > 0)
+        monkeypatch.setattr(TokenCache, "backend", staticmethod(lambda: reader))
+        assert TokenCache.get(token.key) is None
+
+    # --- Bad request test cases ---
+    def test_deleted_token_is_rejected(self):
+        token = CustomAuthToken.objects.create(user=self.user[0], user_agent="TestAgent")
+        self.authentication.authenticate(self._request(token.key))
+
+        token.delete()
+
+        with pytest.raises(AuthenticationFailed):
+            self.authentication.authenticate(self._request(token.key))
+
+    def test_tampered_token_is_rejected_without_queries(self, django_assert_num_queries):
+        token = CustomAuthToken.objects.create(user=self.user[0], user_agent="TestAgent")
+
+        with django_assert_num_queries(0), pytest.raises(AuthenticationFailed):
+            self.authentication.authenticate(self._request(f"{token.key}x"))
@@ -0,0 +1,42 @@
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.utils.timezone import now
+
+from users.models import CustomAuthToken
+from users.utils import ExpiredTokensCleaner
+
+
+class TestExpiredTokensCleanup:
+    @pytest.fixture(autouse=True)
+    def setup(self, db, users):
+        self.user, _ = users
+        for index in range(5):
+            CustomAuthToken.objects.create(
+                user=self.user[index % 3], user_agent=f"ExpiredAgent{index}", expires_at=now() - timedelta(hours=1)
+            )
+        self.valid_token = CustomAuthToken.objects.create(user=self.user[0], user_agent="ValidAgent")
+
+    def test_cleanup_deletes_expired_tokens_in_batches(self):
+        stats = ExpiredTokensCleaner(batch_size=2, sleep=0, resume=False).run()
+
+        assert stats["deleted"] == 5
+        assert stats["batches"] == 3
+        assert stats["completed"] is True
+        assert list(CustomAuthToken.objects.values_list("pk", flat=True)) == [self.valid_token.pk]
+
+    def test_cleanup_stops_after_max_duration(self):
+        stats = ExpiredTokensCleaner(batch_size=2, sleep=0, max_duration=0.000001, resume=False).run()
+
+        assert stats["batches"] == 1
+        assert stats["deleted"] == 2
+        assert stats["completed"] is False
+
+    def test_cleanup_command_reports_stats(self):
+        out = StringIO()
+        call_command("cleanup_expired_tokens", batch_size=10, sleep=0, no_resume=True, stdout=out)
+
+        assert "5 expired tokens removed in 1 batches" in out.getvalue()
+        assert CustomAuthToken.objects.filter(expires_at__lte=now()).count() == 0
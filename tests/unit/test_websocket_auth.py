@@ -0,0 +1,65 @@
+import pytest
+from asgiref.sync import async_to_sync
+
+from users.models import CustomAuthToken, CustomUser
+from websocket.middlewares import WebSocketJWTAuthMiddleware
+
+
+# `database_sync_to_async` closes old connections, which needs a transactional test database
+@pytest.mark.django_db(transaction=True)
+class TestWebSocketJWTAuthMiddleware:
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        self.user = CustomUser.objects.create_user(id=110, username="wsuser", password="testpassword", is_staff=True)
+        self.middleware = WebSocketJWTAuthMiddleware(self._app)
+        self.scope = None
+
+    async def _app(self, scope, receive, send):
+        self.scope = scope
+
+    def _connect(self, query_string=b"", headers=None):
+        scope = {"type": "websocket", "query_string": query_string, "headers": headers or []}
+        async_to_sync(self.middleware)(scope, None, None)
+        return self.scope["user"]
+
+    # --- Successful test cases ---
+    def test_query_string_token_is_resolved_from_cache(self, django_assert_num_queries):
+        token = CustomAuthToken.objects.create(user=self.user, user_agent="TestAgent")
+        query_string = f"lang=en&token={token.key}&next=%2Fchat%2F".encode()
+
+        with django_assert_num_queries(1):
+            user = self._connect(query_string)
+
+        with django_assert_num_queries(0):
+            cached_user = self._connect(query_string)
+
+        assert user.id == cached_user.id == self.user.id
+        assert cached_user.is_authenticated and cached_user.is_staff
+
+    def test_authorization_header_is_accepted(self):
+        token = CustomAuthToken.objects.create(user=self.user, user_agent="TestAgent")
+
+        user = self._connect(headers=[(b"authorization", f"Bearer {token.key}".encode())])
+
+        assert user.id == self.user.id
+
+    # --- Bad request test cases ---
+    def test_missing_token_is_anonymous(self):
+        assert self._connect(b"token=").is_anonymous
+        assert self._connect(b"token").is_anonymous
+
+    def test_invalid_token_is_anonymous_without_queries(self, django_assert_num_queries):
+        token = CustomAuthToken.objects.create(user=self.user, user_agent="TestAgent")
+
+        with django_assert_num_queries(0):
+            user = self._connect(f"token={token.key}x".encode())
+
+        assert user.is_anonymous
+
+    def test_deleted_token_is_anonymous(self):
+        token = CustomAuthToken.objects.create(user=self.user, user_agent="TestAgent")
+        self._connect(f"token={token.key}".encode())
+
+        token.delete()
+
+        assert self._connect(f"token={token.key}".encode()).is_anonymous
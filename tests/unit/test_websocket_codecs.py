@@ -0,0 +1,63 @@
+import json
+
+import msgpack
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+
+from websocket.codecs import CODECS, DEFAULT_CODEC, broadcast, convert_frame, event_frame, negotiate
+
+
+class TestWireFormat:
+    payload = {"type": "send_message", "message": {"pk": 1, "content": {"text": "hi"}}}
+
+    # --- Successful test cases ---
+    def test_first_supported_subprotocol_is_negotiated(self):
+        assert negotiate(["unknown", "msgpack", "json"]).name == "msgpack"
+        assert negotiate(["json", "msgpack"]).name == "json"
+
+    def test_broadcast_carries_one_frame_encoded_once(self):
+        channel_layer = get_channel_layer()
+        channels = [async_to_sync(channel_layer.new_channel)() for _ in range(2)]
+        for channel_name in channels:
+            async_to_sync(channel_layer.group_add)("codecs_group", channel_name)
+
+        async_to_sync(broadcast)(channel_layer, "codecs_group", self.payload)
+
+        events = [async_to_sync(channel_layer.receive)(channel_name) for channel_name in channels]
+        assert events[0] == events[1]
+        assert set(events[0]) == {"type", "frames"}
+        assert set(events[0]["frames"]) == {"json"}
+        assert json.loads(events[0]["frames"]["json"]) == self.payload
+
+    def test_event_frame_converts_the_default_frame_for_other_codecs(self):
+        channel_layer = get_channel_layer()
+        channel_name = async_to_sync(channel_layer.new_channel)()
+        async_to_sync(channel_layer.group_add)("codecs_group", channel_name)
+        async_to_sync(broadcast)(channel_layer, "codecs_group", self.payload)
+        event = async_to_sync(channel_layer.receive)(channel_name)
+
+        assert event_frame(event, DEFAULT_CODEC) is event["frames"]["json"]
+        assert msgpack.unpackb(event_frame(event, CODECS["msgpack"])) == self.payload
+        assert msgpack.unpackb(event_frame(self.payload, CODECS["msgpack"])) == self.payload
+
+    def test_msgpack_subscribers_share_one_conversion(self):
+        channel_layer = get_channel_layer()
+        channels = [async_to_sync(channel_layer.new_channel)() for _ in range(5)]
+        for channel_name in channels:
+            async_to_sync(channel_layer.group_add)("codecs_group", channel_name)
+        convert_frame.cache_clear()
+
+        async_to_sync(broadcast)(channel_layer, "codecs_group", self.payload)
+        frames = [
+            event_frame(async_to_sync(channel_layer.receive)(channel_name), CODECS["msgpack"])
+            for channel_name in channels
+        ]
+
+        assert all(msgpack.unpackb(frame) == self.payload for frame in frames)
+        assert convert_frame.cache_info().misses == 1
+        assert convert_frame.cache_info().hits == len(channels) - 1
+
+    # --- Bad request test cases ---
+    def test_unsupported_subprotocols_fall_back_to_json(self):
+        assert negotiate(["graphql-ws"]) is DEFAULT_CODEC
+        assert negotiate(None) is DEFAULT_CODEC
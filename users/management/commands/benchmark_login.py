@@ -0,0 +1,60 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import bcrypt
+from django.conf import settings
+from django.contrib.auth.hashers import check_password
+from django.core.management.base import BaseCommand
+
+from core.hashers import ConfigurableBCryptSHA256PasswordHasher, PasswordHashingPool
+
+
+class Command(BaseCommand):
+    help = "Measures password checks of the login pipeline and reports logins/sec per core."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--logins", type=int, default=200, help="Number of password checks to run.")
+        parser.add_argument(
+            "--concurrency", type=int, default=None, help="Simulated concurrent login requests (default: 2x workers)."
+        )
+        parser.add_argument(
+            "--rounds", type=int, default=None, help="BCrypt work factor (default: PASSWORD_BCRYPT_ROUNDS)."
+        )
+        parser.add_argument(
+            "--inline", action="store_true", help="Check passwords in the request threads instead of the pool."
+        )
+
+    def handle(self, *args, **kwargs):
+        rounds = kwargs["rounds"] or settings.PASSWORD_BCRYPT_ROUNDS
+        workers = settings.PASSWORD_HASHING_WORKERS
+        concurrency = kwargs["concurrency"] or workers * 2
+        logins = kwargs["logins"]
+
+        raw_password = "Benchmark-password-1"
+        encoded = ConfigurableBCryptSHA256PasswordHasher().encode(raw_password, bcrypt.gensalt(rounds))
+
+        if kwargs["inline"]:
+            def login(_):
+                return check_password(raw_password, encoded)
+            cores = min(os.cpu_count() or 1, concurrency)
+        else:
+            def login(_):
+                return PasswordHashingPool.run(check_password, raw_password, encoded)
+            cores = min(os.cpu_count() or 1, workers)
+
+        started_at = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as requests:
+            results = list(requests.map(login, range(logins)))
+        duration = time.perf_counter() - started_at
+
+        if not all(results):
+            self.stderr.write("Password check failed.")
+            return
+
+        rate = logins / duration
+        self.stdout.write(
+            f"{logins} logins in {duration:.2f}s ({'inline' if kwargs['inline'] else f'pool of {workers}'}, "
+            f"{concurrency} concurrent, work factor {rounds}): {rate:.1f} logins/sec, "
+            f"{rate / cores:.1f} logins/sec per core."
+        )
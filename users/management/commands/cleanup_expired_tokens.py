@@ -1,13 +1,29 @@
 from django.core.management.base import BaseCommand
-from users.models import CustomAuthToken
-from django.utils.timezone import now
+
+from users.utils import ExpiredTokensCleaner
 
 
 class Command(BaseCommand):
-    help = "Deletes expired tokens."
+    help = "Deletes expired tokens in primary-key batches, resuming where the previous run stopped."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=None, help="Tokens deleted per batch.")
+        parser.add_argument("--sleep", type=float, default=None, help="Pause between batches in seconds.")
+        parser.add_argument(
+            "--max-duration", type=float, default=None, help="Stop after this many seconds and resume next run."
+        )
+        parser.add_argument("--no-resume", action="store_true", help="Start from the first token.")
 
     def handle(self, *args, **kwargs):
-        expired_tokens = CustomAuthToken.objects.filter(expires_at__lte=now())
-        count = expired_tokens.count()
-        expired_tokens.delete()
-        self.stdout.write(f"{count} expired tokens removed.")
+        cleaner = ExpiredTokensCleaner(
+            batch_size=kwargs["batch_size"],
+            sleep=kwargs["sleep"],
+            max_duration=kwargs["max_duration"],
+            resume=not kwargs["no_resume"],
+        )
+        stats = cleaner.run()
+        self.stdout.write(
+            f"{stats['deleted']} expired tokens removed in {stats['batches']} batches "
+            f"({stats['duration']}s, resumed from pk {stats['resumed_from']}, "
+            f"{'completed' if stats['completed'] else 'paused'})."
+        )
@@ -0,0 +1,32 @@
+import hashlib
+
+from django.db import migrations, models
+
+
+def populate_key_hash(apps, schema_editor):
+    CustomAuthToken = apps.get_model("users", "CustomAuthToken")
+    tokens = CustomAuthToken.objects.only("id", "key").iterator(chunk_size=1000)
+    batch = []
+    for token in tokens:
+        token.key_hash = hashlib.sha256(token.key.encode()).hexdigest()
+        batch.append(token)
+        if len(batch) == 1000:
+            CustomAuthToken.objects.bulk_update(batch, ["key_hash"])
+            batch = []
+    CustomAuthToken.objects.bulk_update(batch, ["key_hash"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0007_remove_customauthtoken_google_id_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="customauthtoken",
+            name="key_hash",
+            field=models.CharField(max_length=64, null=True),
+        ),
+        migrations.RunPython(populate_key_hash, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0008_customauthtoken_key_hash"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="customauthtoken",
+            name="key_hash",
+            field=models.CharField(max_length=64, unique=True),
+        ),
+        migrations.AlterField(
+            model_name="customauthtoken",
+            name="key",
+            field=models.CharField(max_length=512),
+        ),
+        migrations.AddIndex(
+            model_name="customauthtoken",
+            index=models.Index(fields=["user", "user_agent"], name="token_user_agent_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="customauthtoken",
+            index=models.Index(fields=["expires_at"], name="token_expires_at_idx"),
+        ),
+    ]
@@ -0,0 +1,29 @@
+from django.db import migrations
+from django.db.models import Count, Max
+
+
+def remove_duplicate_tokens(apps, schema_editor):
+    """
+    Keeps only the newest token of every (user, user_agent) pair.
+    """
+    CustomAuthToken = apps.get_model("users", "CustomAuthToken")
+    duplicates = (
+        CustomAuthToken.objects.values("user_id", "user_agent")
+        .annotate(newest_id=Max("id"), total=Count("id"))
+        .filter(total__gt=1)
+    )
+    for duplicate in duplicates.iterator():
+        CustomAuthToken.objects.filter(user_id=duplicate["user_id"], user_agent=duplicate["user_agent"]).exclude(
+            id=duplicate["newest_id"]
+        ).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0009_customauthtoken_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_tokens, migrations.RunPython.noop),
+    ]
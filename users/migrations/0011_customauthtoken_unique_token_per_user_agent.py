@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0010_remove_duplicate_tokens"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="customauthtoken",
+            name="token_user_agent_idx",
+        ),
+        migrations.AddConstraint(
+            model_name="customauthtoken",
+            constraint=models.UniqueConstraint(fields=("user", "user_agent"), name="unique_token_per_user_agent"),
+        ),
+    ]
@@ -0,0 +1,47 @@
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils.timezone import now
+
+
+def backfill_sent_counts(apps, schema_editor):
+    """
+    Counts the messages already sent by every participant; the existing history is treated as read.
+    """
+    Participant = apps.get_model("users", "Participant")
+    Message = apps.get_model("websocket", "Message")
+    sent = (
+        Message.objects.filter(chat_id=OuterRef("chat_id"), sender_id=OuterRef("user_id"))
+        .order_by()
+        .values("sender_id")
+        .annotate(total=Count("id"))
+        .values("total")
+    )
+    Participant.objects.update(sent_count=Coalesce(Subquery(sent), 0), unread_count=0, last_read_at=now())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0011_customauthtoken_unique_token_per_user_agent"),
+        ("websocket", "0004_history_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="participant",
+            name="sent_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="participant",
+            name="unread_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="participant",
+            name="last_read_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(backfill_sent_counts, migrations.RunPython.noop),
+    ]
@@ -1,8 +1,10 @@
+import hashlib
+import uuid
 from datetime import timedelta
 
 import jwt
 from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.db import connections, models
 from django.utils.timezone import now
 
 from core import settings
@@ -24,22 +26,97 @@ class CustomUser(AbstractUser):
         return f"user_id: {self.id} | username: {self.username},"
 
 
+class CustomAuthTokenQuerySet(models.QuerySet):
+    def for_key(self, key: str):
+        """
+        Filters by the indexed hash of the JWT instead of the JWT string itself.
+        """
+        return self.filter(key_hash=CustomAuthToken.hash_key(key))
+
+    def upsert_for_user_agent(self, user, user_agent: str):
+        """
+        Returns the live token of the user agent and whether a new key was issued, in one statement.
+
+        Runs `INSERT ... ON CONFLICT (user_id, user_agent) DO UPDATE`: a missing token is
+        inserted, an expired one is replaced with the freshly generated key, and a valid
+        one is kept as it is. Concurrent logins from the same user agent therefore always
+        end up with a single token row.
+        """
+        candidate = self.model(user=user, user_agent=user_agent)
+        candidate.key = candidate.generate_jwt()
+        candidate.key_hash = self.model.hash_key(candidate.key)
+        candidate.created_at = now()
+        candidate.expires_at = candidate.created_at + timedelta(days=7)
+
+        connection = connections[self.db]
+        qn = connection.ops.quote_name
+        table = qn(self.model._meta.db_table)
+        replaced_columns = ["key", "key_hash", "created_at", "expires_at"]
+        update_clause = ", ".join(
+            f"{qn(column)} = CASE WHEN {table}.{qn('expires_at')} <= %s "
+            f"THEN EXCLUDED.{qn(column)} ELSE {table}.{qn(column)} END"
+            for column in replaced_columns
+        )
+        sql = (
+            f"INSERT INTO {table} ({qn('user_id')}, {qn('user_agent')}, {qn('key')}, {qn('key_hash')}, "
+            f"{qn('created_at')}, {qn('expires_at')}) VALUES (%s, %s, %s, %s, %s, %s) "
+            f"ON CONFLICT ({qn('user_id')}, {qn('user_agent')}) DO UPDATE SET {update_clause} "
+            f"RETURNING {qn('id')}, {qn('key')}, {qn('key_hash')}, {qn('created_at')}, {qn('expires_at')}"
+        )
+        params = [
+            user.id,
+            user_agent,
+            candidate.key,
+            candidate.key_hash,
+            candidate.created_at,
+            candidate.expires_at,
+            *([candidate.created_at] * len(replaced_columns)),
+        ]
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            token_id, key, key_hash, created_at, expires_at = cursor.fetchone()
+
+        token = self.model.from_db(
+            self.db,
+            ["id", "user_id", "key", "key_hash", "user_agent", "created_at", "expires_at"],
+            [token_id, user.id, key, key_hash, user_agent, created_at, expires_at],
+        )
+        token.user = user
+        return token, key == candidate.key
+
+
 class CustomAuthToken(models.Model):
     """JWT"""
 
     user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name="user_auth_token")
-    key = models.CharField(max_length=512, unique=True)
+    key = models.CharField(max_length=512)
+    key_hash = models.CharField(max_length=64, unique=True)
     user_agent = models.CharField(max_length=255)
     created_at = models.DateTimeField(auto_now_add=True)
     expires_at = models.DateTimeField()
 
+    objects = CustomAuthTokenQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "user_agent"], name="unique_token_per_user_agent"),
+        ]
+        indexes = [
+            models.Index(fields=["expires_at"], name="token_expires_at_idx"),
+        ]
+
     def save(self, *args, **kwargs):
         if not self.key:
             self.key = self.generate_jwt()
         if not self.expires_at:
             self.expires_at = now() + timedelta(days=7)
+        self.key_hash = self.hash_key(self.key)
         return super().save(*args, **kwargs)
 
+    @staticmethod
+    def hash_key(key: str) -> str:
+        return hashlib.sha256(key.encode()).hexdigest()
+
     def generate_jwt(self):
         payload = {
             "user_id": self.user.id,
@@ -47,6 +124,7 @@ class CustomAuthToken(models.Model):
             "iat": now(),
             "exp": now() + timedelta(days=7),
             "user_agent": self.user_agent,
+            "jti": uuid.uuid4().hex,  # Keeps keys issued within the same second unique
         }
         return jwt.encode(payload, settings.SECRET_KEY, algorithm="HS256")
 
@@ -71,15 +149,32 @@ class Participant(models.Model):
     user = models.ForeignKey("users.CustomUser", on_delete=models.CASCADE, related_name="participants")
     role = models.CharField(max_length=11, default="user")
     joined_at = models.DateTimeField(auto_now_add=True)
+    # Maintained by `websocket.counters` in the transaction that writes the message
+    sent_count = models.PositiveIntegerField(default=0)
+    unread_count = models.PositiveIntegerField(default=0)
+    last_read_at = models.DateTimeField(null=True, blank=True)
 
     def __str__(self):
         return f"{self.user.username}"
 
 
+class ChatQuerySet(models.QuerySet):
+    def with_counters(self, user_id):
+        """
+        Filters the chats of the user and annotates them with the user's message counters.
+        """
+        return self.filter(participants__user_id=user_id).annotate(
+            unread_count=models.F("participants__unread_count"),
+            sent_count=models.F("participants__sent_count"),
+        )
+
+
 class Chat(models.Model):
     name = models.CharField(max_length=255)
     is_group = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = ChatQuerySet.as_manager()
+
     def __str__(self):
         return f"{self.name}"
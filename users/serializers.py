@@ -5,6 +5,7 @@ from django_celery_beat.utils import now
 from rest_framework import serializers
 from rest_framework.validators import UniqueValidator
 
+from core.token_cache import TokenCache
 from orders.models import Order
 from orders.serializers import OrderSerializer
 from orders.utils import change_date_format
@@ -142,7 +143,9 @@ class LoginSerializer(serializers.Serializer):
     This class is used to validate and serialize login credentials, ensuring that
     the required fields (username, password, and user_agent) are provided. It also
     authenticates the user using the provided credentials and attaches the user
-    object to the validated data if authentication is successful.
+    object to the validated data if authentication is successful. The password is
+    verified in the bounded `PasswordHashingPool` by `PooledModelBackend` and only
+    `last_login` is written back.
 
     Attributes:
         username: CharField that captures the username provided by the user.
@@ -168,7 +171,7 @@ class LoginSerializer(serializers.Serializer):
         if not user:
             raise serializers.ValidationError("Invalid username or password.")
         user.last_login = now()
-        user.save()
+        user.save(update_fields=["last_login"])
 
         data["user"] = user
         return data
@@ -380,6 +383,7 @@ class CreateTeamSerializer(serializers.ModelSerializer):
         team.list_of_members.set(members)
         team.list_of_members.add(leader)  # Add leader
         CustomUser.objects.filter(id__in=list_of_members).update(is_team_member=True)
+        TokenCache.invalidate_users(list_of_members)  # update() does not send post_save
 
         # Save and refresh team object
         team.save()
@@ -464,6 +468,7 @@ class UpdateTeamSerializer(TeamSerializer):
             instance.list_of_members.set(updated_members)
             CustomUser.objects.filter(id__in=members_to_add).update(is_team_member=True)
             CustomUser.objects.filter(id__in=members_to_remove).update(is_team_member=False)
+            TokenCache.invalidate_users(members_to_add | members_to_remove)  # update() does not send post_save
 
         instance.save()
 
@@ -489,6 +494,10 @@ class ChatSerializer(serializers.ModelSerializer):
         participants (serializers.SerializerMethodField): A custom field that
             serializes the participants of the chat into a list of dictionaries,
             including user IDs and usernames.
+        unread_count (serializers.IntegerField): Messages of the chat the requesting
+            user has not read yet, from `Chat.objects.with_counters`.
+        sent_count (serializers.IntegerField): Messages the requesting user sent to the
+            chat, from `Chat.objects.with_counters`.
 
     Methods:
         get_participants(obj):
@@ -508,10 +517,12 @@ class ChatSerializer(serializers.ModelSerializer):
     is_group = serializers.BooleanField(default=False)
     chat_id = serializers.IntegerField(required=False)
     participants = serializers.SerializerMethodField()
+    unread_count = serializers.IntegerField(read_only=True, default=0)
+    sent_count = serializers.IntegerField(read_only=True, default=0)
 
     class Meta:
         model = Chat
-        fields = ["name", "chat_id", "is_group", "participants"]
+        fields = ["name", "chat_id", "is_group", "participants", "unread_count", "sent_count"]
         read_only_fields = ["created_at"]
 
     def get_participants(self, obj):
@@ -0,0 +1,94 @@
+import logging
+
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from core.permission_cache import PermissionCache
+from core.recipients import RecipientResolver
+from core.token_cache import TokenCache
+from users.models import Chat, CustomAuthToken, CustomUser, Participant, Team
+from users.utils import TokenManager
+
+logger = logging.getLogger(__name__)
+
+
+@receiver(post_delete, sender=CustomAuthToken)
+def handle_token_revoke(sender, instance, **kwargs):
+    logger.debug(f"Revoking deleted token of user ID: {instance.user_id}")
+    TokenManager.revoke_token(instance.key, instance.expires_at)
+
+
+@receiver(post_save, sender=CustomUser)
+def handle_user_token_cache(sender, instance, created, update_fields=None, **kwargs):
+    if created or (update_fields and set(update_fields) <= {"last_login"}):
+        return
+
+    logger.debug(f"Invalidating cached tokens of user ID: {instance.id}")
+    TokenCache.invalidate_user(instance.id)
+
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def handle_user_contact_change(sender, instance, update_fields=None, **kwargs):
+    if update_fields and set(update_fields) <= {"last_login"}:
+        return
+
+    RecipientResolver.invalidate([instance.id])
+
+
+# --- Permission decisions ---
+TEAM_PERMISSIONS = ("IsTeamMemberOrAdmin",)
+CHAT_PERMISSIONS = ("IsChatParticipant", "IsChatAdmin")
+
+
+@receiver(m2m_changed, sender=Team.list_of_members.through)
+def handle_team_members_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "pre_clear"):
+        return
+
+    if reverse:
+        user_ids = [instance.id]  # Teams added to or removed from a user
+    elif action == "pre_clear":
+        user_ids = list(instance.list_of_members.values_list("id", flat=True))
+    else:
+        user_ids = pk_set
+    PermissionCache.invalidate(user_ids, TEAM_PERMISSIONS)
+
+
+@receiver(pre_save, sender=Team)
+def remember_team_leader(sender, instance, **kwargs):
+    # The previous leader may lose access with the change, `handle_team_change` invalidates them as well
+    instance._previous_leader_id = (
+        Team.objects.filter(pk=instance.pk).values_list("leader_id", flat=True).first() if instance.pk else None
+    )
+
+
+@receiver(post_save, sender=Team)
+@receiver(pre_delete, sender=Team)
+def handle_team_change(sender, instance, **kwargs):
+    user_ids = {instance.leader_id, *instance.list_of_members.values_list("id", flat=True)}
+    previous_leader_id = instance.__dict__.pop("_previous_leader_id", None)
+    if previous_leader_id is not None:
+        user_ids.add(previous_leader_id)
+    PermissionCache.invalidate(user_ids, TEAM_PERMISSIONS)
+
+
+@receiver(post_save, sender=Participant)
+@receiver(post_delete, sender=Participant)
+def handle_participant_change(sender, instance, **kwargs):
+    PermissionCache.invalidate([instance.user_id], CHAT_PERMISSIONS, object_id=instance.chat_id)
+
+
+@receiver(post_save, sender=Chat)
+def handle_chat_participants_change(sender, instance, created, **kwargs):
+    # Participants bulk-created by `UpdateChatSerializer` do not send signals, the chat is saved afterwards
+    if created:
+        return
+
+    user_ids = instance.participants.values_list("user_id", flat=True)
+    PermissionCache.invalidate(user_ids, CHAT_PERMISSIONS, object_id=instance.id)
+
+
+@receiver(post_delete, sender=CustomAuthToken)
+def handle_token_permissions(sender, instance, **kwargs):
+    PermissionCache.invalidate([instance.user_id], ("IsAccountOwner",), object_id=instance.user_id)
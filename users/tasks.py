@@ -37,7 +37,8 @@ def cleanup_expired_tokens():
     This function, designed as a Celery shared task, executes the
     "cleanup_expired_tokens" Django management command to delete expired tokens
     from the database. It is intended to automate token maintenance tasks
-    through periodic scheduling within a Celery-enabled environment.
+    through periodic scheduling within a Celery-enabled environment. A run is
+    capped by TOKEN_CLEANUP_MAX_DURATION and the next run resumes where it stopped.
 
     Raises:
     None
@@ -48,4 +49,4 @@ def cleanup_expired_tokens():
     Returns:
     None
     """
-    call_command("cleanup_expired_tokens")
+    call_command("cleanup_expired_tokens", max_duration=settings.TOKEN_CLEANUP_MAX_DURATION)
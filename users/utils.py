@@ -1,12 +1,20 @@
+import logging
+import time
 from difflib import SequenceMatcher
 
+import jwt
+from django.conf import settings
 from django.core.signing import Signer
 from django.core.cache import cache
+from django.db import connections
 from django.utils.timezone import now
 
+from core.token_cache import TokenCache, TokenRecord
 from users.models import CustomUser, CustomAuthToken
 from users.tasks import send_email
 
+logger = logging.getLogger(__name__)
+
 
 def send_activation_email(request, user: CustomUser) -> None:
     """
@@ -162,45 +170,170 @@ class TokenManager:
 
     Methods:
         - get_or_create_token: Retrieves or creates an authentication token for a
-          user with respect to the user agent.
-        - _cache_token: Caches the authentication token if it has a significant
-          remaining lifetime.
+          user with respect to the user agent in a single upsert statement.
+        - _cache_token: Caches a compact record of the token for its remaining lifetime.
         - remove_from_cache: Removes a specific token from the cache by its key.
         - cleanup_expired_tokens: Deletes all expired tokens from the database.
+        - authenticate_token: Verifies a JWT locally and resolves its token and user,
+          querying the database only when the key is not in the token cache.
+        - revoke_token / is_revoked: Maintain the shared revocation set that lets
+          other processes reject deleted tokens without a database lookup.
     """
     def get_or_create_token(self, user, user_agent):
-        token = CustomAuthToken.objects.filter(user=user, user_agent=user_agent).first()
-
-        if token and token.is_valid():
-            self._cache_token(token)
-            return token, False
-
-        if token:
-            token.delete()
-
-        new_token = CustomAuthToken.objects.create(user=user, user_agent=user_agent)
-        self._cache_token(new_token)
-        return new_token, True
+        """
+        Returns the live token of the user agent, issuing a new one in the same upsert
+        statement when it is missing or expired, and primes the token cache with it.
+        """
+        token, created = CustomAuthToken.objects.upsert_for_user_agent(user, user_agent)
+        self._cache_token(token)
+        return token, created
 
     @staticmethod
     def _cache_token(token):
         """
-        Add the token to the cache if the remaining lifetime is greater than 10 hours.
+        Add the token record to the cache for the rest of the token lifetime.
         """
-        remaining_time = (token.expires_at - now()).total_seconds()
-        if remaining_time > 36000:  # 10 hours
-            cache.set(f"token_{token.key}", token, timeout=remaining_time)
+        TokenCache.set(token.key, TokenRecord.from_token(token))
 
     @staticmethod
     def remove_from_cache(token_key):
         """
         Removes token from the cache
         """
-        cache.delete(f"token_{token_key}")
+        TokenCache.delete(token_key)
+
+    @classmethod
+    def authenticate_token(cls, token_key):
+        """
+        Resolves a token key into a (user, token) pair.
+
+        The signature and `exp` claim are checked in-process, revoked keys are rejected
+        through the shared revocation set, and cached token records are turned into the
+        user without any query. Only keys missing from the cache cost a single database
+        query. Raises `jwt.InvalidTokenError` for a bad or expired JWT and
+        `CustomAuthToken.DoesNotExist` for a revoked or unknown key.
+        """
+        jwt.decode(token_key, settings.SECRET_KEY, algorithms=["HS256"])
+
+        if cls.is_revoked(token_key):
+            cls.remove_from_cache(token_key)
+            raise CustomAuthToken.DoesNotExist
+
+        record = TokenCache.get(token_key)
+        if record is not None:
+            return record.build_user(), record.build_token(token_key)
+
+        token = CustomAuthToken.objects.select_related("user").for_key(token_key).get()
+        cls._cache_token(token)
+        return token.user, token
+
+    @staticmethod
+    def _revocation_key(token_key) -> str:
+        return f"revoked_token_{CustomAuthToken.hash_key(token_key)}"
+
+    @classmethod
+    def revoke_token(cls, token_key, expires_at) -> None:
+        """
+        Marks the token as revoked until it expires and drops it from the token cache.
+        """
+        cls.remove_from_cache(token_key)
+        if not settings.JWT_REVOCATION_CHECK:
+            return
+
+        remaining_time = (expires_at - now()).total_seconds()
+        if remaining_time > 0:
+            cache.set(cls._revocation_key(token_key), True, timeout=remaining_time)
+
+    @classmethod
+    def is_revoked(cls, token_key) -> bool:
+        if not settings.JWT_REVOCATION_CHECK:
+            return False
+        return bool(cache.get(cls._revocation_key(token_key)))
 
     @staticmethod
     def cleanup_expired_tokens():
         """
         Removes expired tokens from database
         """
-        CustomAuthToken.objects.filter(expires_at__lte=now()).delete()
+        return ExpiredTokensCleaner().run()
+
+
+class ExpiredTokensCleaner:
+    """
+    Deletes expired authentication tokens in small primary-key ranges.
+
+    Each batch selects the next expired tokens ordered by primary key, deletes that
+    primary-key range in its own short transaction and purges the matching `token_{key_hash}`
+    cache entries in bulk, optionally sleeping between batches to keep lock time and WAL
+    volume low. The last processed primary key is stored in the cache, so a run stopped
+    by `max_duration` (or a crash) resumes from there on the next scheduled run.
+
+    Attributes:
+        batch_size (int): Maximum number of tokens deleted per batch.
+        sleep (float): Pause between batches in seconds.
+        max_duration (float | None): Stop after this many seconds and resume next run.
+        resume (bool): Continue from the stored cursor instead of the first token.
+    """
+    CURSOR_CACHE_KEY = "cleanup_expired_tokens_cursor"
+    CURSOR_TIMEOUT = 60 * 60 * 24  # 24 hours
+
+    def __init__(self, batch_size=None, sleep=None, max_duration=None, resume=True):
+        self.batch_size = batch_size or settings.TOKEN_CLEANUP_BATCH_SIZE
+        self.sleep = settings.TOKEN_CLEANUP_SLEEP if sleep is None else sleep
+        self.max_duration = max_duration
+        self.resume = resume
+
+    def run(self) -> dict:
+        """
+        Runs the cleanup and returns the stats of this run.
+        """
+        started_at = time.monotonic()
+        cutoff = now()
+        cursor = cache.get(self.CURSOR_CACHE_KEY, 0) if self.resume else 0
+        stats = {"deleted": 0, "batches": 0, "resumed_from": cursor, "completed": False, "duration": 0.0}
+
+        while True:
+            batch = list(
+                CustomAuthToken.objects.filter(pk__gt=cursor, expires_at__lte=cutoff)
+                .order_by("pk")
+                .values_list("pk", "key")[: self.batch_size]
+            )
+            if not batch:
+                stats["completed"] = True
+                cache.delete(self.CURSOR_CACHE_KEY)
+                break
+
+            first_pk, last_pk = batch[0][0], batch[-1][0]
+            stats["deleted"] += self._delete_range(first_pk, last_pk, cutoff)
+            TokenCache.delete_many(key for _, key in batch)
+            stats["batches"] += 1
+
+            cursor = last_pk
+            cache.set(self.CURSOR_CACHE_KEY, cursor, timeout=self.CURSOR_TIMEOUT)
+
+            if self.max_duration and time.monotonic() - started_at >= self.max_duration:
+                break
+            if self.sleep:
+                time.sleep(self.sleep)
+
+        stats["duration"] = round(time.monotonic() - started_at, 3)
+        logger.info(f"Expired tokens cleanup: {stats}")
+        return stats
+
+    @staticmethod
+    def _delete_range(first_pk, last_pk, cutoff) -> int:
+        """
+        Deletes the expired tokens of the primary-key range in one statement.
+
+        The raw `DELETE` skips the per-row `post_delete` revocation, which expired tokens
+        do not need since their JWT `exp` is already in the past.
+        """
+        connection = connections[CustomAuthToken.objects.db]
+        qn = connection.ops.quote_name
+        sql = (
+            f"DELETE FROM {qn(CustomAuthToken._meta.db_table)} "
+            f"WHERE {qn('id')} BETWEEN %s AND %s AND {qn('expires_at')} <= %s"
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [first_pk, last_pk, cutoff])
+            return cursor.rowcount
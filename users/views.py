@@ -14,7 +14,6 @@ from orders.models import Order
 from users import serializers as user_serializers
 from users.mixins import UserLoggerMixin, TeamLoggerMixin
 from users.models import CustomAuthToken
-from users.models import Participant
 from users.models import Team, Chat, CustomUser
 from users.paginations import DashboardPagination
 from users.utils import send_activation_email, TokenManager
@@ -444,6 +443,9 @@ class ChatView(generics.RetrieveAPIView, GenericViewSet):
     permission_classes = [c_prm.IsChatParticipant]
     serializer_class = user_serializers.ChatSerializer
 
+    def get_queryset(self):
+        return Chat.objects.with_counters(self.request.user.id)
+
     def get(self, request, *args, **kwargs):
         try:
             response = super().get(request, *args, **kwargs)
@@ -481,10 +483,9 @@ class ChatListView(generics.ListAPIView, GenericViewSet):
     def get_queryset(self):
         headers = self.request.META.get("HTTP_AUTHORIZATION")
         token = headers.split("Bearer ")[1]
-        user_id = CustomAuthToken.objects.get(key=token).user_id
+        user_id = CustomAuthToken.objects.for_key(token).get().user_id
         # Filter chats by participants through the related name 'participants'
-        chat_ids = Participant.objects.filter(user_id=user_id).values_list("chat_id", flat=True)
-        return Chat.objects.filter(id__in=chat_ids)
+        return Chat.objects.with_counters(user_id)
 
 
 class GoogleLoginApi(APIView, TokenManager):
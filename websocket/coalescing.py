@@ -0,0 +1,100 @@
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class FrameCoalescer:
+    """
+    Buffers the outgoing frames of one connection and sends them as batched frames.
+
+    The first buffered frame opens a window of `window` seconds; everything that arrives
+    within it goes out as one `{"type": "batch", "events": [...]}` frame, joined from the
+    already encoded frames by the codec. A lone frame is sent as it is. Once `max_events`
+    frames are pending they are flushed right away.
+
+    A send that has not completed yet means the client (or the server's write buffer for
+    it) is not keeping up. Frames arriving meanwhile are not sent alongside it: the window
+    stretches until the send completes and they follow as one batch. At most `high_water`
+    frames are kept pending; past it the oldest ones are dropped and the next batch starts
+    with a `{"type": "events_dropped", "count": n}` frame, so the client knows to reload
+    the history instead of the server queueing without bound.
+
+    Attributes:
+        window (float): Seconds a frame may wait for others before the batch is sent.
+        max_events (int): Pending frames that trigger an immediate flush.
+        high_water (int): Pending frames kept while a send is in flight.
+        dropped (int): Frames dropped over the connection's lifetime.
+    """
+
+    def __init__(self, send_frame, codec, window: float, max_events: int, high_water: int):
+        self.window = window
+        self.max_events = max_events
+        self.high_water = high_water
+        self.dropped = 0
+        self._send_frame = send_frame
+        self._codec = codec
+        self._pending = []
+        self._unreported_drops = 0
+        self._flush_task = None
+        self._sending = asyncio.Lock()
+
+    def __len__(self):
+        return len(self._pending)
+
+    async def add(self, frame) -> None:
+        self._pending.append(frame)
+        if self._sending.locked():
+            # The frames follow the send in flight, `flush` keeps going until they are out
+            self._shed()
+        elif len(self._pending) >= self.max_events:
+            await self.flush()
+        elif self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def flush(self) -> None:
+        """
+        Sends the pending frames now, after the send in flight if there is one.
+        """
+        if self._flush_task is not None and self._flush_task is not asyncio.current_task():
+            self._flush_task.cancel()
+        self._flush_task = None
+
+        async with self._sending:
+            while self._pending:
+                frames, self._pending = self._pending, []
+                if self._unreported_drops:
+                    frames.insert(0, self._codec.encode({"type": "events_dropped", "count": self._unreported_drops}))
+                    self._unreported_drops = 0
+
+                if len(frames) == 1:
+                    await self._send_frame(frames[0])
+                else:
+                    await self._send_frame(self._codec.encode_batch(frames))
+
+    def close(self) -> None:
+        """
+        Drops the pending frames of a closed connection.
+        """
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+        self._flush_task = None
+        self._pending = []
+
+    def _shed(self) -> None:
+        excess = len(self._pending) - self.high_water
+        if excess <= 0:
+            return
+
+        if not self._unreported_drops:
+            logger.warning(f"Client is not keeping up, dropping its oldest events past {self.high_water}")
+        del self._pending[:excess]
+        self._unreported_drops += excess
+        self.dropped += excess
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.window)
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.warning(f"Failed to send coalesced frames: {e}")
@@ -0,0 +1,123 @@
+import json
+from functools import lru_cache
+
+import msgpack
+
+
+class JSONCodec:
+    """
+    Default wire format: compact JSON in text frames.
+
+    Attributes:
+        name (str): Key of the codec's frame in encoded group events.
+        subprotocol (str or None): `Sec-WebSocket-Protocol` value selecting the codec.
+        binary (bool): Whether frames are sent as binary instead of text.
+    """
+    name = "json"
+    subprotocol = "json"
+    binary = False
+
+    @staticmethod
+    def encode(payload) -> str:
+        return json.dumps(payload, separators=(",", ":"))
+
+    @staticmethod
+    def decode(data):
+        return json.loads(data)
+
+    @staticmethod
+    def encode_batch(frames) -> str:
+        """
+        Joins already encoded frames into one `{"type": "batch", "events": [...]}` frame.
+        """
+        return '{"type":"batch","events":[' + ",".join(frames) + "]}"
+
+
+class MessagePackCodec:
+    """
+    MessagePack in binary frames, smaller and cheaper to encode than JSON for large pages.
+    """
+    name = "msgpack"
+    subprotocol = "msgpack"
+    binary = True
+
+    @staticmethod
+    def encode(payload) -> bytes:
+        return msgpack.packb(payload)
+
+    @staticmethod
+    def decode(data):
+        return msgpack.unpackb(data)
+
+    @staticmethod
+    def encode_batch(frames) -> bytes:
+        packer = msgpack.Packer()
+        header = packer.pack_map_header(2) + packer.pack("type") + packer.pack("batch") + packer.pack("events")
+        return header + packer.pack_array_header(len(frames)) + b"".join(frames)
+
+
+DEFAULT_CODEC = JSONCodec()
+CODECS = {codec.subprotocol: codec for codec in (DEFAULT_CODEC, MessagePackCodec())}
+
+
+def negotiate(subprotocols) -> JSONCodec | MessagePackCodec:
+    """
+    Picks the codec of the first supported subprotocol offered by the client.
+
+    Clients opt in with `Sec-WebSocket-Protocol: msgpack`; clients that offer no
+    supported subprotocol keep getting JSON text frames.
+    """
+    for subprotocol in subprotocols or ():
+        if subprotocol in CODECS:
+            return CODECS[subprotocol]
+    return DEFAULT_CODEC
+
+
+def encode_event(payload: dict) -> dict:
+    """
+    Builds a channel layer event whose frame is encoded once for all subscribers.
+
+    The payload is encoded once, in the default (JSON) format, when it is published.
+    Consumers using that format send the frame as is, and connections that negotiated
+    another codec share one conversion per process (see `event_frame`), so a broadcast
+    costs one frame through the channel layer however many formats the group's clients use.
+
+    Args:
+        payload (dict): The message sent to the clients, its "type" names the consumer handler.
+
+    Returns:
+        dict: The event to pass to `group_send`.
+    """
+    return {"type": payload["type"], "frames": {DEFAULT_CODEC.name: DEFAULT_CODEC.encode(payload)}}
+
+
+def event_frame(event: dict, codec) -> str | bytes:
+    """
+    Returns the frame of a channel layer event in the codec's format.
+
+    Reuses the frame built by `encode_event` when it is in the codec's format and encodes
+    plain events from scratch. Other codecs convert the default frame once per process:
+    every subscriber of the group receives its own copy of the event, but all copies
+    carry the same frame, so the conversion is memoized on the frame itself.
+    """
+    frames = event.get("frames")
+    if not frames:
+        return codec.encode(event)
+    if codec.name in frames:
+        return frames[codec.name]
+    return convert_frame(frames[DEFAULT_CODEC.name], codec)
+
+
+@lru_cache(maxsize=64)
+def convert_frame(frame: str, codec) -> str | bytes:
+    """
+    Re-encodes a frame of the default codec in the codec's format.
+    """
+    return codec.encode(DEFAULT_CODEC.decode(frame))
+
+
+async def broadcast(channel_layer, group_name: str, payload: dict) -> None:
+    """
+    Sends the payload to every connection of the group, encoded once at publish time.
+    """
+    await channel_layer.group_send(group_name, encode_event(payload))
@@ -1,12 +1,18 @@
-import json
+import asyncio
 import logging
+import time
+from urllib.parse import parse_qs
 
-from asgiref.sync import sync_to_async
 from channels.generic.websocket import AsyncWebsocketConsumer
-from django.utils import timezone
-
-from core.tasks import send_email
-from users.models import CustomUser, Participant, CustomAuthToken, Chat
+from django.conf import settings
+
+from core.recipients import RecipientResolver
+from tasks.models import Task
+from users.models import CustomUser, Participant, Chat, Team
+from websocket.coalescing import FrameCoalescer
+from websocket.codecs import DEFAULT_CODEC, broadcast, event_frame, negotiate
+from websocket.counters import NotAParticipant, mark_read, record_message
+from websocket.executors import DatabaseTimeout, database_executor, db_sync_to_async
 from websocket.models import Comment, Notification, Message
 from websocket.serializers import (
     CommentSerializer,
@@ -15,11 +21,16 @@ from websocket.serializers import (
     UpdateCommentSerializer,
     UpdateMessageSerializer,
 )
+from websocket.paginations import InvalidCursor
+from websocket.presence import get_presence_store
+from websocket.queries import delete_comment, delete_message, delete_notifications, update_comment, update_message
+from websocket.routing import NotificationRouter
+from websocket.utils import aload_history_page, fan_out_notifications, user_group_name
 
 logger = logging.getLogger(__name__)
 
 
-@sync_to_async
+@db_sync_to_async
 def get_username(user_pk):
     """
     A function to asynchronously retrieve the username of a user based on their
@@ -27,7 +38,7 @@ def get_username(user_pk):
 
     This function is designed to fetch the username of a specific user by their
     primary key from the database and make the operation compatible with async
-    code through the sync_to_async decorator.
+    code by running it in the database executor.
 
     Arguments:
         user_pk (int): The primary key of the user whose username will be
@@ -39,21 +50,45 @@ def get_username(user_pk):
     return CustomUser.objects.get(id=user_pk).username
 
 
-@sync_to_async
-def get_recipients_emails(recipients_pk):
+@db_sync_to_async
+def get_chat_state(chat_id):
+    """
+    Retrieve the participants and the name of a chat in one go.
+
+    Arguments:
+        chat_id (int): The primary key of the chat.
+
+    Returns:
+        tuple[set[int], str | None]: The IDs of the chat participants and the chat
+        name, or None if the chat does not exist.
     """
-    Retrieve the email addresses of recipients based on their primary keys.
+    participant_ids = set(Participant.objects.filter(chat_id=chat_id).values_list("user_id", flat=True))
+    chat_name = Chat.objects.filter(id=chat_id).values_list("name", flat=True).first()
+    return participant_ids, chat_name
 
-    This function fetches the email addresses of users by retrieving them from the
-    database using their primary keys.
 
-    Parameters:
-        recipients_pk (list[int]): A list of primary keys identifying the recipients.
+@db_sync_to_async
+def get_task_member_ids(task_id):
+    """
+    Retrieve the users who may comment on a task: its executor and the leader and
+    members of its team.
+
+    Arguments:
+        task_id (int): The primary key of the task.
 
     Returns:
-        list[str]: A list of email addresses corresponding to the provided primary keys.
+        set[int]: The IDs of the task members, empty if the task does not exist.
     """
-    return [CustomUser.objects.get(id=recipient_pk).email for recipient_pk in recipients_pk]
+    task = Task.objects.filter(id=task_id).values("executor_id", "team_id", "team__leader_id").first()
+    if task is None:
+        return set()
+
+    team_members = Team.list_of_members.through.objects.filter(team_id=task["team_id"])
+    member_ids = set(team_members.values_list("customuser_id", flat=True))
+    member_ids.add(task["team__leader_id"])
+    if task["executor_id"] is not None:
+        member_ids.add(task["executor_id"])
+    return member_ids
 
 
 class BaseAsyncWebsocketConsumer(AsyncWebsocketConsumer):
@@ -66,8 +101,14 @@ class BaseAsyncWebsocketConsumer(AsyncWebsocketConsumer):
     to connected clients. It provides methods to handle connection establishment,
     disconnection, and synchronous interaction with external tasks or services.
 
+    Data that does not change between messages (the username and, in subclasses, chat or task
+    membership) is resolved once in `connect()` by `load_connection_state()` and kept on
+    the connection. Authenticated connections also join the user's group, where the
+    server pushes `refresh_user` events when that data changes.
+
     Attributes:
-        headers (dict): Stores headers retrieved from the WebSocket scope.
+        user (CustomUser or AnonymousUser): User authenticated by `WebSocketJWTAuthMiddleware`.
+        username (str or None): Username of the authenticated user.
         group_name (str or None): Unique identifier for the WebSocket group.
         instance (Any or None): Represents a model instance associated with the
             consumer.
@@ -76,38 +117,228 @@ class BaseAsyncWebsocketConsumer(AsyncWebsocketConsumer):
         pk (Any or None): Primary key extracted from the URL route.
         filter (str): Field name used for filtering data.
         batch_size (int): Number of data records to fetch or send per batch.
+        codec (JSONCodec or MessagePackCodec): Wire format negotiated through
+            `Sec-WebSocket-Protocol`, JSON text frames unless the client offers "msgpack".
+        coalesce_events (bool): Whether clients may opt in to batched group events with
+            the `coalesce=<milliseconds>` query parameter.
+        coalescer (FrameCoalescer or None): Buffer of the group events of a connection
+            that opted in to coalescing.
+        track_presence (bool): Whether authenticated connections are registered in the
+            presence store and publish join, leave and "typing" events to the group.
+        presence_events (bool): Whether the client opted in with `?presence=1` to get the
+            users online in the group on connect and the presence events afterwards.
+        heartbeat_task (asyncio.Task or None): Keeps the connection's presence entry alive.
+        typing_sent_at (float or None): When the connection last published a typing event.
     """
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.headers = {}
+        self.user = None
+        self.username = None
         self.group_name = None
         self.instance = None
         self.instance_serializer = None
         self.type = None
         self.pk = None
         self.filter = ""
-        self.batch_size = 50
+        self.batch_size = settings.WEBSOCKET_HISTORY_PAGE_SIZE
+        self.codec = DEFAULT_CODEC
+        self.coalesce_events = False
+        self.coalescer = None
+        self.track_presence = False
+        self.presence_events = False
+        self.heartbeat_task = None
+        self.typing_sent_at = None
 
     async def connect(self):
-        self.headers = self.scope.get("headers", [])
+        self.user = self.scope["user"]
         self.pk = self.scope["url_route"]["kwargs"]["pk"]
         self.group_name = f"{self.group_name}_{self.pk}"
 
-        await self.channel_layer.group_add(self.group_name, self.channel_name)
-        await self.accept()
+        await self.join_groups()
+        if self.user.is_authenticated:
+            await self.load_connection_state()
+        await self.accept(subprotocol=self.accept_codec())
+        self.coalescer = self.build_coalescer()
         await self.send_existing_content(self.pk)
+        if self.track_presence and self.user.is_authenticated:
+            await self.join_presence()
+
+    def accept_codec(self) -> str | None:
+        """
+        Selects the wire format from the subprotocols offered by the client and returns
+        the subprotocol to confirm in the handshake, if any.
+        """
+        offered = self.scope.get("subprotocols") or []
+        self.codec = negotiate(offered)
+        return self.codec.subprotocol if self.codec.subprotocol in offered else None
+
+    def build_coalescer(self) -> FrameCoalescer | None:
+        """
+        Returns the coalescer of a connection that opted in with `?coalesce=<milliseconds>`.
+
+        The window is capped by `WEBSOCKET_COALESCE_MAX_WINDOW`; clients that do not opt in
+        keep getting one frame per event.
+        """
+        if not self.coalesce_events:
+            return None
+
+        query_params = parse_qs(self.scope.get("query_string", b"").decode("utf-8"))
+        try:
+            window = int(query_params.get("coalesce", ["0"])[0])
+        except ValueError:
+            return None
+        if window <= 0:
+            return None
+
+        return FrameCoalescer(
+            self.send_frame,
+            self.codec,
+            window=min(window, settings.WEBSOCKET_COALESCE_MAX_WINDOW) / 1000,
+            max_events=settings.WEBSOCKET_COALESCE_MAX_EVENTS,
+            high_water=settings.WEBSOCKET_COALESCE_HIGH_WATER,
+        )
 
     async def disconnect(self, close_code):
-        await self.channel_layer.group_discard(self.group_name, self.channel_name)
+        if self.coalescer is not None:
+            self.coalescer.close()
+        await self.leave_presence()
+        await self.leave_groups()
         await self.close()
         logger.info("WebSocket disconnected")
 
-    async def send_existing_content(self, pk, last_item_id=None):
-        from core.tasks import send_chunked_data
+    async def join_groups(self):
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        if self.user.is_authenticated:
+            await self.channel_layer.group_add(user_group_name(self.user.id), self.channel_name)
+
+    async def leave_groups(self):
+        await self.channel_layer.group_discard(self.group_name, self.channel_name)
+        if self.user.is_authenticated:
+            await self.channel_layer.group_discard(user_group_name(self.user.id), self.channel_name)
+
+    async def load_connection_state(self):
+        """
+        Resolves the per-connection data of an authenticated user.
+        """
+        self.username = await get_username(self.user.id)
+
+    async def refresh_user(self, event):
+        await self.load_connection_state()
+
+    async def join_presence(self):
+        """
+        Registers the connection in the presence store, sends the users online in the group
+        to clients that opted in and tells the group when the user was not connected to it yet.
+
+        Presence is best effort: an unavailable store costs a warning, not the connection.
+        """
+        query_params = parse_qs(self.scope.get("query_string", b"").decode("utf-8"))
+        self.presence_events = query_params.get("presence", ["0"])[0] in ("1", "true")
+
+        store = get_presence_store()
+        try:
+            first = await store.join(self.group_name, self.user.id, self.channel_name)
+            online = await store.online(self.group_name)
+        except Exception as e:
+            logger.warning(f"Failed to register presence in {self.group_name}: {e}")
+            return
+
+        self.heartbeat_task = asyncio.create_task(self.send_heartbeats())
+        if self.presence_events:
+            await self.send_payload({"type": "presence_snapshot", "online": sorted(online)})
+        if first:
+            await self.broadcast_presence("join")
+
+    async def send_heartbeats(self):
+        store = get_presence_store()
+        while True:
+            await asyncio.sleep(settings.PRESENCE_HEARTBEAT_INTERVAL)
+            try:
+                left = await store.heartbeat(self.group_name, self.user.id, self.channel_name)
+            except Exception as e:
+                logger.warning(f"Failed to refresh presence in {self.group_name}: {e}")
+                continue
+            # Users whose connections expired without disconnecting, e.g. in a process that died
+            for user_id in left:
+                await self.broadcast_presence("leave", user_id=user_id)
+
+    async def leave_presence(self):
+        """
+        Removes the connection from the presence store and tells the group when it was the
+        user's last connection to it.
+        """
+        if self.heartbeat_task is None:
+            return
+
+        self.heartbeat_task.cancel()
+        self.heartbeat_task = None
+        try:
+            last = await get_presence_store().leave(self.group_name, self.user.id, self.channel_name)
+        except Exception as e:
+            logger.warning(f"Failed to remove presence from {self.group_name}: {e}")
+            return
+        if last:
+            await self.broadcast_presence("leave")
+
+    async def handle_typing(self):
+        """
+        Tells the group that the user is typing, at most once per `PRESENCE_TYPING_INTERVAL`
+        per connection; the events in between are dropped.
+        """
+        if self.heartbeat_task is None:
+            return
 
+        now = time.monotonic()
+        if self.typing_sent_at is not None and now - self.typing_sent_at < settings.PRESENCE_TYPING_INTERVAL:
+            return
+        self.typing_sent_at = now
+        await self.broadcast_presence("typing")
+
+    async def broadcast_presence(self, event: str, user_id=None):
+        """
+        Tells the group about a presence event of the connected user, or of another user
+        (whose username is not known here) when `user_id` is given.
+        """
+        username = self.username if user_id is None else None
+        payload = {"type": "send_presence", "event": event, "user_id": user_id or self.user.id, "username": username}
+        await broadcast(self.channel_layer, self.group_name, payload)
+
+    async def send_presence(self, event):
+        if self.presence_events:
+            await self.send_event(event)
+
+    async def send_existing_content(self, pk, last_item_id=None, request_id=None, cursor=None):
+        """
+        Sends a page of history to this connection.
+
+        Pages are cut on `(created_at, id)` by `HistoryCursorPagination`; the reply carries
+        the `next_cursor` of the following page (`last_item_id` of older clients is still
+        accepted). The page is queried in the history thread pool and sent straight to the
+        requesting client. Pages larger than `WEBSOCKET_HISTORY_OFFLOAD_SIZE` are built by
+        the `send_chunked_data` Celery task, which replies to this channel only. The
+        `request_id` sent by the client is echoed in the reply.
+        """
         filter_kwargs = {f"{self.filter}": pk}
-        if last_item_id:
-            filter_kwargs["id__lt"] = last_item_id  # Fetch items with IDs greater than the last sent
+        position = {"cursor": cursor, "last_item_id": last_item_id}
+
+        if self.batch_size > settings.WEBSOCKET_HISTORY_OFFLOAD_SIZE:
+            return await self.offload_existing_content(filter_kwargs, request_id, **position)
+
+        try:
+            page = await aload_history_page(
+                self.instance, self.instance_serializer, filter_kwargs, self.batch_size, **position
+            )
+        except InvalidCursor:
+            error_message = {"type": "error", "errors": {"cursor": "Invalid cursor."}}
+            return await self.send_payload(error_message)
+
+        response = {"type": "send_data_chunk", **page}
+        if request_id is not None:
+            response["request_id"] = request_id
+        await self.send_payload(response)
+
+    async def offload_existing_content(self, filter_kwargs, request_id=None, **position):
+        from core.tasks import send_chunked_data
 
         send_chunked_data.delay(
             group_name=self.group_name,
@@ -115,10 +346,74 @@ class BaseAsyncWebsocketConsumer(AsyncWebsocketConsumer):
             instance_serializer_class=self.instance_serializer.__name__,  # Send serializer name as string
             filter_kwargs=filter_kwargs,
             batch_size=self.batch_size,
+            channel_name=self.channel_name,
+            request_id=request_id,
+            **position,
         )
 
+    async def is_authenticated(self) -> bool:
+        """
+        Returns True for an authenticated connection, otherwise sends an error to the client.
+        """
+        if self.user.is_authenticated:
+            return True
+
+        error_message = {"type": "error", "errors": {"user": "Authentication credentials were not provided."}}
+        await self.send_payload(error_message)
+        return False
+
+    async def websocket_receive(self, message):
+        """
+        Handles a received frame, replying with an error instead of closing the socket when
+        its database work exceeded the timeout of the database executor.
+        """
+        try:
+            await super().websocket_receive(message)
+        except DatabaseTimeout:
+            error_message = {"type": "error", "errors": {"database": "The server is busy, please try again."}}
+            await self.send_payload(error_message)
+
     async def send_data_chunk(self, event):
-        await self.send(text_data=event["message"])
+        await self.send_event(event, coalesce=False)
+
+    async def send_error(self, event):
+        await self.send_payload({"type": "error", "errors": event["errors"]})
+
+    async def send_payload(self, payload: dict):
+        """
+        Sends a message to this connection in the negotiated wire format.
+        """
+        await self.flush_coalesced()
+        await self.send_frame(self.codec.encode(payload))
+
+    async def send_event(self, event: dict, coalesce=True):
+        """
+        Forwards a channel layer event to this connection, reusing the frame encoded by
+        `encode_event` when the publisher provided one (see `event_frame`).
+        Connections that opted in to coalescing get the event in the next batch.
+        """
+        frame = event_frame(event, self.codec)
+
+        if coalesce and self.coalescer is not None:
+            return await self.coalescer.add(frame)
+        await self.flush_coalesced()
+        await self.send_frame(frame)
+
+    async def flush_coalesced(self):
+        # Keeps direct replies behind the group events that were buffered before them
+        if self.coalescer is not None and len(self.coalescer):
+            await self.coalescer.flush()
+
+    async def send_frame(self, frame):
+        if self.codec.binary:
+            await self.send(bytes_data=frame)
+        else:
+            await self.send(text_data=frame)
+
+    def decode_frame(self, text_data=None, bytes_data=None) -> dict:
+        if bytes_data is not None and self.codec.binary:
+            return self.codec.decode(bytes_data)
+        return DEFAULT_CODEC.decode(text_data if text_data is not None else bytes_data)
 
 
 class CommentConsumer(BaseAsyncWebsocketConsumer):
@@ -139,6 +434,11 @@ class CommentConsumer(BaseAsyncWebsocketConsumer):
         type: The type of action broadcasted ("send_comment").
         instance_serializer: The serializer used for serializing Comment objects.
         filter: The filtering field identifier used for batch data retrieval ("task_id").
+        task_member_ids: IDs of the users who may comment on the connected task (its
+            executor, team leader and team members), refreshed by `refresh_task` events.
+
+    Comments are always created on the connected task and updated or deleted on behalf
+    of the connected user; task and member IDs sent by the client are ignored.
 
     Methods:
         __init__(*args, **kwargs)
@@ -169,17 +469,33 @@ class CommentConsumer(BaseAsyncWebsocketConsumer):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.group_name = "comments"
+        self.coalesce_events = True
+        self.track_presence = True
         self.instance = Comment
         self.type = "send_comment"
         self.instance_serializer = CommentSerializer
         self.filter = "task_id"
+        self.task_member_ids = set()
+
+    async def load_connection_state(self):
+        await super().load_connection_state()
+        self.task_member_ids = await get_task_member_ids(self.pk)
+
+    async def refresh_task(self, event):
+        self.task_member_ids = await get_task_member_ids(self.pk)
+
+    def is_task_member(self) -> bool:
+        return self.user.is_staff or self.user.is_admin or self.user.id in self.task_member_ids
 
     async def disconnect(self, close_code):
-        await self.channel_layer.group_discard(self.group_name, self.channel_name)
+        if self.coalescer is not None:
+            self.coalescer.close()
+        await self.leave_presence()
+        await self.leave_groups()
         logger.info(f"WebSocket disconnected from group: {self.group_name}")
 
     async def receive(self, text_data=None, bytes_data=None):
-        data = json.loads(text_data)
+        data = self.decode_frame(text_data, bytes_data)
         logger.debug(f"Received data: {data}")
         action = data.get("action")
         if action == "create":
@@ -188,29 +504,37 @@ class CommentConsumer(BaseAsyncWebsocketConsumer):
             await self.handle_update(data)
         if action == "delete":
             await self.handle_delete(data)
+        if action == "typing":
+            await self.handle_typing()
         if action == "get_next_batch":
-            last_item_id = data["last_item_id"]
-            await self.send_existing_content(self.pk, last_item_id)
+            await self.send_existing_content(
+                self.pk, data.get("last_item_id"), request_id=data.get("request_id"), cursor=data.get("cursor")
+            )
 
     async def handle_create(self, data):
-        serializer = CommentSerializer(data=data)
+        serializer = CommentSerializer(data={**data, "task_id": self.pk})
         if not serializer.is_valid():
             error_message = {"type": "error", "errors": serializer.errors}
-            await self.send(text_data=json.dumps(error_message))
+            await self.send_payload(error_message)
             logger.error(f"Validation errors: {serializer.errors}")
             return
 
+        if not await self.is_authenticated():
+            return
+
+        if not self.is_task_member():
+            error_message = {"type": "error", "errors": {"task": "You are not a member of this task."}}
+            return await self.send_payload(error_message)
+
         validated_data = serializer.validated_data
 
         content = validated_data["content"]
         task_id = validated_data["task_id"]
-        headers_dict = {key.decode("utf-8"): value.decode("utf-8") for key, value in self.headers}
-
-        auth_token = await sync_to_async(CustomAuthToken.objects.get)(key=headers_dict.get("authorization"))
-        member_id = auth_token.user_id
+        member_id = self.user.id
 
         # Create the comment
-        comment = await sync_to_async(Comment.objects.create)(
+        comment = await database_executor.run(
+            Comment.objects.create,
             content=content,
             member_id=member_id,
             task_id=task_id,
@@ -220,74 +544,69 @@ class CommentConsumer(BaseAsyncWebsocketConsumer):
         response_serializer = CommentSerializer(comment)
 
         response = {
-            "username": await get_username(member_id),
+            "username": self.username,
             "type": "send_comment",
             "comment": response_serializer.data,
             "task_id": task_id,
         }
 
         # Send the response to the group
-        await self.channel_layer.group_send(self.group_name, response)
+        await broadcast(self.channel_layer, self.group_name, response)
 
     async def handle_update(self, data):
-        serializer = UpdateCommentSerializer(data=data)
+        if not await self.is_authenticated():
+            return
+
+        serializer = UpdateCommentSerializer(data={**data, "member_id": self.user.id})
         if not serializer.is_valid():
             error_message = {"type": "error", "errors": serializer.errors}
-            await self.send(text_data=json.dumps(error_message))
+            await self.send_payload(error_message)
             return
 
         validated_data = serializer.validated_data
         comment_id = validated_data["pk"]
         content = validated_data["content"]
-        member_id = validated_data["member_id"]
+        member_id = self.user.id
 
-        # Update the comment and fetch the updated instance
-        rows_updated = await sync_to_async(Comment.objects.filter(id=comment_id, member_id=member_id).update)(
-            content=content, updated_at=timezone.now()
-        )
-        if rows_updated == 0:
+        # Update the comment and get the updated row back from the same statement
+        updated_comment = await database_executor.run(update_comment, comment_id, member_id, content)
+        if updated_comment is None:
             error_message = {"type": "error", "message": "Comment not found or you don't have permission to update it."}
-            await self.send(text_data=json.dumps(error_message))
+            await self.send_payload(error_message)
             return
 
-        updated_comment = await sync_to_async(Comment.objects.get)(id=comment_id)
-
         logger.info(f"Comment updated: {comment_id}")
         response_serializer = UpdateCommentSerializer(updated_comment)
         response = {
             "type": "send_comment",
             "comment": response_serializer.data,
         }
-        await self.channel_layer.group_send(self.group_name, response)
+        await broadcast(self.channel_layer, self.group_name, response)
 
     async def handle_delete(self, data):
+        if not await self.is_authenticated():
+            return
+
         comment_id = data.get("pk")
         if not comment_id:
             error_message = {"type": "error", "message": "Comment ID is required for deletion."}
-            await self.send(text_data=json.dumps(error_message))
+            await self.send_payload(error_message)
             return
 
-        try:
-            comment = await sync_to_async(Comment.objects.get)(id=comment_id, member_id=data["member_id"])
-            await sync_to_async(comment.delete)()
-
-            response = {
-                "type": "send_comment",
-                "message": f"Comment {comment_id} deleted successfully.",
-            }
-            await self.channel_layer.group_send(self.group_name, response)
-
-        except Comment.DoesNotExist:
+        if not await database_executor.run(delete_comment, comment_id, self.user.id):
             error_message = {"type": "error", "message": f"Comment with ID {comment_id} does not exist."}
-            await self.send(text_data=json.dumps(error_message))
+            await self.send_payload(error_message)
             logger.error(f"Comment with ID {comment_id} does not exist.")
+            return
+
+        response = {
+            "type": "send_comment",
+            "message": f"Comment {comment_id} deleted successfully.",
+        }
+        await broadcast(self.channel_layer, self.group_name, response)
 
     async def send_comment(self, event):
-        await self.send(
-            text_data=json.dumps(
-                event,
-            )
-        )
+        await self.send_event(event)
 
 
 class NotificationConsumer(BaseAsyncWebsocketConsumer):
@@ -306,6 +625,10 @@ class NotificationConsumer(BaseAsyncWebsocketConsumer):
     type: A str indicating the type key used for identifying messages.
     instance_serializer: The serializer class for validating and serializing notifications.
     filter: A str representing the key used to filter notifications for a particular user.
+
+    Only the authenticated owner can connect to `/ws/notify/<user id>/`. Each connection
+    joins the user's groups from `NotificationRouter`, so every device of the user gets
+    the user's notifications and nothing else.
     """
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -315,16 +638,33 @@ class NotificationConsumer(BaseAsyncWebsocketConsumer):
         self.instance_serializer = NotificationSerializer
         self.filter = "user_id"
 
+    async def connect(self):
+        self.user = self.scope["user"]
+        if not self.user.is_authenticated or str(self.user.id) != self.scope["url_route"]["kwargs"]["pk"]:
+            await self.close(code=4003)
+            return
+        await super().connect()
+
+    async def join_groups(self):
+        await self.channel_layer.group_add(user_group_name(self.user.id), self.channel_name)
+        await NotificationRouter.join(self.channel_layer, self.user.id, self.channel_name)
+
+    async def leave_groups(self):
+        if self.user.is_authenticated:
+            await self.channel_layer.group_discard(user_group_name(self.user.id), self.channel_name)
+            await NotificationRouter.leave(self.channel_layer, self.user.id, self.channel_name)
+
     async def receive(self, text_data=None, bytes_data=None):
-        data = json.loads(text_data)
+        data = self.decode_frame(text_data, bytes_data)
         action = data.get("action")
         if action == "create":
             await self.handle_create(data)
         if action == "delete":
             await self.handle_delete(data)
         if action == "get_next_batch":
-            last_item_id = data["last_item_id"]
-            await self.send_existing_content(self.pk, last_item_id)
+            await self.send_existing_content(
+                self.pk, data.get("last_item_id"), request_id=data.get("request_id"), cursor=data.get("cursor")
+            )
 
     async def handle_create(self, data):
         logger.debug(f"Received data: {data}")
@@ -332,7 +672,7 @@ class NotificationConsumer(BaseAsyncWebsocketConsumer):
 
         if not serializer.is_valid():
             error_message = {"type": "error", "errors": serializer.errors}
-            await self.send(text_data=json.dumps(error_message))
+            await self.send_payload(error_message)
             logger.error(f"Validation errors: {serializer.errors}")
             return
 
@@ -340,71 +680,48 @@ class NotificationConsumer(BaseAsyncWebsocketConsumer):
         user_id = self.pk
         content = validated_data["content"]
 
-        notification = await sync_to_async(Notification.objects.create)(user_id=user_id, content=content)
+        notification = await database_executor.run(Notification.objects.create, user_id=user_id, content=content)
         logger.info(f"Notification created: {notification.id}")
         response_serializer = NotificationSerializer(notification)
 
         response = {
-            "username": await get_username(user_id),
+            "username": self.username,
             "notification": response_serializer.data,
             "type": "send_notification",
         }
-        await self.channel_layer.group_send(self.group_name, response)
+        await NotificationRouter.publish(self.channel_layer, user_id, response)
 
     async def handle_delete(self, data):
         notifications_ids = data.get("notifications_ids")
-        user_id = data.get("user_id")
+        user_id = self.user.id
 
         if not isinstance(notifications_ids, list):
             error_message = {
                 "type": "error",
                 "errors": {"notifications_ids": "Invalid data format. Expected a list."},
             }
-            await self.send(text_data=json.dumps(error_message))
+            await self.send_payload(error_message)
             return
 
-        usr_notifies_ids = [
-            notification_id
-            for notification_id in notifications_ids
-            if await sync_to_async(Notification.objects.filter(id=notification_id, user_id=user_id).exists)()
-        ]
+        deleted_count = await database_executor.run(delete_notifications, notifications_ids, user_id)
 
-        deleted_count = await sync_to_async(
-            Notification.objects.filter(id__in=usr_notifies_ids, user_id=user_id).delete
-        )()
-
-        if deleted_count[0] > 0:
-            logger.info(f"{deleted_count[0]} notifications deleted for user ID: {user_id}.")
+        if deleted_count > 0:
+            logger.info(f"{deleted_count} notifications deleted for user ID: {user_id}.")
             response = {
                 "type": "send_notification",
-                "message": f"{deleted_count[0]} notifications deleted successfully.",
+                "message": f"{deleted_count} notifications deleted successfully.",
             }
-            await self.channel_layer.group_send(self.group_name, response)
+            await NotificationRouter.publish(self.channel_layer, self.user.id, response)
         else:
             error_response = {
                 "type": "error",
                 "message": "No notifications found to delete.",
             }
-            await self.send(text_data=json.dumps(error_response))
+            await self.send_payload(error_response)
 
     async def send_notification(self, event):
-        try:
-            recipient_emails = await get_recipients_emails(event["recipient_list"])
-            print(recipient_emails)
-            send_email.delay(
-                subject=event["subject"],
-                message=event["content"]["content"],
-                to_email=recipient_emails,
-            )
-            await self.send(text_data=json.dumps({"message": "Notification sent successfully"}))
-
-        except Exception as e:
-            # Handle any errors gracefully
-            error_message = {
-                "type": "error",
-                "errors": {"notification": str(e)},
-            }
-            await self.send(text_data=json.dumps(error_message))
+        # Emails are sent once per event by `fan_out_notifications`, the socket only gets the notification
+        await self.send_event(event)
 
 
 class MessageConsumer(BaseAsyncWebsocketConsumer):
@@ -425,17 +742,47 @@ class MessageConsumer(BaseAsyncWebsocketConsumer):
         instance_serializer (Type[MessageSerializer]): Reference to the serializer class for
             chat message objects.
         filter (str): Attribute used to filter messages based on a specific property.
+        participant_ids (set[int]): IDs of the participants of the connected chat,
+            refreshed by `refresh_chat` events when participants change.
+        chat_name (str or None): Name of the connected chat.
+        participant_emails (dict[int, str]): Email addresses of the participants, resolved
+            with the participants so that notifying them needs no per-message lookup.
+
+    Connecting to the chat, or sending a "mark_read" action, resets the user's unread
+    counter of the chat; the counters are maintained by `websocket.counters`.
     """
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.group_name = "chat"
+        self.coalesce_events = True
+        self.track_presence = True
         self.instance = Message
         self.type = "send_message"
         self.instance_serializer = MessageSerializer
         self.filter = "chat_id"
+        self.participant_ids = set()
+        self.chat_name = None
+        self.participant_emails = {}
+
+    async def connect(self):
+        await super().connect()
+        if self.user.is_authenticated:
+            await database_executor.run(mark_read, self.pk, self.user.id)
+
+    async def load_connection_state(self):
+        await super().load_connection_state()
+        await self.load_chat_state()
+
+    async def refresh_chat(self, event):
+        await self.load_chat_state()
+
+    async def load_chat_state(self):
+        self.participant_ids, self.chat_name = await get_chat_state(self.pk)
+        contacts = await database_executor.run(RecipientResolver.resolve, self.participant_ids)
+        self.participant_emails = {user_id: contact.email for user_id, contact in contacts.items()}
 
     async def receive(self, text_data=None, bytes_data=None):
-        data = json.loads(text_data)
+        data = self.decode_frame(text_data, bytes_data)
         logger.debug(f"Received data: {data}")
         action = data.get("action")
         if action == "create":
@@ -444,121 +791,131 @@ class MessageConsumer(BaseAsyncWebsocketConsumer):
             await self.handle_update(data)
         elif action == "delete":
             await self.handle_delete(data)
+        elif action == "mark_read":
+            await self.handle_mark_read()
+        elif action == "typing":
+            await self.handle_typing()
         if action == "get_next_batch":
-            last_item_id = data["last_item_id"]
-            await self.send_existing_content(self.pk, last_item_id)
+            await self.send_existing_content(
+                self.pk, data.get("last_item_id"), request_id=data.get("request_id"), cursor=data.get("cursor")
+            )
 
     async def handle_create(self, data):
         serializer = MessageSerializer(data=data)
 
         if not serializer.is_valid():
             error_message = {"type": "error", "errors": serializer.errors}
-            await self.send(text_data=json.dumps(error_message))
+            await self.send_payload(error_message)
             logger.error(f"Validation errors: {serializer.errors}")
             return
 
+        if not await self.is_authenticated():
+            return
+
         validated_data = serializer.validated_data
-        headers_dict = {key.decode("utf-8"): value.decode("utf-8") for key, value in self.headers}
         chat_id = validated_data["chat_id"]
-        auth_token = await sync_to_async(CustomAuthToken.objects.get)(key=headers_dict.get("authorization"))
-        sender_id = auth_token.user_id
+        sender_id = self.user.id
         content = validated_data["content"]
-        chat_participants = await sync_to_async(
-            lambda: list(Participant.objects.filter(chat_id=chat_id).values_list("user_id", flat=True))
-        )()
+        if str(chat_id) == self.pk:
+            chat_participants, chat_name = self.participant_ids, self.chat_name
+            participant_emails = self.participant_emails
+        else:
+            (chat_participants, chat_name), participant_emails = await get_chat_state(chat_id), None
+        error_message = {
+            "type": "error",
+            "errors": {"chat_participants": "sender_id not in chat_participants"},
+        }
         if sender_id not in chat_participants:
-            error_message = {
-                "type": "error",
-                "errors": {"chat_participants": "sender_id not in chat_participants"},
-            }
-            return await self.send(text_data=json.dumps(error_message))
-        # Create message
-        message = await sync_to_async(Message.objects.create)(chat_id=chat_id, sender_id=sender_id, content=content)
+            return await self.send_payload(error_message)
+        # Create message and update the participants' counters with it
+        try:
+            message, counters = await database_executor.run(record_message, chat_id, sender_id, content)
+        except NotAParticipant:
+            # The sender left the chat before this connection's participants were refreshed
+            return await self.send_payload(error_message)
         logger.info(f"Message created: {message.id}")
 
         # Prepare response for the message sender
         response_serializer = MessageSerializer(message)
-        username = await get_username(sender_id)
         response = {
-            "username": username,
+            "username": self.username,
             "type": "send_message",
             "chat_id": chat_id,
             "message": response_serializer.data,
         }
-        chat_participants.remove(sender_id)
-        recipient_ids = chat_participants
-        # Increment message count for sender
-        msg_counter = await sync_to_async(Message.objects.filter(chat_id=chat_id, sender_id=sender_id).count)()
-        chat_name = await sync_to_async(Chat.objects.get)(id=chat_id)
-        # Send notification to the `notifications_room`
+        recipient_ids = [participant_id for participant_id in chat_participants if participant_id != sender_id]
+        recipient_emails = None
+        if participant_emails is not None:
+            recipient_emails = [participant_emails.get(recipient_id, "") for recipient_id in recipient_ids]
+        msg_counter = counters[sender_id]["sent_count"]
+        # Notify every recipient in their own notifications group
         notify_content = {
             "content": f"You've received {msg_counter} messages in chat: {chat_name}!",
         }
-
-        for recipient_id in recipient_ids:
-            notification_event = {
-                "type": "send_notification",
-                "subject": f"You've received new message in chat: {chat_name}",
-                "recipient_list": recipient_ids,
-                "user_id": recipient_id,
-                "content": notify_content,
-            }
-            await sync_to_async(Notification.objects.create)(user_id=recipient_id, content=notify_content)
-            await self.channel_layer.group_send("notifications_room", notification_event)
+        await fan_out_notifications(
+            self.channel_layer,
+            recipient_ids,
+            f"You've received new message in chat: {chat_name}",
+            notify_content,
+            unread_counts={user_id: counter["unread_count"] for user_id, counter in counters.items()},
+            recipient_emails=recipient_emails,
+        )
 
         # Send message to `messages_room`
-        await self.channel_layer.group_send(self.group_name, response)
+        await broadcast(self.channel_layer, self.group_name, response)
 
     async def handle_update(self, data):
-        serializer = UpdateMessageSerializer(data=data)
+        if not await self.is_authenticated():
+            return
+
+        serializer = UpdateMessageSerializer(data={**data, "sender_id": self.user.id})
         if not serializer.is_valid():
             error_message = {"type": "error", "errors": serializer.errors}
-            await self.send(text_data=json.dumps(error_message))
+            await self.send_payload(error_message)
             return
         validated_data = serializer.validated_data
         msg_id = validated_data["pk"]
         chat_id = validated_data["chat_id"]
-        sender_id = validated_data["sender_id"]
+        sender_id = self.user.id
         content = validated_data["content"]
 
-        rows_updated_msg = await sync_to_async(
-            Message.objects.filter(id=msg_id, chat_id=chat_id, sender_id=sender_id).update
-        )(content=content, updated_at=timezone.now())
-        if rows_updated_msg == 0:
+        updated_msg = await database_executor.run(update_message, msg_id, chat_id, sender_id, content)
+        if updated_msg is None:
             error_message = {"type": "error", "message": "Message not found or you don't have permission to update it."}
-            await self.send(text_data=json.dumps(error_message))
+            await self.send_payload(error_message)
             return
-        updated_msg = await sync_to_async(Message.objects.get)(id=msg_id)
         logger.info(f"Message updated: {msg_id}")
         response_serializer = MessageSerializer(updated_msg)
         response = {
             "type": "send_message",
             "content": response_serializer.data,
         }
-        await self.channel_layer.group_send(self.group_name, response)
+        await broadcast(self.channel_layer, self.group_name, response)
 
     async def handle_delete(self, data):
-        msg_id = data["pk"]
+        if not await self.is_authenticated():
+            return
+
+        msg_id = data.get("pk")
         if not msg_id:
             error_message = {"type": "error", "message": "Message not found."}
-            await self.send(text_data=json.dumps(error_message))
+            await self.send_payload(error_message)
             return
-        try:
-            msg = await sync_to_async(Message.objects.get)(id=msg_id, sender_id=data["sender_id"])
-            await sync_to_async(msg.delete)()
-
-            response = {"type": "send_message", "message": f"Message {msg_id} has been successfully deleted."}
-            await self.channel_layer.group_send(self.group_name, response)
-        except Message.DoesNotExist:
+        if await database_executor.run(delete_message, msg_id, self.user.id) is None:
             error_message = {"type": "error", "message": "Message not found."}
-            await self.send(text_data=json.dumps(error_message))
+            await self.send_payload(error_message)
             logger.error(f"Message with id {msg_id} does not exist")
             return
 
-    async def send_message(self, event):
+        response = {"type": "send_message", "message": f"Message {msg_id} has been successfully deleted."}
+        await broadcast(self.channel_layer, self.group_name, response)
 
-        await self.send(
-            text_data=json.dumps(
-                event,
-            )
-        )
+    async def handle_mark_read(self):
+        if not await self.is_authenticated():
+            return
+
+        await database_executor.run(mark_read, self.pk, self.user.id)
+        await self.send_payload({"type": "mark_read", "chat_id": int(self.pk), "unread_count": 0})
+
+    async def send_message(self, event):
+        await self.send_event(event)
@@ -0,0 +1,136 @@
+from django.db import connections, transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce, Greatest
+from django.utils.timezone import now
+
+from users.models import Participant
+from websocket.models import Message
+
+
+class NotAParticipant(Exception):
+    """
+    Raised when a message is sent to a chat by a user who is not one of its participants.
+    """
+
+
+def record_message(chat_id, sender_id, content) -> tuple[Message, dict[int, dict]]:
+    """
+    Creates a chat message and updates the counters of the chat participants with it.
+
+    The message insert and the counter update run in one transaction, so the counters
+    never drift from the messages written through this function. The sender's `sent_count`
+    and every other participant's `unread_count` are incremented by a single
+    `UPDATE ... RETURNING` statement, whose cost depends on the number of participants,
+    not on the size of the chat history.
+
+    Args:
+        chat_id (int): The chat the message is sent to.
+        sender_id (int): The author of the message.
+        content (dict): The content of the message.
+
+    Returns:
+        tuple[Message, dict[int, dict]]: The created message and the updated counters
+        (`sent_count`, `unread_count`) of each participant, keyed by user ID.
+
+    Raises:
+        NotAParticipant: If the sender has no participant row in the chat (e.g. it was
+            removed after the caller checked), in which case no message is created.
+    """
+    connection = connections[Participant.objects.db]
+    qn = connection.ops.quote_name
+    table = qn(Participant._meta.db_table)
+    sql = (
+        f"UPDATE {table} SET "
+        f"{qn('sent_count')} = {qn('sent_count')} + CASE WHEN {qn('user_id')} = %s THEN 1 ELSE 0 END, "
+        f"{qn('unread_count')} = {qn('unread_count')} + CASE WHEN {qn('user_id')} = %s THEN 0 ELSE 1 END "
+        f"WHERE {qn('chat_id')} = %s "
+        f"RETURNING {qn('user_id')}, {qn('sent_count')}, {qn('unread_count')}"
+    )
+    with transaction.atomic(using=Participant.objects.db):
+        message = Message.objects.create(chat_id=chat_id, sender_id=sender_id, content=content)
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [sender_id, sender_id, chat_id])
+            rows = cursor.fetchall()
+
+        counters = {user_id: {"sent_count": sent, "unread_count": unread} for user_id, sent, unread in rows}
+        if sender_id not in counters:
+            raise NotAParticipant(f"User {sender_id} is not a participant of chat {chat_id}.")  # Rolls back
+    return message, counters
+
+
+def forget_message(message: Message) -> None:
+    """
+    Deletes a chat message and takes it back out of the participants' counters.
+
+    The unread counters are only decremented for participants who had not read the
+    message yet, i.e. who last read the chat (or joined it) before it was created.
+    """
+    with transaction.atomic():
+        message.delete()
+        Participant.objects.filter(chat_id=message.chat_id, user_id=message.sender_id).update(
+            sent_count=Greatest(F("sent_count") - 1, 0)
+        )
+        Participant.objects.filter(
+            chat_id=message.chat_id,
+            unread_count__gt=0,
+        ).exclude(user_id=message.sender_id).alias(
+            read_at=Coalesce("last_read_at", "joined_at")
+        ).filter(read_at__lt=message.created_at).update(unread_count=F("unread_count") - 1)
+
+
+def mark_read(chat_id, user_id) -> int:
+    """
+    Resets the unread counter of the user in the chat.
+
+    Returns:
+        int: The number of updated participants (0 if the user is not in the chat).
+    """
+    return Participant.objects.filter(chat_id=chat_id, user_id=user_id).update(unread_count=0, last_read_at=now())
+
+
+def reconcile_counters(chat_ids=None) -> int:
+    """
+    Recomputes the counters of the participants from the stored messages.
+
+    The counters are maintained incrementally, so this only matters for messages written
+    or deleted outside of `record_message` / `forget_message` (admin, shell, raw SQL).
+    It is meant to run periodically and off-peak, since it counts the whole history of
+    every chat it covers.
+
+    Args:
+        chat_ids (Iterable[int] or None): Chats to reconcile, all chats if omitted.
+
+    Returns:
+        int: The number of participants whose counters were corrected.
+    """
+    sent = (
+        Message.objects.filter(chat_id=OuterRef("chat_id"), sender_id=OuterRef("user_id"))
+        .order_by()
+        .values("sender_id")
+        .annotate(total=Count("id"))
+        .values("total")
+    )
+    unread = (
+        Message.objects.filter(chat_id=OuterRef("chat_id"), created_at__gt=OuterRef("read_at"))
+        .exclude(sender_id=OuterRef("user_id"))
+        .order_by()
+        .values("chat_id")
+        .annotate(total=Count("id"))
+        .values("total")
+    )
+    participants = Participant.objects.all()
+    if chat_ids is not None:
+        participants = participants.filter(chat_id__in=chat_ids)
+
+    participants = participants.alias(read_at=Coalesce("last_read_at", "joined_at")).annotate(
+        actual_sent=Coalesce(Subquery(sent), 0),
+        actual_unread=Coalesce(Subquery(unread), 0),
+    )
+    stale = participants.filter(~Q(sent_count=F("actual_sent")) | ~Q(unread_count=F("actual_unread")))
+
+    corrected = 0
+    for participant_id, actual_sent, actual_unread in stale.values_list("id", "actual_sent", "actual_unread"):
+        corrected += Participant.objects.filter(id=participant_id).update(
+            sent_count=actual_sent, unread_count=actual_unread
+        )
+    return corrected
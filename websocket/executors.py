@@ -0,0 +1,135 @@
+import asyncio
+import functools
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+
+class DatabaseTimeout(Exception):
+    """
+    Raised when a database call does not finish within the executor timeout.
+    """
+
+
+class DatabaseExecutor:
+    """
+    Bounded thread pool running the ORM calls of the WebSocket consumers.
+
+    `sync_to_async` runs thread-sensitive calls one at a time in a single thread shared
+    by the whole process, so one slow query in a chat delays every other socket. Calls
+    made through this executor are not thread-sensitive: up to `max_workers` of them run
+    at once, each worker keeping its own database connection, so the pool size is the
+    number of connections the process opens. Calls that cannot start and finish within
+    `timeout` raise `DatabaseTimeout`; a call still waiting for a worker at that point is
+    dropped instead of being run late.
+
+    Only self-contained calls belong here: a call must not rely on a transaction or any
+    other thread-local state left behind by a previous call.
+
+    Attributes:
+        max_workers (int): Number of worker threads and database connections.
+        timeout (float or None): Default seconds a call may take, queueing included.
+        queued (int): Calls waiting for a free worker.
+        running (int): Calls being executed.
+        max_queued (int): Highest queue depth seen.
+        completed (int): Calls that ran to the end, successfully or not.
+        timed_out (int): Calls that exceeded their timeout.
+    """
+
+    def __init__(self, max_workers: int, timeout: float | None = None, thread_name_prefix="websocket-db"):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=thread_name_prefix)
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.running = 0
+        self.max_queued = 0
+        self.completed = 0
+        self.timed_out = 0
+        self._total_wait = 0.0
+
+    def _call(self, func, call_state: dict, submitted_at: float, args, kwargs):
+        with self._lock:
+            if call_state["abandoned"]:
+                return None
+            call_state["started"] = True
+            self.queued -= 1
+            self.running += 1
+            self._total_wait += time.perf_counter() - submitted_at
+
+        close_old_connections()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            close_old_connections()
+            with self._lock:
+                self.running -= 1
+                self.completed += 1
+
+    async def run(self, func, *args, timeout: float | None = None, **kwargs):
+        """
+        Runs `func(*args, **kwargs)` in the pool and returns its result.
+
+        Args:
+            func: Synchronous callable doing the database work.
+            timeout (float or None): Overrides the executor timeout for this call.
+
+        Raises:
+            DatabaseTimeout: If the call did not complete in time.
+        """
+        call_state = {"started": False, "abandoned": False}
+        with self._lock:
+            self.queued += 1
+            self.max_queued = max(self.max_queued, self.queued)
+
+        call = functools.partial(self._call, func, call_state, time.perf_counter(), args, kwargs)
+        timeout = self.timeout if timeout is None else timeout
+        try:
+            return await asyncio.wait_for(
+                sync_to_async(call, thread_sensitive=False, executor=self._executor)(), timeout
+            )
+        except asyncio.TimeoutError:
+            with self._lock:
+                self.timed_out += 1
+                if not call_state["started"]:
+                    call_state["abandoned"] = True
+                    self.queued -= 1
+            logger.warning(f"Database call {getattr(func, '__qualname__', func)} timed out after {timeout}s")
+            raise DatabaseTimeout(f"Database call did not complete within {timeout}s.")
+
+    def stats(self) -> dict:
+        """
+        Returns a snapshot of the pool metrics.
+        """
+        with self._lock:
+            started = self.completed + self.running
+            return {
+                "workers": self.max_workers,
+                "queued": self.queued,
+                "running": self.running,
+                "max_queued": self.max_queued,
+                "completed": self.completed,
+                "timed_out": self.timed_out,
+                "avg_wait_ms": round(self._total_wait / started * 1000, 2) if started else 0.0,
+            }
+
+
+database_executor = DatabaseExecutor(settings.WEBSOCKET_DB_WORKERS, settings.WEBSOCKET_DB_TIMEOUT)
+
+
+def db_sync_to_async(func):
+    """
+    Decorator turning a synchronous database helper into a coroutine run by `database_executor`.
+    """
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        return await database_executor.run(func, *args, **kwargs)
+
+    return wrapper
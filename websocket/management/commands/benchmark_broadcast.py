@@ -0,0 +1,80 @@
+import asyncio
+import time
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.core.management.base import BaseCommand
+
+from websocket.codecs import CODECS, broadcast, event_frame
+
+GROUP_NAME = "benchmark_broadcast"
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures the CPU time of fanning out one chat message to a group, from publishing to a frame ready "
+        "for every socket, serializing it per subscriber versus once at publish time, for each wire format."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--subscribers", type=int, nargs="+", default=[10, 100, 1000], help="Group sizes to measure."
+        )
+        parser.add_argument("--messages", type=int, default=200, help="Messages broadcast per run.")
+        parser.add_argument("--content-size", type=int, default=500, help="Characters of text in each message.")
+
+    def handle(self, *args, **kwargs):
+        payload = {
+            "username": "benchmark",
+            "type": "send_message",
+            "chat_id": 1,
+            "message": {
+                "pk": 1,
+                "chat_id": 1,
+                "sender_id": 1,
+                "content": {"text": "x" * kwargs["content_size"]},
+                "created_at": "2026-01-01T00:00:00.000000Z",
+                "updated_at": "2026-01-01T00:00:00.000000Z",
+            },
+        }
+        self.stdout.write(f"Channel layer: {get_channel_layer().__class__.__name__}")
+        for subscribers in kwargs["subscribers"]:
+            line = f"{subscribers:>6} subscribers"
+            for codec in CODECS.values():
+                per_subscriber, encode_once = (
+                    async_to_sync(self._run)(subscribers, kwargs["messages"], payload, codec, mode)
+                    for mode in ("per-subscriber", "encode-once")
+                )
+                line += (
+                    f" | {codec.name}: per-subscriber {per_subscriber * 1000:8.3f} ms, "
+                    f"encode-once {encode_once * 1000:8.3f} ms ({per_subscriber / encode_once:4.1f}x)"
+                )
+            self.stdout.write(f"{line} (CPU per message)")
+
+    async def _run(self, subscribers, messages, payload, codec, mode) -> float:
+        """
+        Returns the CPU seconds spent per message on the whole fan-out to subscribers
+        using the codec: publishing, channel layer delivery and the consumer's
+        `send_event` path up to the frame handed to `send()`.
+        """
+        channel_layer = get_channel_layer()
+        channels = [await channel_layer.new_channel() for _ in range(subscribers)]
+        for channel_name in channels:
+            await channel_layer.group_add(GROUP_NAME, channel_name)
+
+        started_at = time.process_time()
+        try:
+            for _ in range(messages):
+                if mode == "encode-once":
+                    await broadcast(channel_layer, GROUP_NAME, payload)
+                else:
+                    await channel_layer.group_send(GROUP_NAME, payload)
+                events = await asyncio.gather(*(channel_layer.receive(channel_name) for channel_name in channels))
+
+                for event in events:
+                    # What every consumer does before `send()`
+                    event_frame(event, codec)
+            return (time.process_time() - started_at) / messages
+        finally:
+            for channel_name in channels:
+                await channel_layer.group_discard(GROUP_NAME, channel_name)
@@ -0,0 +1,97 @@
+import asyncio
+import statistics
+import time
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+
+from websocket.codecs import DEFAULT_CODEC, broadcast
+from websocket.consumers import BaseAsyncWebsocketConsumer
+
+GROUP_NAME = "benchmark_coalescing"
+
+
+class BenchmarkConsumer(BaseAsyncWebsocketConsumer):
+    """
+    Chat room subscriber without the database work of `MessageConsumer`, so that the
+    benchmark measures delivery only.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.group_name = GROUP_NAME
+        self.coalesce_events = True
+
+    async def connect(self):
+        self.user = AnonymousUser()
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept(subprotocol=self.accept_codec())
+        self.coalescer = self.build_coalescer()
+
+    async def send_message(self, event):
+        await self.send_event(event)
+
+
+class Command(BaseCommand):
+    help = "Measures frames/sec and delivery latency of a busy chat room with and without coalescing."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--clients", type=int, default=100, help="Sockets subscribed to the room.")
+        parser.add_argument("--messages", type=int, default=500, help="Messages published to the room.")
+        parser.add_argument("--rate", type=int, default=1000, help="Messages published per second.")
+        parser.add_argument(
+            "--windows", type=int, nargs="+", default=[0, 20, 50], help="Coalescing windows in ms (0 disables)."
+        )
+
+    def handle(self, *args, **kwargs):
+        for window in kwargs["windows"]:
+            report = async_to_sync(self._run)(kwargs["clients"], kwargs["messages"], kwargs["rate"], window)
+            self.stdout.write(
+                f"window {window:>3} ms: {report['frames_per_sec']:10.1f} frames/sec, "
+                f"{report['events_per_sec']:10.1f} events/sec, latency p50 {report['p50_ms']:7.2f} ms, "
+                f"p99 {report['p99_ms']:7.2f} ms"
+            )
+
+    async def _run(self, clients, messages, rate, window) -> dict:
+        application = BenchmarkConsumer.as_asgi()
+        path = f"/benchmark/?coalesce={window}" if window else "/benchmark/"
+        communicators = [WebsocketCommunicator(application, path) for _ in range(clients)]
+        for communicator in communicators:
+            await communicator.connect()
+
+        channel_layer = get_channel_layer()
+        latencies, frames = [], 0
+
+        async def read(communicator):
+            nonlocal frames
+            received = 0
+            while received < messages:
+                payload = DEFAULT_CODEC.decode(await communicator.receive_from(timeout=30))
+                arrived_at = time.perf_counter()
+                events = payload["events"] if payload["type"] == "batch" else [payload]
+                frames += 1
+                received += len(events)
+                latencies.extend(arrived_at - event["sent_at"] for event in events)
+
+        async def publish():
+            for sequence in range(messages):
+                payload = {"type": "send_message", "sequence": sequence, "sent_at": time.perf_counter()}
+                await broadcast(channel_layer, GROUP_NAME, payload)
+                await asyncio.sleep(1 / rate)
+
+        started_at = time.perf_counter()
+        await asyncio.gather(publish(), *(read(communicator) for communicator in communicators))
+        duration = time.perf_counter() - started_at
+
+        for communicator in communicators:
+            await communicator.disconnect()
+
+        latencies.sort()
+        return {
+            "frames_per_sec": frames / duration,
+            "events_per_sec": len(latencies) / duration,
+            "p50_ms": statistics.median(latencies) * 1000,
+            "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        }
@@ -0,0 +1,107 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils.timezone import now
+
+from users.models import Chat, CustomUser
+from websocket.models import Message
+from websocket.paginations import HistoryCursorPagination
+
+
+class Command(BaseCommand):
+    help = (
+        "Seeds a chat and compares keyset (cursor) pages with OFFSET pages at growing depths. Runs only against "
+        "an empty database or one whose name contains 'benchmark', unless --force is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rows",
+            type=int,
+            default=10_000,
+            help="Messages seeded into the benchmark chat, pass e.g. 10000000 to measure deep pages.",
+        )
+        parser.add_argument("--page-size", type=int, default=50, help="Messages per page.")
+        parser.add_argument("--repeat", type=int, default=5, help="Timed runs per depth, the median is reported.")
+        parser.add_argument("--no-offset", action="store_true", help="Skip the OFFSET pagination comparison.")
+        parser.add_argument("--keep", action="store_true", help="Keep the seeded chat after the run.")
+        parser.add_argument(
+            "--force", action="store_true", help="Seed a database that holds messages and is not a benchmark one."
+        )
+
+    def handle(self, *args, **kwargs):
+        rows, page_size = kwargs["rows"], kwargs["page_size"]
+        if rows <= 0:
+            raise CommandError("--rows must be positive.")
+        if not kwargs["force"]:
+            self._check_database()
+        chat, sender = self._seed(rows)
+        paginator = HistoryCursorPagination(page_size)
+        queryset = Message.objects.filter(chat_id=chat.id)
+
+        try:
+            depths = sorted({depth for depth in (0, 1_000, 100_000, 1_000_000, rows - page_size) if 0 <= depth < rows})
+            for depth in depths:
+                cursor = None
+                if depth:
+                    created_at, pk = queryset.order_by(*paginator.ordering).values_list("created_at", "id")[depth - 1]
+                    cursor = paginator.encode_cursor(created_at, pk)
+
+                cursor_time = self._median(kwargs["repeat"], lambda: paginator.paginate(queryset, cursor=cursor))
+                line = f"depth {depth:>10}: cursor {cursor_time * 1000:8.2f} ms"
+                if not kwargs["no_offset"]:
+                    offset_page = lambda: list(queryset.order_by(*paginator.ordering)[depth : depth + page_size])
+                    line += f" | offset {self._median(kwargs['repeat'], offset_page) * 1000:8.2f} ms"
+                self.stdout.write(line)
+        finally:
+            if not kwargs["keep"]:
+                self._cleanup(chat, sender)
+
+    @staticmethod
+    def _check_database():
+        """
+        Refuses to write millions of rows into a database that may hold real data.
+        """
+        name = connection.settings_dict["NAME"]
+        if "benchmark" in str(name).lower() or not Message.objects.exists():
+            return
+        raise CommandError(
+            f"Database {name!r} already holds messages and is not a benchmark database. "
+            "Run against a dedicated database or pass --force."
+        )
+
+    def _seed(self, rows):
+        self.stdout.write(f"Seeding {rows} messages...")
+        started_at = time.perf_counter()
+        with transaction.atomic():
+            sender, _ = CustomUser.objects.get_or_create(username="benchmark_history_sender")
+            chat = Chat.objects.create(name="History benchmark", is_group=True)
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"INSERT INTO {Message._meta.db_table} (chat_id, sender_id, content, created_at) "
+                    "SELECT %s, %s, jsonb_build_object('text', 'message ' || n), %s - n * interval '1 millisecond' "
+                    "FROM generate_series(1, %s) AS n",
+                    [chat.id, sender.id, now(), rows],
+                )
+        with connection.cursor() as cursor:
+            cursor.execute(f"ANALYZE {Message._meta.db_table}")
+        self.stdout.write(f"Seeded in {time.perf_counter() - started_at:.1f}s.")
+        return chat, sender
+
+    @staticmethod
+    def _cleanup(chat, sender):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {Message._meta.db_table} WHERE chat_id = %s", [chat.id])
+        chat.delete()
+        sender.delete()
+
+    @staticmethod
+    def _median(repeat, func) -> float:
+        timings = []
+        for _ in range(repeat):
+            started_at = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - started_at)
+        return statistics.median(timings)
@@ -0,0 +1,80 @@
+import asyncio
+import random
+import time
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.core.management.base import BaseCommand
+
+from websocket.routing import NotificationRouter
+
+LEGACY_GROUP = "benchmark_notifications_room"
+# Far above real primary keys, so the benchmark never publishes to a real user's sessions
+FIRST_USER_ID = 10_000_000
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures notification events delivered per second against the number of connected users, "
+        "with per-user routing or with the legacy shared group."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--users", type=int, nargs="+", default=[10, 100, 1000], help="Connected user counts to measure."
+        )
+        parser.add_argument("--devices", type=int, default=2, help="Notification connections per user.")
+        parser.add_argument("--events", type=int, default=500, help="Notifications published per run.")
+        parser.add_argument(
+            "--legacy", action="store_true", help="Publish to one shared group and filter on every socket instead."
+        )
+
+    def handle(self, *args, **kwargs):
+        for users in kwargs["users"]:
+            delivered, received, duration = async_to_sync(self._run)(
+                users, kwargs["devices"], kwargs["events"], kwargs["legacy"]
+            )
+            self.stdout.write(
+                f"{users:>6} users x {kwargs['devices']} devices ({'shared group' if kwargs['legacy'] else 'routed'}): "
+                f"{delivered / duration:10.1f} notifications delivered/sec, "
+                f"{received} frames received for {delivered} deliveries in {duration:.2f}s"
+            )
+
+    async def _run(self, users, devices, events, legacy):
+        channel_layer = get_channel_layer()
+        sessions = {}
+        for user_id in range(FIRST_USER_ID, FIRST_USER_ID + users):
+            sessions[user_id] = [await channel_layer.new_channel() for _ in range(devices)]
+            for channel_name in sessions[user_id]:
+                if legacy:
+                    await channel_layer.group_add(LEGACY_GROUP, channel_name)
+                else:
+                    await NotificationRouter.join(channel_layer, user_id, channel_name)
+        all_channels = [channel_name for channels in sessions.values() for channel_name in channels]
+
+        delivered = received = 0
+        started_at = time.perf_counter()
+        try:
+            for _ in range(events):
+                user_id = random.randrange(FIRST_USER_ID, FIRST_USER_ID + users)
+                event = {"type": "send_notification", "user_id": user_id, "content": {"content": "Benchmark"}}
+                if legacy:
+                    # Every socket gets the event and drops it unless it belongs to its user
+                    await channel_layer.group_send(LEGACY_GROUP, event)
+                    frames = await asyncio.gather(*(channel_layer.receive(name) for name in all_channels))
+                    received += len(frames)
+                    delivered += len(sessions[user_id])
+                else:
+                    await NotificationRouter.publish(channel_layer, user_id, event)
+                    frames = await asyncio.gather(*(channel_layer.receive(name) for name in sessions[user_id]))
+                    received += len(frames)
+                    delivered += len(frames)
+            duration = time.perf_counter() - started_at
+        finally:
+            for user_id, channels in sessions.items():
+                for channel_name in channels:
+                    if legacy:
+                        await channel_layer.group_discard(LEGACY_GROUP, channel_name)
+                    else:
+                        await NotificationRouter.leave(channel_layer, user_id, channel_name)
+        return delivered, received, duration
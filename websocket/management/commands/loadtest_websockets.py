@@ -0,0 +1,319 @@
+import asyncio
+import itertools
+import json
+import random
+import resource
+import statistics
+import time
+import uuid
+from datetime import timedelta
+
+from asgiref.sync import async_to_sync
+from channels.layers import DEFAULT_CHANNEL_LAYER, InMemoryChannelLayer, channel_layers
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.utils.timezone import now
+
+from core.celery import app as celery_app
+from tasks.models import Task
+from users.models import Chat, CustomAuthToken, CustomUser, Participant, Team
+from websocket.executors import database_executor
+from websocket.models import Comment
+
+# Action mix of every socket kind: (action, weight)
+WORKLOADS = {
+    "chat": (("create", 6), ("update", 2), ("get_next_batch", 2)),
+    "comnt": (("create", 5), ("update", 2), ("get_next_batch", 3)),
+    "notify": (("create", 5), ("get_next_batch", 5)),
+}
+
+
+def find_probe(payload):
+    """
+    Returns the probe id of a reply or broadcast, looking into nested objects but not into
+    history pages (lists), which hold the probes of earlier operations.
+    """
+    if not isinstance(payload, dict):
+        return None
+    if "probe" in payload:
+        return payload["probe"]
+    if payload.get("request_id") is not None:
+        return payload["request_id"]
+    for value in payload.values():
+        probe = find_probe(value)
+        if probe is not None:
+            return probe
+    return None
+
+
+class SimulatedClient:
+    """
+    One WebSocket connection driving a workload and timing each operation from send to
+    the reply (history pages) or to its own broadcast coming back (create, update).
+    """
+
+    def __init__(self, kind, path, user_id, target_id, comment_id=None):
+        self.kind = kind
+        self.path = path
+        self.user_id = user_id
+        self.target_id = target_id
+        self.comment_id = comment_id
+        self.message_id = None
+        self.communicator = None
+        self.frames = 0
+        self.pending_probe = None
+        self.pending = None
+        self.reader = None
+
+    async def connect(self, application) -> bool:
+        self.communicator = WebsocketCommunicator(application, self.path)
+        connected, _ = await self.communicator.connect(timeout=30)
+        if connected:
+            self.reader = asyncio.create_task(self._read())
+        return connected
+
+    async def disconnect(self):
+        if self.reader is not None:
+            self.reader.cancel()
+        await self.communicator.disconnect()
+
+    async def _read(self):
+        while True:
+            payload = json.loads(await self.communicator.receive_from(timeout=3600))
+            self.frames += 1
+            if self.kind == "chat" and payload.get("type") == "send_message" and "message" in payload:
+                if payload["message"].get("sender_id") == self.user_id:
+                    self.message_id = payload["message"]["pk"]
+
+            if self.pending is None or self.pending.done():
+                continue
+            probe, future = self.pending_probe, self.pending
+            if payload.get("type") == "error":
+                future.set_result(False)
+            elif find_probe(payload) == probe:
+                future.set_result(True)
+
+    def build(self, action, probe) -> dict:
+        content = {"text": f"load test {probe}", "probe": probe}
+        if action == "get_next_batch":
+            return {"action": action, "request_id": probe}
+        if self.kind == "chat":
+            if action == "update" and self.message_id is not None:
+                return {
+                    "action": "update",
+                    "pk": self.message_id,
+                    "chat_id": self.target_id,
+                    "content": content,
+                }
+            return {"action": "create", "chat_id": self.target_id, "content": content}
+        if self.kind == "comnt":
+            if action == "update":
+                return {"action": "update", "pk": self.comment_id, "content": content}
+            return {"action": "create", "content": content}
+        return {"action": "create", "user_id": self.user_id, "content": content}
+
+    async def run(self, operations, think_time, timeout, results):
+        actions, weights = zip(*WORKLOADS[self.kind])
+        for _ in range(operations):
+            action = random.choices(actions, weights)[0]
+            if self.kind == "chat" and action == "update" and self.message_id is None:
+                action = "create"
+            probe = uuid.uuid4().hex
+            self.pending_probe, self.pending = probe, asyncio.get_running_loop().create_future()
+
+            started_at = time.perf_counter()
+            await self.communicator.send_to(text_data=json.dumps(self.build(action, probe)))
+            stats = results.setdefault(f"{self.kind}.{action}", {"latencies": [], "errors": 0, "timeouts": 0})
+            try:
+                if await asyncio.wait_for(self.pending, timeout):
+                    stats["latencies"].append(time.perf_counter() - started_at)
+                else:
+                    stats["errors"] += 1
+            except asyncio.TimeoutError:
+                stats["timeouts"] += 1
+            if think_time:
+                await asyncio.sleep(random.uniform(0, 2 * think_time))
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-tests the chat, comment and notification consumers with simulated WebSocket clients "
+        "on an in-memory channel layer and writes a JSON report."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--clients", type=int, default=1000, help="Simulated users, each with a chat socket.")
+        parser.add_argument("--room-size", type=int, default=10, help="Users per chat room and per task.")
+        parser.add_argument(
+            "--comment-ratio", type=float, default=0.3, help="Share of users that also open a comments socket."
+        )
+        parser.add_argument(
+            "--notify-ratio", type=float, default=0.3, help="Share of users that also open a notifications socket."
+        )
+        parser.add_argument("--operations", type=int, default=20, help="Operations sent by every socket.")
+        parser.add_argument("--think-time", type=float, default=0.05, help="Mean pause between operations (s).")
+        parser.add_argument("--timeout", type=float, default=30, help="Seconds to wait for a reply.")
+        parser.add_argument("--connect-concurrency", type=int, default=100, help="Handshakes in flight at once.")
+        parser.add_argument("--output", default=None, help="Write the JSON report to this file instead of stdout.")
+        parser.add_argument("--keep", action="store_true", help="Keep the seeded users, chats and tasks.")
+
+    def handle(self, *args, **kwargs):
+        # Every simulated socket lives in this process, no external channel layer is involved, and
+        # Celery jobs (large history pages, emails of the seeded users, who have none) run inline, as
+        # a worker could not reach the in-memory layer
+        channel_layers.set(DEFAULT_CHANNEL_LAYER, InMemoryChannelLayer(capacity=1000))
+        celery_app.conf.task_always_eager = True
+        clients, cleanup = self._seed(kwargs)
+        try:
+            report = async_to_sync(self._run)(clients, kwargs)
+        finally:
+            if not kwargs["keep"]:
+                cleanup()
+
+        report["config"] = {
+            key: kwargs[key]
+            for key in (
+                "clients", "room_size", "comment_ratio", "notify_ratio", "operations", "think_time", "timeout"
+            )
+        }
+        output = json.dumps(report, indent=2)
+        if kwargs["output"]:
+            with open(kwargs["output"], "w") as report_file:
+                report_file.write(output)
+        else:
+            self.stdout.write(output)
+
+    def _seed(self, kwargs):
+        run_id = uuid.uuid4().hex[:8]
+        users = CustomUser.objects.bulk_create(
+            [
+                CustomUser(username=f"loadtest_{run_id}_{number}", password=make_password(None))
+                for number in range(kwargs["clients"])
+            ]
+        )
+        tokens = []
+        for user in users:
+            token = CustomAuthToken(user=user, user_agent="loadtest", expires_at=now() + timedelta(days=1))
+            token.key = token.generate_jwt()
+            token.key_hash = token.hash_key(token.key)
+            tokens.append(token)
+        CustomAuthToken.objects.bulk_create(tokens)
+
+        rooms = [users[start : start + kwargs["room_size"]] for start in range(0, len(users), kwargs["room_size"])]
+        chats = Chat.objects.bulk_create(
+            [Chat(name=f"Load test {run_id} {number}", is_group=True) for number in range(len(rooms))]
+        )
+        Participant.objects.bulk_create(
+            [Participant(chat=chat, user=user) for chat, room in zip(chats, rooms) for user in room]
+        )
+        team = Team.objects.create(leader=users[0])
+        team.list_of_members.set(users)
+        tasks = Task.objects.bulk_create(
+            [Task(title=f"Load test {run_id} {number}", description="", team=team) for number in range(len(rooms))]
+        )
+
+        commenters = [user for user in users if random.random() < kwargs["comment_ratio"]]
+        room_of = {user.id: number for number, room in enumerate(rooms) for user in room}
+        comments = Comment.objects.bulk_create(
+            [Comment(member=user, task=tasks[room_of[user.id]], content={"text": "seed"}) for user in commenters]
+        )
+        comment_of = {comment.member_id: comment.id for comment in comments}
+
+        clients = []
+        for user, token in zip(users, tokens):
+            room = room_of[user.id]
+            query = f"?token={token.key}"
+            clients.append(SimulatedClient("chat", f"/ws/chat/{chats[room].id}/{query}", user.id, chats[room].id))
+            if user.id in comment_of:
+                clients.append(
+                    SimulatedClient(
+                        "comnt", f"/ws/comnt/{tasks[room].id}/{query}", user.id, tasks[room].id, comment_of[user.id]
+                    )
+                )
+            if random.random() < kwargs["notify_ratio"]:
+                clients.append(SimulatedClient("notify", f"/ws/notify/{user.id}/{query}", user.id, user.id))
+
+        def cleanup():
+            Chat.objects.filter(id__in=[chat.id for chat in chats]).delete()
+            CustomUser.objects.filter(id__in=[user.id for user in users]).delete()
+
+        return clients, cleanup
+
+    async def _run(self, clients, kwargs) -> dict:
+        from websocket.asgi import application
+
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        semaphore = asyncio.Semaphore(kwargs["connect_concurrency"])
+        handshakes = []
+
+        async def connect(client):
+            async with semaphore:
+                started_at = time.perf_counter()
+                connected = await client.connect(application)
+                handshakes.append(time.perf_counter() - started_at)
+                return connected
+
+        started_at = time.perf_counter()
+        connected = await asyncio.gather(*(connect(client) for client in clients))
+        connect_duration = time.perf_counter() - started_at
+        rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        online = [client for client, is_connected in zip(clients, connected) if is_connected]
+
+        results = {}
+        started_at = time.perf_counter()
+        await asyncio.gather(
+            *(client.run(kwargs["operations"], kwargs["think_time"], kwargs["timeout"], results) for client in online)
+        )
+        duration = time.perf_counter() - started_at
+
+        frames = sum(client.frames for client in online)
+        for client in online:
+            await client.disconnect()
+
+        all_latencies = list(itertools.chain.from_iterable(stats["latencies"] for stats in results.values()))
+        errors = sum(stats["errors"] for stats in results.values())
+        timeouts = sum(stats["timeouts"] for stats in results.values())
+        operations = len(all_latencies) + errors + timeouts
+        return {
+            "connections": {
+                "attempted": len(clients),
+                "open": len(online),
+                "failed": len(clients) - len(online),
+                "by_kind": {kind: sum(client.kind == kind for client in online) for kind in WORKLOADS},
+                "handshakes_per_sec": round(len(clients) / connect_duration, 1),
+                "handshake_p50_ms": self._percentile(handshakes, 50),
+                "handshake_p99_ms": self._percentile(handshakes, 99),
+                "max_rss_mb": round(rss_after / 1024, 1),
+                "rss_per_connection_kb": round((rss_after - rss_before) / max(len(online), 1), 1),
+            },
+            "operations": {
+                "total": operations,
+                "errors": errors,
+                "timeouts": timeouts,
+                "per_sec": round(operations / duration, 1),
+                "p50_ms": self._percentile(all_latencies, 50),
+                "p99_ms": self._percentile(all_latencies, 99),
+                "by_action": {
+                    action: {
+                        "count": len(stats["latencies"]) + stats["errors"] + stats["timeouts"],
+                        "errors": stats["errors"],
+                        "timeouts": stats["timeouts"],
+                        "p50_ms": self._percentile(stats["latencies"], 50),
+                        "p99_ms": self._percentile(stats["latencies"], 99),
+                    }
+                    for action, stats in sorted(results.items())
+                },
+            },
+            "frames": {"received": frames, "per_sec": round(frames / duration, 1)},
+            "database_executor": database_executor.stats(),
+            "duration_s": round(duration, 2),
+        }
+
+    @staticmethod
+    def _percentile(values, percentile) -> float | None:
+        if not values:
+            return None
+        if len(values) == 1:
+            return round(values[0] * 1000, 2)
+        return round(statistics.quantiles(values, n=100, method="inclusive")[percentile - 1] * 1000, 2)
@@ -0,0 +1,46 @@
+import json
+
+from asgiref.sync import async_to_sync
+from channels.layers import DEFAULT_CHANNEL_LAYER
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.channel_layers import probe_shards
+
+
+class Command(BaseCommand):
+    help = "Pings every Redis node of the channel layer and reports its health, latency and share of the hash ring."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--layer", default=DEFAULT_CHANNEL_LAYER, help="Alias of the channel layer to probe.")
+        parser.add_argument("--samples", type=int, default=3, help="Pings sent to every node.")
+        parser.add_argument("--timeout", type=float, default=2, help="Seconds to wait for each ping.")
+        parser.add_argument("--json", action="store_true", help="Print the report as JSON.")
+
+    def handle(self, *args, **kwargs):
+        config = settings.CHANNEL_LAYERS.get(kwargs["layer"])
+        if config is None:
+            raise CommandError(f"Unknown channel layer: {kwargs['layer']}")
+        if "redis" not in config["BACKEND"].lower():
+            raise CommandError(f"{config['BACKEND']} is not a Redis channel layer.")
+
+        hosts = config.get("CONFIG", {}).get("hosts")
+        report = async_to_sync(probe_shards)(hosts, samples=kwargs["samples"], timeout=kwargs["timeout"])
+        if kwargs["json"]:
+            self.stdout.write(json.dumps(report, indent=2))
+        else:
+            for shard in report:
+                if shard["ok"]:
+                    self.stdout.write(
+                        f"{shard['shard']:<40} ok    ring share {shard['ring_share']:6.1%}  "
+                        f"ping {shard['latency_ms']:.2f} ms (max {shard['max_latency_ms']:.2f})  "
+                        f"{shard['connected_clients'] if shard['connected_clients'] is not None else '?'} clients"
+                    )
+                else:
+                    self.stdout.write(
+                        f"{shard['shard']:<40} DOWN  ring share {shard['ring_share']:6.1%}  {shard['error']}"
+                    )
+
+        unhealthy = [shard["shard"] for shard in report if not shard["ok"]]
+        if unhealthy:
+            raise CommandError(f"Unreachable channel layer shards: {', '.join(unhealthy)}")
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from websocket.counters import reconcile_counters
+
+
+class Command(BaseCommand):
+    help = "Recomputes the sent and unread message counters of chat participants from the stored messages."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chat", type=int, action="append", dest="chat_ids", help="Chat to reconcile (repeatable).")
+
+    def handle(self, *args, **kwargs):
+        corrected = reconcile_counters(kwargs["chat_ids"])
+        self.stdout.write(f"{corrected} participant counters corrected.")
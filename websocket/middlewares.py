@@ -1,26 +1,32 @@
+from urllib.parse import parse_qs
+
 import jwt
-from asgiref.sync import sync_to_async
-from django.conf import settings
+from channels.db import database_sync_to_async
 from django.contrib.auth.models import AnonymousUser
 
-from users.models import CustomUser
+from users.models import CustomAuthToken
+from users.utils import TokenManager
 
 
-@sync_to_async
-def get_user_from_id(user_id):
+@database_sync_to_async
+def get_user_from_token(token_key):
     """
-    Fetch a user by their ID asynchronously, or return an AnonymousUser if no user with the
-    specified ID exists.
+    Resolve a token key into its user asynchronously, or return an AnonymousUser if the
+    token is invalid, expired, revoked or unknown.
+
+    The lookup goes through the token cache shared with the HTTP authentication, so a
+    cached key is turned into the user without any database query.
 
-    @param user_id: The unique identifier of the user to fetch.
-    @type user_id: int
+    @param token_key: The JWT sent by the client.
+    @type token_key: str
 
-    @return: The user object with the specified ID if found, otherwise an AnonymousUser.
+    @return: The owner of the token if it is valid, otherwise an AnonymousUser.
     """
     try:
-        return CustomUser.objects.get(id=user_id)
-    except CustomUser.DoesNotExist:
+        user, _ = TokenManager.authenticate_token(token_key)
+    except (jwt.InvalidTokenError, CustomAuthToken.DoesNotExist):
         return AnonymousUser()
+    return user
 
 
 class WebSocketJWTAuthMiddleware:
@@ -29,11 +35,13 @@ class WebSocketJWTAuthMiddleware:
 
     This middleware is designed to authenticate WebSocket connections
     by extracting a JWT token from the query string of the connection
-    and validating it. The decoded payload of the JWT token is used to
-    set the authenticated user in the connection scope. If the token
-    is missing, expired, or invalid, the user is set as an anonymous
-    user. This middleware is specifically intended for integration
-    within WebSocket-based applications.
+    (or, for older clients, from the `authorization` header) and validating
+    it. The token is verified in-process and resolved through the token
+    cache shared with `CustomJWTAuthentication`, whose entries live as long
+    as the token itself, so reconnect storms are served from the cache
+    instead of the database. The resolved user is set in the connection
+    scope, consumers read it from `scope["user"]`. If the token is missing,
+    expired, revoked or invalid, the user is set as an anonymous user.
 
     Attributes:
         app (Any): A callable representing the application or ASGI app
@@ -51,25 +59,22 @@ class WebSocketJWTAuthMiddleware:
         self.app = app
 
     async def __call__(self, scope, receive, send):
-        # Extract the token from the query string
-        query_string = scope.get("query_string", b"").decode("utf-8")
-        query_params = dict(param.split("=") for param in query_string.split("&") if "=" in param)
-        token = query_params.get("token", None)
-
-        if token:
-            try:
-                # Decode the JWT token
-                payload = jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])
-                user_id = payload.get("user_id")
-
-                # Fetch the user
-                scope["user"] = await get_user_from_id(user_id)
-            except jwt.ExpiredSignatureError:
-                scope["user"] = AnonymousUser()  # Token expired
-            except jwt.InvalidTokenError:
-                scope["user"] = AnonymousUser()  # Invalid token
-        else:
-            scope["user"] = AnonymousUser()  # No token provided
+        token = self.get_token(scope)
+        scope["user"] = await get_user_from_token(token) if token else AnonymousUser()
 
         # Pass the scope to the app
         return await self.app(scope, receive, send)
+
+    @staticmethod
+    def get_token(scope) -> str | None:
+        """
+        Returns the token from the `token` query parameter or the `authorization` header.
+        """
+        query_params = parse_qs(scope.get("query_string", b"").decode("utf-8"))
+        token = query_params.get("token", [None])[0]
+        if token:
+            return token
+
+        headers = dict(scope.get("headers", []))
+        authorization = headers.get(b"authorization", b"").decode("utf-8")
+        return authorization.split("Bearer ")[-1] or None
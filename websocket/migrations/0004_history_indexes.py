@@ -0,0 +1,26 @@
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Indexes are built without locking writes on large history tables
+    atomic = False
+
+    dependencies = [
+        ("websocket", "0003_alter_comment_updated_at_alter_message_updated_at"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="comment",
+            index=models.Index(fields=["task", "created_at", "id"], name="comment_task_history_idx"),
+        ),
+        AddIndexConcurrently(
+            model_name="message",
+            index=models.Index(fields=["chat", "created_at", "id"], name="message_chat_history_idx"),
+        ),
+        AddIndexConcurrently(
+            model_name="notification",
+            index=models.Index(fields=["user", "created_at", "id"], name="notification_user_history_idx"),
+        ),
+    ]
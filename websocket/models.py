@@ -8,6 +8,11 @@ class Comment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(null=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["task", "created_at", "id"], name="comment_task_history_idx"),
+        ]
+
     def __str__(self):
         return f"{self.content}"
 
@@ -19,6 +24,11 @@ class Message(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(null=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["chat", "created_at", "id"], name="message_chat_history_idx"),
+        ]
+
     def __str__(self):
         return f"{self.content} | {self.sender}"
 
@@ -28,5 +38,10 @@ class Notification(models.Model):
     content = models.JSONField()
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "created_at", "id"], name="notification_user_history_idx"),
+        ]
+
     def __str__(self):
         return f"{self.content}"
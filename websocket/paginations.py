@@ -0,0 +1,91 @@
+import base64
+from datetime import datetime
+
+from django.conf import settings
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class HistoryCursorPagination(BasePagination):
+    """
+    Keyset pagination of history items (comments, messages, notifications), newest first.
+
+    Pages are ordered by `(created_at, id)` and continue after the position encoded in
+    an opaque cursor, so fetching a page costs the same index range scan no matter how
+    deep into the history it is. The scan is backed by the `(<owner>_id, created_at, id)`
+    indexes of the history models. The same paginator serves the WebSocket consumers
+    (`paginate`) and REST views (`paginate_queryset` / `get_paginated_response`).
+
+    Attributes:
+        page_size (int): Maximum number of items in a page.
+        cursor_query_param (str): Query parameter holding the cursor in REST requests.
+    """
+    ordering = ("-created_at", "-id")
+    cursor_query_param = "cursor"
+
+    def __init__(self, page_size=None):
+        self.page_size = page_size or settings.WEBSOCKET_HISTORY_PAGE_SIZE
+        self.next_cursor = None
+
+    @staticmethod
+    def encode_cursor(created_at: datetime, pk: int) -> str:
+        position = f"{created_at.isoformat()}|{pk}"
+        return base64.urlsafe_b64encode(position.encode()).decode()
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> tuple[datetime, int]:
+        try:
+            created_at, pk = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+            return datetime.fromisoformat(created_at), int(pk)
+        except (TypeError, ValueError, UnicodeDecodeError) as e:
+            raise InvalidCursor(f"Invalid cursor: {cursor}") from e
+
+    def paginate(self, queryset, cursor=None, last_item_id=None) -> tuple[list, str | None]:
+        """
+        Returns the items of the page after the cursor and the cursor of the next page.
+
+        `last_item_id` is the position format of older clients; it is resolved to the
+        item's `(created_at, id)` with a primary-key lookup.
+
+        Raises:
+            InvalidCursor: If the cursor cannot be decoded.
+        """
+        position = None
+        if cursor:
+            position = self.decode_cursor(cursor)
+        elif last_item_id:
+            position = queryset.model.objects.filter(pk=last_item_id).values_list("created_at", "id").first()
+            if position is None:
+                return [], None
+
+        if position is not None:
+            created_at, pk = position
+            # The redundant bound lets Postgres use `created_at` as an index condition
+            queryset = queryset.filter(created_at__lte=created_at).filter(
+                Q(created_at__lt=created_at) | Q(id__lt=pk)
+            )
+
+        items = list(queryset.order_by(*self.ordering)[: self.page_size + 1])
+        next_cursor = None
+        if len(items) > self.page_size:
+            items = items[: self.page_size]
+            next_cursor = self.encode_cursor(items[-1].created_at, items[-1].id)
+        return items, next_cursor
+
+    # --- REST framework ---
+    def paginate_queryset(self, queryset, request, view=None):
+        cursor = request.query_params.get(self.cursor_query_param)
+        try:
+            items, self.next_cursor = self.paginate(queryset, cursor=cursor)
+        except InvalidCursor:
+            raise NotFound("Invalid cursor")
+        return items
+
+    def get_paginated_response(self, data):
+        return Response({"next_cursor": self.next_cursor, "results": data})
@@ -0,0 +1,158 @@
+import time
+from functools import lru_cache
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+from redis import asyncio as aioredis
+
+
+def presence_member(user_id, channel_name: str) -> str:
+    return f"{user_id}|{channel_name}"
+
+
+def member_user_id(member) -> int:
+    if isinstance(member, bytes):
+        member = member.decode()
+    return int(member.split("|", 1)[0])
+
+
+def other_connections(members, user_id, member: str) -> bool:
+    """
+    Returns whether the user has connections in `members` other than `member`.
+    """
+    members = {item.decode() if isinstance(item, bytes) else item for item in members}
+    return any(member_user_id(item) == user_id for item in members - {member})
+
+
+class RedisPresenceStore:
+    """
+    Tracks the users connected to a group in Redis sorted sets.
+
+    Every connection is a member `"<user id>|<channel name>"` of the group's set, scored
+    with the time it expires at. Connections refresh their score with heartbeats, so the
+    connections of a process that died without disconnecting expire after `ttl` seconds:
+    reads leave them out right away and the next heartbeat in the group prunes them and
+    reports the users who are gone with them. A user counts as online while any of their
+    connections (devices, browser tabs) is alive.
+
+    Attributes:
+        ttl (float): Seconds a connection stays in the set without a heartbeat.
+        prefix (str): Prefix of the sorted set keys.
+    """
+
+    def __init__(self, url: str, ttl: float, prefix: str = "presence"):
+        self.ttl = ttl
+        self.prefix = prefix
+        self.redis = aioredis.Redis.from_url(url)
+
+    def _key(self, group_name: str) -> str:
+        return f"{self.prefix}:{group_name}"
+
+    @staticmethod
+    def _alive_since(now: float) -> str:
+        # Exclusive lower bound: a connection scored `now` has just expired
+        return f"({now}"
+
+    async def join(self, group_name: str, user_id, channel_name: str) -> bool:
+        """
+        Adds the connection to the group.
+
+        Returns:
+            bool: Whether the user was not connected to the group before.
+        """
+        key, member, now = self._key(group_name), presence_member(user_id, channel_name), time.time()
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.zadd(key, {member: now + self.ttl})
+            pipe.expire(key, int(self.ttl) + 1)
+            pipe.zrangebyscore(key, self._alive_since(now), "+inf")
+            *_, members = await pipe.execute()
+        return not other_connections(members, user_id, member)
+
+    async def heartbeat(self, group_name: str, user_id, channel_name: str) -> set[int]:
+        """
+        Keeps the connection alive and prunes the connections of the group that stopped
+        sending heartbeats.
+
+        Returns:
+            set[int]: IDs of the users whose last connection was pruned, they left the group
+            without a leave event.
+        """
+        key, now = self._key(group_name), time.time()
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.zadd(key, {presence_member(user_id, channel_name): now + self.ttl})
+            pipe.expire(key, int(self.ttl) + 1)
+            await pipe.execute()
+
+        expired = await self.redis.zrangebyscore(key, "-inf", now)
+        if not expired:
+            return set()
+        # Heartbeats of other connections may find the same members, only the one removing them reports them
+        async with self.redis.pipeline(transaction=True) as pipe:
+            for member in expired:
+                pipe.zrem(key, member)
+            removed = await pipe.execute()
+        pruned = {member_user_id(member) for member, count in zip(expired, removed) if count}
+        return pruned - await self.online(group_name)
+
+    async def leave(self, group_name: str, user_id, channel_name: str) -> bool:
+        """
+        Removes the connection from the group.
+
+        Returns:
+            bool: Whether it was the user's last connection to the group.
+        """
+        key, member, now = self._key(group_name), presence_member(user_id, channel_name), time.time()
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.zrem(key, member)
+            pipe.zrangebyscore(key, self._alive_since(now), "+inf")
+            *_, members = await pipe.execute()
+        return not other_connections(members, user_id, member)
+
+    async def online(self, group_name: str) -> set[int]:
+        """
+        Returns the IDs of the users connected to the group.
+        """
+        members = await self.redis.zrangebyscore(self._key(group_name), self._alive_since(time.time()), "+inf")
+        return {member_user_id(member) for member in members}
+
+
+class InMemoryPresenceStore:
+    """
+    Process-local presence store with the interface of `RedisPresenceStore`, for tests and
+    single-process development servers.
+    """
+
+    def __init__(self, ttl: float, **kwargs):
+        self.ttl = ttl
+        self.groups = {}
+
+    async def join(self, group_name: str, user_id, channel_name: str) -> bool:
+        first = user_id not in await self.online(group_name)
+        self.groups.setdefault(group_name, {})[presence_member(user_id, channel_name)] = time.time() + self.ttl
+        return first
+
+    async def heartbeat(self, group_name: str, user_id, channel_name: str) -> set[int]:
+        members = self.groups.setdefault(group_name, {})
+        now = time.time()
+        members[presence_member(user_id, channel_name)] = now + self.ttl
+        expired = [member for member, expires_at in members.items() if expires_at <= now]
+        for member in expired:
+            del members[member]
+        return {member_user_id(member) for member in expired} - await self.online(group_name)
+
+    async def leave(self, group_name: str, user_id, channel_name: str) -> bool:
+        self.groups.get(group_name, {}).pop(presence_member(user_id, channel_name), None)
+        return user_id not in await self.online(group_name)
+
+    async def online(self, group_name: str) -> set[int]:
+        now = time.time()
+        members = self.groups.get(group_name, {})
+        return {member_user_id(member) for member, expires_at in members.items() if expires_at > now}
+
+
+@lru_cache(maxsize=None)
+def get_presence_store():
+    """
+    Returns the process-wide presence store configured by `PRESENCE_BACKEND`.
+    """
+    return import_string(settings.PRESENCE_BACKEND)(url=settings.PRESENCE_REDIS_URL, ttl=settings.PRESENCE_TTL)
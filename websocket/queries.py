@@ -0,0 +1,107 @@
+from django.db import connections, transaction
+from django.utils.timezone import now
+
+from websocket.counters import forget_message
+from websocket.models import Comment, Message, Notification
+
+
+def update_returning(model, filters: dict, **values) -> list:
+    """
+    Updates the matching rows and returns them as model instances, in one statement.
+
+    Runs a parameterized `UPDATE ... WHERE ... RETURNING` listing the model's columns,
+    so the updated rows are not read again.
+
+    Args:
+        model (type[Model]): The model of the updated table.
+        filters (dict): Field names (or attnames, e.g. "member_id") and the values the
+            rows must be equal to.
+        **values: New values of the fields.
+
+    Returns:
+        list[Model]: The updated instances, empty if no row matched.
+    """
+    connection = connections[model.objects.db]
+    qn = connection.ops.quote_name
+    opts = model._meta
+
+    assignments, conditions, params = [], [], []
+    for name, value in values.items():
+        field = opts.get_field(name)
+        assignments.append(f"{qn(field.column)} = %s")
+        params.append(field.get_db_prep_save(value, connection))
+    for name, value in filters.items():
+        field = opts.get_field(name)
+        conditions.append(f"{qn(field.column)} = %s")
+        params.append(field.get_db_prep_value(value, connection))
+
+    columns = ", ".join(qn(field.column) for field in opts.concrete_fields)
+    sql = (
+        f"UPDATE {qn(opts.db_table)} SET {', '.join(assignments)} "
+        f"WHERE {' AND '.join(conditions)} "
+        f"RETURNING {columns}"
+    )
+    return list(model.objects.raw(sql, params))
+
+
+def update_comment(comment_id, member_id, content) -> Comment | None:
+    """
+    Replaces the content of a member's comment.
+
+    Returns:
+        Comment or None: The updated comment, or None if the member has no such comment.
+    """
+    comments = update_returning(Comment, {"id": comment_id, "member_id": member_id}, content=content, updated_at=now())
+    return comments[0] if comments else None
+
+
+def delete_comment(comment_id, member_id) -> bool:
+    """
+    Deletes a member's comment.
+
+    Returns:
+        bool: Whether the member had such a comment.
+    """
+    deleted, _ = Comment.objects.filter(id=comment_id, member_id=member_id).delete()
+    return deleted > 0
+
+
+def update_message(message_id, chat_id, sender_id, content) -> Message | None:
+    """
+    Replaces the content of a message sent by the user to the chat.
+
+    Returns:
+        Message or None: The updated message, or None if the user sent no such message.
+    """
+    messages = update_returning(
+        Message,
+        {"id": message_id, "chat_id": chat_id, "sender_id": sender_id},
+        content=content,
+        updated_at=now(),
+    )
+    return messages[0] if messages else None
+
+
+def delete_message(message_id, sender_id) -> Message | None:
+    """
+    Deletes a message of the sender and takes it back out of the chat counters.
+
+    Returns:
+        Message or None: The deleted message, or None if the sender has no such message.
+    """
+    with transaction.atomic():
+        message = Message.objects.select_for_update().filter(id=message_id, sender_id=sender_id).first()
+        if message is not None:
+            forget_message(message)
+    return message
+
+
+def delete_notifications(notification_ids, user_id) -> int:
+    """
+    Deletes the listed notifications that belong to the user, ignoring any other ID.
+
+    Returns:
+        int: The number of deleted notifications.
+    """
+    deleted, _ = Notification.objects.filter(id__in=notification_ids, user_id=user_id).delete()
+    return deleted
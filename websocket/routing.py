@@ -0,0 +1,40 @@
+from websocket.codecs import encode_event
+from websocket.utils import notification_group_name
+
+
+class NotificationRouter:
+    """
+    Maps users to the channel layer groups their notifications are delivered to.
+
+    Every `NotificationConsumer` connection of a user (one per device, browser tab, ...)
+    joins the groups returned by `groups_for`, so an event published for the user reaches
+    all of their sessions and no other socket. Events therefore never carry a recipient
+    list, and sockets never have to filter out notifications meant for somebody else.
+    """
+
+    @staticmethod
+    def groups_for(user_id) -> list[str]:
+        """
+        Returns the groups joined by the notification connections of the user.
+        """
+        return [notification_group_name(user_id)]
+
+    @classmethod
+    async def publish(cls, channel_layer, user_id, event: dict) -> None:
+        """
+        Delivers the event to every notification connection of the user, encoded once
+        for all of them.
+        """
+        event = encode_event(event)
+        for group_name in cls.groups_for(user_id):
+            await channel_layer.group_send(group_name, event)
+
+    @classmethod
+    async def join(cls, channel_layer, user_id, channel_name: str) -> None:
+        for group_name in cls.groups_for(user_id):
+            await channel_layer.group_add(group_name, channel_name)
+
+    @classmethod
+    async def leave(cls, channel_layer, user_id, channel_name: str) -> None:
+        for group_name in cls.groups_for(user_id):
+            await channel_layer.group_discard(group_name, channel_name)
@@ -0,0 +1,79 @@
+import logging
+
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from tasks.models import Task
+from users.models import Chat, CustomUser, Participant, Team
+from websocket.utils import chat_group_name, push_connection_event, task_group_name, user_group_name
+
+logger = logging.getLogger(__name__)
+
+
+@receiver(post_save, sender=Participant)
+@receiver(post_delete, sender=Participant)
+def handle_participants_change(sender, instance, **kwargs):
+    logger.debug(f"Refreshing WebSocket connections of chat ID: {instance.chat_id}")
+    push_connection_event(chat_group_name(instance.chat_id), "refresh_chat")
+
+
+@receiver(post_save, sender=Chat)
+def handle_chat_change(sender, instance, created, **kwargs):
+    # Also covers participants bulk-created by `UpdateChatSerializer`, which saves the chat afterwards
+    if created:
+        return
+
+    logger.debug(f"Refreshing WebSocket connections of chat ID: {instance.id}")
+    push_connection_event(chat_group_name(instance.id), "refresh_chat")
+
+
+@receiver(post_save, sender=Task)
+def handle_task_change(sender, instance, created, **kwargs):
+    if created:
+        return
+
+    logger.debug(f"Refreshing WebSocket connections of task ID: {instance.id}")
+    push_connection_event(task_group_name(instance.id), "refresh_task")
+
+
+def refresh_team_tasks(team_ids) -> None:
+    for task_id in Task.objects.filter(team_id__in=team_ids).values_list("id", flat=True):
+        push_connection_event(task_group_name(task_id), "refresh_task")
+
+
+@receiver(post_save, sender=Team)
+def handle_team_change(sender, instance, created, **kwargs):
+    if created:
+        return
+
+    logger.debug(f"Refreshing WebSocket connections of the tasks of team ID: {instance.id}")
+    refresh_team_tasks([instance.id])
+
+
+@receiver(m2m_changed, sender=Team.list_of_members.through)
+def handle_team_members_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse and action == "pre_clear":
+        # `post_clear` of `user.team_members.clear()` does not say which teams were left
+        instance._cleared_team_ids = list(instance.team_members.values_list("id", flat=True))
+        return
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+
+    if not reverse:
+        team_ids = [instance.id]
+    elif action == "post_clear":
+        team_ids = instance.__dict__.pop("_cleared_team_ids", [])
+    else:
+        team_ids = pk_set
+
+    logger.debug(f"Refreshing WebSocket connections of the tasks of team IDs: {team_ids}")
+    refresh_team_tasks(team_ids)
+
+
+@receiver(post_save, sender=CustomUser)
+def handle_user_change(sender, instance, created, update_fields=None, **kwargs):
+    if created or (update_fields and set(update_fields) <= {"last_login"}):
+        return
+
+    logger.debug(f"Refreshing WebSocket connections of user ID: {instance.id}")
+    push_connection_event(user_group_name(instance.id), "refresh_user")
@@ -0,0 +1,154 @@
+import logging
+
+from asgiref.sync import async_to_sync, sync_to_async
+from channels.layers import get_channel_layer
+from django.db import transaction
+
+from websocket.executors import database_executor
+from websocket.paginations import HistoryCursorPagination
+
+logger = logging.getLogger(__name__)
+
+
+def chat_group_name(chat_id) -> str:
+    """
+    Returns the group joined by the `MessageConsumer` connections of the chat.
+    """
+    return f"chat_{chat_id}"
+
+
+def task_group_name(task_id) -> str:
+    """
+    Returns the group joined by the `CommentConsumer` connections of the task.
+    """
+    return f"comments_{task_id}"
+
+
+def notification_group_name(user_id) -> str:
+    """
+    Returns the group joined by the `NotificationConsumer` connections of the user.
+    """
+    return f"notifications_{user_id}"
+
+
+def user_group_name(user_id) -> str:
+    """
+    Returns the group joined by every authenticated WebSocket connection of the user.
+    """
+    return f"user_{user_id}"
+
+
+def push_connection_event(group_name: str, event_type: str, **payload) -> None:
+    """
+    Sends a server event to the WebSocket connections of the group once the current
+    transaction is committed.
+
+    Consumers keep per-connection state (username, chat participants) resolved in
+    `connect()`, these events tell them to reload it. A missing channel layer only
+    costs a warning, the caller's write is never rolled back because of it.
+
+    Args:
+        group_name (str): Channel layer group to send the event to.
+        event_type (str): Name of the consumer handler, e.g. "refresh_chat".
+        **payload: Additional fields of the event.
+    """
+    def send():
+        try:
+            async_to_sync(get_channel_layer().group_send)(group_name, {"type": event_type, **payload})
+        except Exception as e:
+            logger.warning(f"Failed to send {event_type} to {group_name}: {e}")
+
+    transaction.on_commit(send)
+
+
+def load_history_page(
+    model, serializer_class, filter_kwargs: dict, batch_size: int, cursor=None, last_item_id=None
+) -> dict:
+    """
+    Returns a serialized page of history items matching the filter, newest first.
+
+    Pages are cut by `HistoryCursorPagination` on `(created_at, id)`, the returned
+    `next_cursor` continues exactly where the page ended.
+
+    Args:
+        model: Model class of the history items.
+        serializer_class: Serializer used for the items.
+        filter_kwargs (dict): Filter selecting the history (e.g. `{"chat_id": 1}`).
+        batch_size (int): Maximum number of items in the page.
+        cursor (str | None): Cursor returned with the previous page.
+        last_item_id (int | None): Position used by older clients instead of a cursor.
+
+    Raises:
+        InvalidCursor: If the cursor cannot be decoded.
+    """
+    items, next_cursor = HistoryCursorPagination(batch_size).paginate(
+        model.objects.filter(**filter_kwargs), cursor=cursor, last_item_id=last_item_id
+    )
+    return {"data": serializer_class(items, many=True).data, "next_cursor": next_cursor}
+
+
+async def aload_history_page(model, serializer_class, filter_kwargs: dict, batch_size: int, **position) -> dict:
+    """
+    Runs `load_history_page` in the database executor.
+    """
+    return await database_executor.run(
+        load_history_page, model, serializer_class, filter_kwargs, batch_size, **position
+    )
+
+
+async def fan_out_notifications(
+    channel_layer, recipient_ids, subject: str, content: dict, unread_counts=None, recipient_emails=None
+) -> list:
+    """
+    Notifies every recipient of an event in a fixed number of steps.
+
+    All notifications are inserted with one `bulk_create`, each recipient gets one event
+    in their own notification group, and the emails go out in a single batched job.
+    The work grows linearly with the number of recipients, events no longer carry the
+    whole recipient list.
+
+    Args:
+        channel_layer: Channel layer used to publish the events.
+        recipient_ids (list[int]): IDs of the users to notify.
+        subject (str): Subject of the notification and its email.
+        content (dict): Content of the notification, `content["content"]` is the email text.
+        unread_counts (dict[int, int] or None): Unread counters of the recipients, added to
+            their events when given.
+        recipient_emails (list[str] or None): Pre-resolved addresses of the recipients, the
+            email job resolves them itself when omitted.
+
+    Returns:
+        list[Notification]: The created notifications.
+    """
+    from core.tasks import send_notification_emails
+    from websocket.models import Notification
+    from websocket.routing import NotificationRouter
+    from websocket.serializers import NotificationSerializer
+
+    recipient_ids = list(dict.fromkeys(recipient_ids))
+    if not recipient_ids:
+        return []
+
+    notifications = await database_executor.run(
+        Notification.objects.bulk_create,
+        [Notification(user_id=recipient_id, content=content) for recipient_id in recipient_ids],
+    )
+    for notification in notifications:
+        event = {
+            "type": "send_notification",
+            "subject": subject,
+            "user_id": notification.user_id,
+            "content": content,
+            "notification": NotificationSerializer(notification).data,
+        }
+        if unread_counts and notification.user_id in unread_counts:
+            event["unread_count"] = unread_counts[notification.user_id]
+        await NotificationRouter.publish(channel_layer, notification.user_id, event)
+
+    # `delay` publishes to the broker, keep that blocking call off the event loop
+    if recipient_emails is None:
+        email_job = {"recipient_ids": recipient_ids}
+    else:
+        email_job = {"emails": recipient_emails}
+    await sync_to_async(send_notification_emails.delay)(subject=subject, message=content["content"], **email_job)
+    return notifications